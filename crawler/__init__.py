@@ -1,30 +1,94 @@
-from selenium import webdriver
-import selenium
-import selenium.webdriver
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import (
-    TimeoutException,
-    ElementClickInterceptedException,
-    StaleElementReferenceException,
-)
+import importlib
 
 from crawler import soupr
 from .logger import logger
-import time
-from bs4 import BeautifulSoup
+from .cache import CitationCache
+from .journal import CheckpointJournal, journal_path_for
+from .metrics import metrics
+from .ratelimit import HostRateLimiter
+from .throttle import Throttle
+from .workqueue import WorkQueue, default_owner
+from .writers import WRITERS, ensure_extension, open_writer, resolve_save_path
 
-__all__ = ["get_page", "extract"]
+__all__ = ["get_page", "extract", "WRITERS", "metrics", "soupr"]
 
-chrome_options = webdriver.ChromeOptions()
-chrome_options.add_argument("--headless")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--start-fullscreen")
+# Loaded on first access: selenium alone takes a few hundred milliseconds to
+# import, which `--help`, argument errors and HTTP-only runs shouldn't pay
+LAZY_ATTRIBUTES = {
+    "SeleniumFetcher": ".browser",
+    "get_page": ".browser",
+    "HttpFetcher": ".httpfetch",
+    "crawl": ".pipeline",
+    "ResultStore": ".results",
+    "extract_citation_counts": ".soupr",
+}
 
-driver = None
+
+def __getattr__(name):
+    if name in LAZY_ATTRIBUTES:
+        module = importlib.import_module(LAZY_ATTRIBUTES[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def selenium_fetcher(**kwargs):
+    """Create a SeleniumFetcher, importing selenium only now."""
+    from .browser import SeleniumFetcher
+
+    return SeleniumFetcher(**kwargs)
+
+
+def http_fetcher(**kwargs):
+    """Create an HttpFetcher, importing urllib.request only now."""
+    from .httpfetch import HttpFetcher
+
+    return HttpFetcher(**kwargs)
+
+
+BACKENDS = {
+    "selenium": selenium_fetcher,
+    "http": http_fetcher,
+}
+
+# PageArchive that every fetcher made by create_fetcher writes its pages to
+ARCHIVE = None
+
+# Where the selenium backend extracts fields: "html" returns the pages for
+# soupr to parse, "script" extracts the fields inside the browser
+EXTRACTIONS = ["html", "script"]
+EXTRACTION = "html"
+
+
+# Host every fetcher made by create_fetcher talks to (None for Scholar itself)
+BASE_URL = None
+
+
+def set_base_url(url: str = None):
+    """Send every request from now on to `url` instead of Scholar (None to undo)."""
+    global BASE_URL
+    BASE_URL = url
+
+
+def set_extraction(mode: str):
+    """Select how the selenium backend extracts fields from the pages."""
+    global EXTRACTION
+    if mode not in EXTRACTIONS:
+        raise ValueError(
+            f"Unknown extraction '{mode}', expected one of: {', '.join(EXTRACTIONS)}"
+        )
+    EXTRACTION = mode
+
+
+def set_archive(directory: str = None):
+    """Archive every page fetched from now on in `directory` (None to stop)."""
+    global ARCHIVE
+    if ARCHIVE is not None:
+        ARCHIVE.close()
+        ARCHIVE = None
+    if directory is not None:
+        from .archive import PageArchive
+
+        ARCHIVE = PageArchive(directory)
 
 
 def hello_world():
@@ -43,487 +107,738 @@ def year_extract(year: str) -> str:
     return year_range
 
 
-def extract_citation_counts(article_soup):
+def create_fetcher(
+    backend: str = "selenium",
+    workers: int = 1,
+    rate: float = 1.0,
+    burst: int = 1,
+    max_rate: float = None,
+    retries: int = 3,
+):
     """
-    Extract citation counts per year from an article page.
+    Create the fetch backend used for a run.
+
+    Requests go through a Throttle: the rate starts at `rate` and is raised
+    towards `max_rate` while Scholar answers normally, and cut back (along
+    with the number of requests in flight) as soon as it serves a block page.
+    If an archive was set with `set_archive`, every page fetched is archived;
+    if a host was set with `set_base_url`, it is used instead of Scholar.
 
     Args:
-        article_soup: BeautifulSoup object of the article page
+        backend: Name of the backend, one of BACKENDS
+        workers: Number of pages the backend may fetch concurrently
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        max_rate: Highest rate per host the throttle may probe up to
+            (defaults to `rate`, i.e. only ever slow down)
+        retries: Retries of a blocked request before giving up on it
 
     Returns:
-        dict: Dictionary mapping years to citation counts
+        A fetcher instance (SeleniumFetcher or HttpFetcher)
     """
-    citation_data = {}
-
-    # Find the citation graph
-    citation_bars = article_soup.select("#gsc_oci_graph_bars .gsc_oci_g_a")
-
-    # If no citation graph is found, return empty dict
-    if not citation_bars:
-        return citation_data
-
-    # Extract year and citation count from each bar
-    for bar in citation_bars:
-        year = None
-        count = None
+    if backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown backend '{backend}', expected one of: {', '.join(BACKENDS)}"
+        )
+    logger.info(
+        f"Using '{backend}' fetch backend with {workers} worker(s), "
+        f"limited to {rate} request(s)/s per host (burst {burst})"
+    )
+    limiter = Throttle(
+        HostRateLimiter(rate, burst),
+        max_rate=max_rate,
+        # Profile loads and article fetches may overlap
+        max_concurrency=2 * max(1, workers),
+        retries=retries,
+    )
+    options = {}
+    if backend == "selenium" and EXTRACTION == "script":
+        options["extract_in_browser"] = True
+    if BASE_URL is not None:
+        options["base_url"] = BASE_URL
+    fetcher = BACKENDS[backend](workers=workers, limiter=limiter, **options)
+    if ARCHIVE is not None:
+        from .archive import ArchivingFetcher
+
+        fetcher = ArchivingFetcher(fetcher, ARCHIVE)
+    return fetcher
 
-        # Extract year from the href attribute (as_ylo and as_yhi parameters)
-        href = bar.get("href", "")
-        year_match = href.find("as_ylo=")
-        if year_match != -1:
-            year = href[year_match + 7 : year_match + 11]
 
-        # Extract count from the span element
-        count_elem = bar.select_one(".gsc_oci_g_al")
-        if count_elem:
-            count = count_elem.text.strip()
+def ensure_xlsx_extension(save_path: str) -> str:
+    """Ensure the save path has a .xlsx extension."""
+    return ensure_extension(save_path, ".xlsx")
 
-        if year and count:
-            citation_data[year] = int(count)
 
-    return citation_data
+def build_headers(year_range: list[str]) -> list[str]:
+    """Return the output column names for a year range."""
+    headers = ["scholar_id", "title", "publication_year"]
+    headers.extend([f"citations_{year}" for year in year_range])
+    return headers
 
 
-def get_article_page(driver, article_url):
+def extract_from_txt(
+    scholar_ids: list[str],
+    year: str,
+    save_path: str,
+    overwrite: bool,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    cache: CitationCache = None,
+    resume: bool = False,
+    journal_path: str = None,
+    output_format: str = "xlsx",
+    summary_path: str = None,
+    max_rate: float = None,
+    retries: int = 3,
+):
     """
-    Navigate to an article page and return its soup.
+    Extract citation data for multiple scholar IDs from a text file.
 
-    Args:
-        driver: Selenium webdriver instance
-        article_url: URL of the article
+    Progress is written to a checkpoint journal as each article and scholar
+    finishes; with `resume`, work already in the journal is skipped and the
+    output is rebuilt from it. Rows are streamed to the output file as they
+    complete.
 
-    Returns:
-        BeautifulSoup object of the article page
+    Args:
+        scholar_ids: List of Google Scholar IDs
+        year: Year or range of years to extract citations for
+        save_path: Path where to save the output file
+        overwrite: Whether to overwrite the output file if it exists
+        workers: Number of workers used to crawl article pages
+        backend: Fetch backend to use ("selenium" or "http")
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        cache: Optional CitationCache consulted before fetching article pages
+        resume: Continue the run recorded in the journal instead of starting over
+        journal_path: Path of the checkpoint journal (derived from save_path if None)
+        output_format: Output format, one of WRITERS
+        summary_path: Optional path of a per-scholar summary table
+        max_rate: Highest rate per host the throttle may probe up to
+        retries: Retries of a blocked request before giving up on it
     """
-    try:
-        driver.get(article_url)
-
-        # Wait for the citation information to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "gsc_oci_value"))
-        )
-
-        # Get the page source and parse with BeautifulSoup
-        page_source = driver.page_source
-        return BeautifulSoup(page_source, "html.parser")
-    except Exception as e:
-        logger.error(f"Error loading article page: {str(e)}")
-        return None
+    from .pipeline import crawl
 
+    # Extract year range once (it's the same for all scholars)
+    year_range = year_extract(year)
 
-def extract_citations(scholar_id, articles, target_years):
-    """
-    Extract citation data for a list of articles.
+    if journal_path is None:
+        journal_path = journal_path_for(save_path)
+
+    # Create the fetcher once to reuse across all scholar IDs
+    with (
+        CheckpointJournal(journal_path, year_range, resume) as journal,
+        open_writer(
+            output_format, save_path, build_headers(year_range), overwrite
+        ) as writer,
+        create_fetcher(backend, workers, rate, burst, max_rate, retries) as fetcher,
+    ):
+        on_rows, on_scholar, store = collect_results(
+            writer.write_rows, year_range, summary_path
+        )
+        crawl(
+            scholar_ids,
+            year_range,
+            fetcher,
+            on_rows=on_rows,
+            on_scholar=on_scholar,
+            cache=cache,
+            journal=journal,
+        )
+        fetcher.limiter.log_stats()
 
-    Args:
-        scholar_id: Google Scholar ID of the author
-        articles: List of article dictionaries with title, url, and year
-        target_years: List of years for which to extract citation data
+    if cache is not None:
+        cache.log_stats()
 
-    Returns:
-        list: List of lists with citation data in format
-             [scholar_id, title, pub_year, citation_year1, citation_year2, ...]
-    """
-    global driver
-    citation_data = []
+    if store is not None:
+        write_summary(store, summary_path, overwrite, output_format)
 
-    try:
-        if driver is None:
-            driver = initialize_driver()
+    if writer.rows_written:
+        logger.info(
+            f"Wrote {writer.rows_written} rows from {len(scholar_ids)} scholars"
+        )
+    else:
+        logger.warning("No data collected from any scholar ID")
 
-        for article in articles:
-            title = article["title"]
-            url = article["url"]
-            pub_year = article["year"]
 
-            logger.info(f"Extracting citation data for article: {title}")
+def extract(
+    scholar_id: str,
+    year: str,
+    save_path: str,
+    overwrite: bool,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    cache: CitationCache = None,
+    output_format: str = "xlsx",
+    summary_path: str = None,
+    max_rate: float = None,
+    retries: int = 3,
+):
+    from .pipeline import crawl
 
-            row_data = [scholar_id, title, pub_year]
+    year_range = year_extract(year)
 
-            # Get the article page
-            article_soup = get_article_page(driver, url)
-            if article_soup is None:
-                # Add -1 for each target year if article page couldn't be loaded
-                row_data.extend([-1] * len(target_years))
-                citation_data.append(row_data)
-                continue
+    with (
+        open_writer(
+            output_format, save_path, build_headers(year_range), overwrite
+        ) as writer,
+        create_fetcher(backend, workers, rate, burst, max_rate, retries) as fetcher,
+    ):
+        on_rows, on_scholar, store = collect_results(
+            writer.write_rows, year_range, summary_path
+        )
+        # Extract citation data for all articles, writing rows as they finish
+        crawl(
+            [scholar_id],
+            year_range,
+            fetcher,
+            on_rows=on_rows,
+            on_scholar=on_scholar,
+            cache=cache,
+        )
+        fetcher.limiter.log_stats()
 
-            # Extract citation counts
-            citation_counts = extract_citation_counts(article_soup)
+    if cache is not None:
+        cache.log_stats()
 
-            # Add citation counts for each target year
-            for year in target_years:
-                row_data.append(citation_counts.get(year, -1))
+    if store is not None:
+        write_summary(store, summary_path, overwrite, output_format)
 
-            citation_data.append(row_data)
 
-            # Add a small delay to avoid overwhelming the server
-            time.sleep(1)
+def summarize_profiles(
+    scholar_ids: list[str],
+    year: str,
+    save_path: str,
+    overwrite: bool,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    output_format: str = "xlsx",
+    max_rate: float = None,
+    retries: int = 3,
+):
+    """
+    Write per-year article and citation totals of each scholar, read from
+    their profile page alone (no article page is loaded).
 
-    except Exception as e:
-        logger.error(f"Error extracting citation data: {str(e)}")
-    finally:
-        # Don't close driver here as it's managed by the calling function
-        pass
+    Args:
+        scholar_ids: List of Google Scholar IDs
+        year: Year or range of years to summarize
+        save_path: Path where to save the output file
+        overwrite: Whether to overwrite the output file if it exists
+        workers: Number of profiles loaded concurrently
+        backend: Fetch backend to use ("selenium" or "http")
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        output_format: Output format, one of WRITERS
+        max_rate: Highest rate per host the throttle may probe up to
+        retries: Retries of a blocked request before giving up on it
+    """
+    from .summary import summarize, summary_headers
 
-    return citation_data
+    year_range = year_extract(year)
 
+    with (
+        open_writer(
+            output_format, save_path, summary_headers(year_range), overwrite
+        ) as writer,
+        create_fetcher(backend, workers, rate, burst, max_rate, retries) as fetcher,
+    ):
+        summarize(scholar_ids, year_range, fetcher, writer.write_rows, workers)
+        fetcher.limiter.log_stats()
+
+    logger.info(f"Summary of {writer.rows_written} scholar(s) written")
+
+
+def run_service(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    cache: CitationCache = None,
+    max_rate: float = None,
+    retries: int = 3,
+    result_ttl: float = 3600,
+):
+    """
+    Serve crawl jobs over a local HTTP/JSON API until interrupted.
 
-def ensure_xlsx_extension(save_path: str) -> str:
-    """Ensure the save path has a .xlsx extension."""
-    if not save_path.lower().endswith(".xlsx"):
-        save_path += ".xlsx"
-    return save_path
+    One fetcher is created up front (launching its browsers right away) and
+    shared by every job, so a job doesn't pay for interpreter startup,
+    imports or a cold browser.
 
+    Args:
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Number of workers used to crawl article pages
+        backend: Fetch backend to use ("selenium" or "http")
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        cache: Optional CitationCache shared by every job
+        max_rate: Highest rate per host the throttle may probe up to
+        retries: Retries of a blocked request before giving up on it
+        result_ttl: Seconds the result of a job is reused for identical jobs
+    """
+    from .service import CrawlService, serve
 
-def exit_driver():
-    """Properly exit and clean up the driver."""
-    global driver
-    if driver:
-        try:
-            driver.quit()
-            logger.info("WebDriver successfully closed")
-        except Exception as e:
-            logger.error(f"Error closing WebDriver: {str(e)}")
-        finally:
-            driver = None
+    with create_fetcher(backend, workers, rate, burst, max_rate, retries) as fetcher:
+        serve(CrawlService(fetcher, cache, result_ttl), host, port)
 
 
-def extract_from_txt(
-    scholar_ids: list[str], year: str, save_path: str, overwrite: bool
+def replay_archive(
+    directory: str,
+    scholar_ids: list[str],
+    year: str,
+    save_path: str,
+    overwrite: bool,
+    output_format: str = "xlsx",
+    summary_path: str = None,
 ):
     """
-    Extract citation data for multiple scholar IDs from a text file.
+    Rebuild the output of archived scholars by re-parsing their pages.
+
+    Nothing is fetched: the latest archived profile of each scholar and the
+    article pages it links to are parsed again, spread over every core.
 
     Args:
-        scholar_ids: List of Google Scholar IDs
+        directory: Directory of the page archive
+        scholar_ids: Scholars to replay (every archived scholar if None)
         year: Year or range of years to extract citations for
         save_path: Path where to save the output file
         overwrite: Whether to overwrite the output file if it exists
+        output_format: Output format, one of WRITERS
+        summary_path: Optional path of a per-scholar summary table
     """
-    import os
-    import pandas as pd
+    from .archive import replay
 
-    # Extract year range once (it's the same for all scholars)
     year_range = year_extract(year)
 
-    # Create a master DataFrame to hold data from all scholar IDs
-    all_scholars_data = []
-    headers = ["scholar_id", "title", "publication_year"]
-    headers.extend([f"citations_{year}" for year in year_range])
+    with open_writer(
+        output_format, save_path, build_headers(year_range), overwrite
+    ) as writer:
+        on_rows, on_scholar, store = collect_results(
+            writer.write_rows, year_range, summary_path
+        )
 
-    # Initialize driver once to reuse across all scholar IDs
-    global driver
-    if driver is None:
-        driver = initialize_driver()
+        def on_replayed(scholar_id, rows):
+            on_rows(rows)
+            if on_scholar is not None:
+                on_scholar(scholar_id, rows)
 
-    try:
-        for idx, scholar_id in enumerate(scholar_ids):
-            logger.info(
-                f"Processing scholar ID {idx + 1}/{len(scholar_ids)}: {scholar_id}"
-            )
+        replay(directory, scholar_ids, year_range, on_replayed)
 
-            try:
-                # Get the scholar's page
-                page_src = get_page(scholar_id)
+    if store is not None:
+        write_summary(store, summary_path, overwrite, output_format)
 
-                if page_src:
-                    # Find articles for the specified years
-                    articles_to_find = soupr.get_articles(page_src, year_range)
-                    logger.info(
-                        f"Found {len(articles_to_find)} articles for scholar {scholar_id} in year(s) {year_range}"
-                    )
 
-                    # Extract citation data for all articles from this scholar
-                    scholar_citation_data = extract_citations(
-                        scholar_id, articles_to_find, year_range
-                    )
+def refresh_history(
+    history_path: str,
+    scholar_ids: list[str],
+    year: str,
+    save_path: str,
+    overwrite: bool,
+    interval: float = 7 * 24 * 60 * 60,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    cache: CitationCache = None,
+    output_format: str = "xlsx",
+    max_rate: float = None,
+    retries: int = 3,
+):
+    """
+    Re-crawl the scholars that are due and write what changed since last time.
 
-                    # Add this scholar's data to the collection
-                    all_scholars_data.extend(scholar_citation_data)
-                else:
-                    logger.warning(
-                        f"Could not retrieve page for scholar ID: {scholar_id}"
-                    )
+    A scholar is due once `interval` seconds have passed since they were
+    last recorded in the history (or if they never were). Their rows are
+    recorded as a new snapshot, and the output lists only the article
+    counts that changed in it. With a cache, only the articles whose total
+    citation count changed on the profile are fetched again. Scholars whose
+    profile fails to load are not recorded, so they stay due.
 
-            except Exception as e:
-                logger.error(f"Error processing scholar ID {scholar_id}: {str(e)}")
-                continue
+    Args:
+        history_path: Path of the citation history database
+        scholar_ids: Scholars to refresh (every recorded scholar if None)
+        year: Year or range of years to extract citations for
+        save_path: Path where to save the diff
+        overwrite: Whether to overwrite the output file if it exists
+        interval: Seconds after which a recorded scholar is due again
+        workers: Number of workers used to crawl article pages
+        backend: Fetch backend to use ("selenium" or "http")
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        cache: Optional CitationCache consulted before fetching article pages
+        output_format: Output format, one of WRITERS
+        max_rate: Highest rate per host the throttle may probe up to
+        retries: Retries of a blocked request before giving up on it
 
-            # Add a small delay between scholar profiles
-            time.sleep(2)
+    Returns:
+        int: Number of scholars refreshed
+    """
+    from .history import CitationHistory
+    from .pipeline import crawl
 
-        # Create a DataFrame with all collected data
-        if all_scholars_data:
-            df = pd.DataFrame(all_scholars_data, columns=headers)
-            logger.info(
-                f"Combined DataFrame created with {len(df)} rows from {len(scholar_ids)} scholars"
+    year_range = year_extract(year)
+
+    with CitationHistory(history_path) as history:
+        if scholar_ids is None:
+            scholar_ids = history.scholars()
+        due = history.due(scholar_ids, interval)
+        if not due:
+            logger.info(f"None of {len(scholar_ids)} scholar(s) is due for a refresh")
+            return 0
+
+        logger.info(f"Refreshing {len(due)} of {len(scholar_ids)} scholar(s)")
+        snapshot = history.begin_snapshot()
+        failed = []
+        with create_fetcher(
+            backend, workers, rate, burst, max_rate, retries
+        ) as fetcher:
+            crawl(
+                due,
+                year_range,
+                fetcher,
+                on_rows=lambda rows: None,
+                on_scholar=lambda scholar_id, rows: history.record(
+                    snapshot, scholar_id, rows, year_range
+                ),
+                cache=cache,
+                # Not recorded, so the scholar stays due and is tried again
+                on_failure=failed.append,
             )
+            fetcher.limiter.log_stats()
 
-            # Save the combined DataFrame to Excel
-            save_to_excel(df, save_path, overwrite)
-        else:
-            logger.warning("No data collected from any scholar ID")
+        if failed:
+            logger.warning(
+                f"{len(failed)} scholar(s) failed and stay due: {', '.join(failed)}"
+            )
 
-    finally:
-        # Ensure driver is properly closed
-        exit_driver()
+        write_history_diff(
+            history, snapshot - 1, snapshot, save_path, overwrite, output_format
+        )
 
+    if cache is not None:
+        cache.log_stats()
+    return len(due) - len(failed)
 
-def extract(
-    scholar_id: str,
+
+def watch_history(
+    history_path: str,
+    scholar_ids: list[str],
     year: str,
     save_path: str,
     overwrite: bool,
+    interval: float = 7 * 24 * 60 * 60,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    cache: CitationCache = None,
+    output_format: str = "xlsx",
+    max_rate: float = None,
+    retries: int = 3,
 ):
-    year_range = year_extract(year)
-    page_src = get_page(scholar_id)
-    articles_to_find = soupr.get_articles(page_src, year_range)
-    logger.info(f"Found {len(articles_to_find)} articles for the year(s) {year_range}.")
-
-    # Extract citation data for all articles
-    citation_data = extract_citations(scholar_id, articles_to_find, year_range)
+    """
+    Run `refresh_history` whenever a scholar becomes due, until interrupted.
 
-    # Write citation data to CSV
-    if citation_data:
-        import pandas as pd
+    Each refresh writes its own diff (timestamped unless `overwrite`).
+    Scholars whose profile failed to load stay due and are retried after
+    at most an hour. Arguments are those of `refresh_history`.
 
-        # Create column headers
-        headers = ["scholar_id", "title", "publication_year"]
-        headers.extend([f"citations_{year}" for year in year_range])
+    Raises:
+        ValueError: If `interval` isn't positive, which would refresh
+            every scholar over and over without a pause
+    """
+    import time
 
-        df = pd.DataFrame(citation_data, columns=headers)
-        logger.info(
-            f"DataFrame created with {len(df)} rows and {len(df.columns)} columns."
-        )
+    from .history import CitationHistory
 
-        # Call function to save DataFrame to Excel
-        save_to_excel(df, save_path, overwrite)
+    if interval <= 0:
+        raise ValueError(f"interval must be positive, got {interval}")
 
-    # Ensure driver is properly closed
-    exit_driver()
+    try:
+        while True:
+            refresh_history(
+                history_path,
+                scholar_ids,
+                year,
+                save_path,
+                overwrite,
+                interval,
+                workers,
+                backend,
+                rate,
+                burst,
+                cache,
+                output_format,
+                max_rate,
+                retries,
+            )
+            with CitationHistory(history_path) as history:
+                watched = scholar_ids or history.scholars()
+                wake_at = history.next_due(watched, interval) if watched else 0
+            delay = max(wake_at - time.time(), min(interval, 60 * 60))
+            next_refresh = time.localtime(time.time() + delay)
+            logger.info(
+                f"Next refresh at {time.strftime('%Y-%m-%d %H:%M:%S', next_refresh)}"
+            )
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        logger.info("Stopped watching")
 
 
-def save_to_excel(df, save_path, overwrite=False):
+def diff_history(
+    history_path: str, save_path: str, overwrite: bool, output_format: str = "xlsx"
+):
     """
-    Save a DataFrame to an Excel file.
+    Write the article counts that changed in the latest snapshot of a history.
 
     Args:
-        df: Pandas DataFrame to save
-        save_path: Path where to save the file
-        overwrite: Whether to overwrite if file exists
+        history_path: Path of the citation history database
+        save_path: Path where to save the diff
+        overwrite: Whether to overwrite the output file if it exists
+        output_format: Output format, one of WRITERS
+    """
+    from .history import CitationHistory
+
+    with CitationHistory(history_path) as history:
+        snapshots = history.snapshots()
+        if not snapshots:
+            logger.warning(f"No snapshot recorded in {history_path}")
+            return
+        latest = snapshots[-1][0]
+        previous = snapshots[-2][0] if len(snapshots) > 1 else 0
+        write_history_diff(
+            history, previous, latest, save_path, overwrite, output_format
+        )
 
-    Returns:
-        str: Path where the file was saved
+
+def write_history_diff(
+    history,
+    old: int,
+    new: int,
+    save_path: str,
+    overwrite: bool,
+    output_format: str = "xlsx",
+):
     """
-    import os
+    Write the article counts that changed after snapshot `old`, up to `new`.
 
-    # Ensure the save path has a .xlsx extension
-    save_path = ensure_xlsx_extension(save_path)
+    Args:
+        history: CitationHistory to read
+        old: Snapshot to compare from (0 to list every count up to `new`)
+        new: Snapshot to compare to
+        save_path: Path where to save the diff
+        overwrite: Whether to overwrite the output file if it exists
+        output_format: Output format, one of WRITERS
+    """
+    from .history import DIFF_HEADERS
 
-    # If save_path is just a filename without a directory, save in output folder
-    if os.path.dirname(save_path) == "":
-        save_path = os.path.join("output", save_path)
+    rows = history.diff(old, new)
+    with open_writer(output_format, save_path, DIFF_HEADERS, overwrite) as writer:
+        writer.write_rows(rows)
+    logger.info(
+        f"{len(rows)} citation count(s) changed between snapshots {old} and {new}"
+    )
 
-    # Check if file exists and handle overwriting
-    if os.path.exists(save_path) and not overwrite:
-        # Generate a new filename with timestamp
-        from datetime import datetime
 
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def collect_results(write_rows, year_range: list[str], summary_path: str = None):
+    """
+    Build the crawl callbacks, feeding a ResultStore as well if a summary is wanted.
 
-        # Split the path to get directory and filename
-        dir_path = os.path.dirname(save_path)
-        file_name = os.path.basename(save_path)
+    Returns:
+        tuple: (on_rows, on_scholar, store), store being None without a summary
+    """
+    if summary_path is None:
+        return write_rows, None, None
 
-        # Split the filename to get name and extension
-        name_part, ext_part = os.path.splitext(file_name)
+    from .results import ResultStore
 
-        # Create new filename with timestamp
-        new_file_name = f"{name_part}_{timestamp}{ext_part}"
+    store = ResultStore(year_range)
 
-        # Create new save path
-        save_path = os.path.join(dir_path, new_file_name)
+    def on_rows(rows):
+        write_rows(rows)
+        store.add_rows(rows)
 
-        logger.info(
-            f"File exists and overwrite=False. Generating new file name: {save_path}"
-        )
+    def on_scholar(scholar_id, rows):
+        store.add_scholar(scholar_id)
 
-    # Create directory if it doesn't exist
-    os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+    return on_rows, on_scholar, store
 
-    # Save to Excel file
-    df.to_excel(save_path, index=False)
-    logger.info(f"Data saved to {save_path}")
 
-    return save_path
+def write_summary(store, save_path: str, overwrite: bool, output_format: str = "xlsx"):
+    """Write the per-scholar summary table of a ResultStore."""
+    with open_writer(
+        output_format, save_path, store.summary_headers(), overwrite
+    ) as writer:
+        writer.write_rows(store.summary())
+    logger.info(f"Summary of {len(store.scholar_ids)} scholar(s) written")
 
 
-def initialize_driver():
-    """Initialize and return a new Chrome webdriver instance."""
-    logger.info("Initializing Chrome webdriver")
-    return selenium.webdriver.Chrome(options=chrome_options)
+def work_queue(
+    queue_path: str,
+    year: str,
+    scholar_ids: list[str] = None,
+    workers: int = 1,
+    backend: str = "selenium",
+    rate: float = 1.0,
+    burst: int = 1,
+    cache: CitationCache = None,
+    lease_seconds: float = 900,
+    max_attempts: int = 3,
+    max_rate: float = None,
+    retries: int = 3,
+):
+    """
+    Work through a shared scholar queue until it is empty.
 
+    Any number of processes (on one host, or several hosts sharing the
+    queue file) can run this at the same time; each claims a few scholars
+    at a time, crawls them and stores their rows in the queue. Scholars
+    whose profile fails to load, or whose lease expires, are retried by
+    whichever worker claims them next. Run `merge_queue` afterwards to
+    write the combined output.
 
-def navigate_to_scholar_profile(driver, scholar_id):
-    """Navigate to the Google Scholar profile for the given ID."""
-    driver.get(f"https://scholar.google.com/citations?user={scholar_id}&hl=en")
-    logger.info(f"Accessing Google Scholar profile for ID: {scholar_id}")
+    Args:
+        queue_path: Path of the queue database
+        year: Year or range of years to extract citations for
+        scholar_ids: Optional scholar IDs to add to the queue first
+        workers: Number of workers used to crawl article pages
+        backend: Fetch backend to use ("selenium" or "http")
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        cache: Optional CitationCache consulted before fetching article pages
+        lease_seconds: How long a claimed scholar stays leased without progress
+        max_attempts: Number of times a scholar is tried before it is failed
+        max_rate: Highest rate per host the throttle may probe up to
+        retries: Retries of a blocked request before giving up on it
+    """
+    from .pipeline import crawl
 
+    year_range = year_extract(year)
+    owner = default_owner()
 
-def wait_for_page_load(driver, timeout):
-    """Wait for the page to load completely."""
-    try:
-        # Wait for profile header to be present - indicates profile loaded
-        WebDriverWait(driver, timeout).until(
-            EC.presence_of_element_located((By.ID, "gsc_prf_w"))
-        )
-        logger.info("Page fully loaded")
-        return True
-    except TimeoutException:
-        logger.warning(f"Timed out waiting for page to load after {timeout} seconds")
-        return False
-
-
-def scroll_page(driver, scroll_height=300, max_scrolls=10):
-    """Scroll the page naturally."""
-    logger.info("Starting to scroll down naturally")
-    for i in range(max_scrolls):
-        driver.execute_script(f"window.scrollBy(0, {scroll_height});")
-        time.sleep(0.5)  # Small delay to make scrolling look natural
-    logger.info("Scrolling complete")
-
-
-def click_show_more_button(driver):
-    """Click the 'Show more' button until it's disabled."""
-    logger.info("Starting to click 'Show more' button")
-    while True:
-        try:
-            # Find the button
-            show_more_button = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.ID, "gsc_bpf_more"))
-            )
+    def on_scholar(scholar_id, rows):
+        if not queue.complete(scholar_id, rows, owner):
+            logger.warning(f"Lease on {scholar_id} was lost, dropping its rows")
 
-            # Check if button is disabled
-            if show_more_button.get_attribute("disabled"):
-                logger.info("'Show more' button is now disabled, stopping clicks")
-                break
+    def on_failure(scholar_id):
+        if not queue.fail(scholar_id, "could not retrieve profile page", owner):
+            logger.warning(f"Lease on {scholar_id} was lost, not failing it")
 
-            # Scroll to the button to ensure it's visible
-            driver.execute_script("arguments[0].scrollIntoView();", show_more_button)
-            time.sleep(0.5)
+    with (
+        WorkQueue(queue_path, year_range, lease_seconds, max_attempts) as queue,
+        create_fetcher(backend, workers, rate, burst, max_rate, retries) as fetcher,
+    ):
+        if scholar_ids:
+            queue.add(scholar_ids)
 
-            # Click the button
-            show_more_button.click()
-            logger.info("Clicked 'Show more' button")
+        completed = 0
+        try:
+            while True:
+                # Claim enough scholars to keep every worker busy
+                batch = queue.claim(owner, limit=2 * max(1, workers))
+                if not batch:
+                    break
+
+                logger.info(f"Worker {owner} claimed {len(batch)} scholar(s)")
+                # Renew the leases while the batch makes progress, not just
+                # between scholars: one large profile can outlast the lease
+                with queue.heartbeat(owner) as progress:
+                    crawl(
+                        batch,
+                        year_range,
+                        fetcher,
+                        on_rows=lambda rows: None,
+                        on_scholar=on_scholar,
+                        cache=cache,
+                        on_failure=on_failure,
+                        on_progress=progress,
+                    )
+                completed += len(batch)
+        finally:
+            # Give back anything left unfinished by an error or interruption
+            queue.release(owner)
 
-            # Wait for new content to load
-            time.sleep(2)
+        fetcher.limiter.log_stats()
+        stats = queue.stats()
 
-        except (
-            TimeoutException,
-            ElementClickInterceptedException,
-            StaleElementReferenceException,
-        ) as e:
-            logger.warning(f"Exception while trying to click 'Show more': {str(e)}")
-            break
+    if cache is not None:
+        cache.log_stats()
 
-    logger.info("Finished clicking 'Show more' button")
+    logger.info(
+        f"Worker {owner} processed {completed} scholar(s); queue: "
+        + ", ".join(f"{count} {status}" for status, count in stats.items())
+    )
 
 
-def save_html_to_file(soup, scholar_id, output_path="output", filename=None):
+def merge_queue(
+    queue_path: str,
+    year: str,
+    save_path: str,
+    overwrite: bool,
+    output_format: str = "xlsx",
+):
     """
-    Save BeautifulSoup HTML to a file.
+    Write the rows of every finished scholar in a queue to one output file.
 
     Args:
-        soup: BeautifulSoup object containing the HTML
-        scholar_id: Google Scholar ID for filename generation
-        output_path: Directory path to save the HTML file
-        filename: Custom filename (if None, will be generated from scholar_id)
-
-    Returns:
-        The path to the saved file
+        queue_path: Path of the queue database
+        year: Year or range of years the queue was created for
+        save_path: Path where to save the output file
+        overwrite: Whether to overwrite the output file if it exists
+        output_format: Output format, one of WRITERS
     """
-    import os
-    from datetime import datetime
-
-    # Create output directory if it doesn't exist
-    if output_path and not os.path.exists(output_path):
-        os.makedirs(output_path, exist_ok=True)
-
-    # Generate filename if not provided
-    if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"scholar_{scholar_id}_{timestamp}.html"
-
-    # Create full file path
-    file_path = os.path.join(output_path, filename) if output_path else filename
-
-    # Save the prettified HTML
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(soup.prettify())
-
-    logger.info(f"HTML saved to {file_path}")
-    return file_path
-
-
-def get_page_source(driver):
-    """Get the page source and parse with BeautifulSoup."""
-    page_source = driver.page_source
-    soup = BeautifulSoup(page_source, "html.parser")
+    year_range = year_extract(year)
 
-    # url = driver.current_url
-    # scholar_id = url.split("user=")[1].split("&")[0] if "user=" in url else "unknown"
-    # save_html_to_file(soup, scholar_id)
-    return soup
+    with (
+        WorkQueue(queue_path, year_range) as queue,
+        open_writer(
+            output_format, save_path, build_headers(year_range), overwrite
+        ) as writer,
+    ):
+        for rows in queue.iter_rows():
+            writer.write_rows(rows)
+
+        stats = queue.stats()
+        for scholar_id, attempts, error in queue.failures():
+            logger.warning(
+                f"Scholar {scholar_id} failed after {attempts} attempt(s): {error}"
+            )
 
+    unfinished = stats["pending"] + stats["leased"]
+    if unfinished:
+        logger.warning(f"{unfinished} scholar(s) in the queue are not finished yet")
 
-def cleanup_driver(driver_instance):
-    """Clean up the driver instance."""
-    global driver
-    if driver_instance:
-        driver_instance.quit()
-        if driver_instance is driver:
-            driver = None
+    logger.info(
+        f"Merged {writer.rows_written} rows from {stats['done']} scholar(s); "
+        f"{stats['failed']} failed"
+    )
 
 
-def get_page(
-    scholar_id: str,
-    timeout: int = 30,
-    save_html: bool = False,
-    output_path: str = "",
-    filename: str = None,
-) -> str:
+def save_to_excel(df, save_path, overwrite=False):
     """
-    Get the page source for a Google Scholar profile.
+    Save a DataFrame to an Excel file.
 
     Args:
-        scholar_id: Google Scholar ID
-        timeout: Timeout for page loading
-        save_html: Whether to save the HTML to file
-        output_path: Directory path to save the HTML file
-        filename: Custom filename (if None, will be generated from scholar_id)
+        df: Pandas DataFrame to save
+        save_path: Path where to save the file
+        overwrite: Whether to overwrite if file exists
 
     Returns:
-        The page source as a string
+        str: Path where the file was saved
     """
-    global driver
-    page_source = None
-
-    try:
-        if driver is None:
-            driver = initialize_driver()
+    save_path = resolve_save_path(save_path, ".xlsx", overwrite)
 
-        navigate_to_scholar_profile(driver, scholar_id)
-
-        if wait_for_page_load(driver, timeout):
-            scroll_page(driver)
-            click_show_more_button(driver)
-            page_source = get_page_source(driver)
-
-    except Exception as e:
-        logger.error(f"Error while getting page: {str(e)}")
-    finally:
-        cleanup_driver(driver)
+    # Save to Excel file
+    df.to_excel(save_path, index=False)
+    logger.info(f"Data saved to {save_path}")
 
-    return page_source
+    return save_path
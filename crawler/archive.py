@@ -0,0 +1,354 @@
+import functools
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from crawler import soupr
+from .cache import article_id
+from .logger import logger
+from .metrics import current_scholar
+from .pipeline import build_row
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    scholar_id TEXT,
+    article_id TEXT,
+    url TEXT,
+    capture TEXT NOT NULL,
+    chunk INTEGER NOT NULL DEFAULT 0,
+    digest TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_scholar ON pages (kind, scholar_id, fetched_at);
+CREATE INDEX IF NOT EXISTS pages_article ON pages (kind, article_id, fetched_at);
+"""
+
+# Kinds of archived pages
+PROFILE = "profile"
+ARTICLE = "article"
+
+# Article ids parsed per task when replaying
+REPLAY_CHUNK_SIZE = 64
+
+
+class PageArchive:
+    """
+    Content-addressed, gzip-compressed archive of fetched pages.
+
+    Every page is stored once under the SHA-256 of its HTML, in
+    `<directory>/objects/<2 hex>/<digest>.html.gz`; a SQLite index in
+    `<directory>/index.sqlite3` records which scholar, article and fetch
+    each page came from. The chunks of one paged profile share a capture
+    id. Pages that didn't change between crawls take no extra space.
+
+    Args:
+        directory: Directory of the archive (created if missing)
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.stored = 0
+        self.deduplicated = 0
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"),
+            timeout=60,
+            check_same_thread=False,
+        )
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "objects", digest[:2], f"{digest}.html.gz")
+
+    def put(
+        self,
+        kind: str,
+        page_source: str,
+        url: str = None,
+        scholar_id: str = None,
+        capture: str = None,
+        chunk: int = 0,
+    ) -> str:
+        """
+        Archive a fetched page and return its digest.
+
+        Args:
+            kind: PROFILE or ARTICLE
+            page_source: HTML of the page
+            url: URL the page was fetched from
+            scholar_id: Scholar the page was fetched for
+            capture: Id shared by the chunks of one profile fetch
+            chunk: Position of the page within its capture
+        """
+        data = page_source.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        if os.path.exists(path):
+            self.deduplicated += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write aside and rename, so readers never see a partial object
+            temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(temp_path, "wb") as file:
+                file.write(gzip.compress(data, compresslevel=6))
+            os.replace(temp_path, path)
+            self.stored += 1
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO pages (kind, scholar_id, article_id, url, capture, "
+                "chunk, digest, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    kind,
+                    scholar_id,
+                    article_id(url) if kind == ARTICLE and url else None,
+                    url,
+                    capture or uuid.uuid4().hex,
+                    chunk,
+                    digest,
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+        return digest
+
+    def read(self, digest: str) -> str:
+        """Return the HTML of an archived page."""
+        with open(self._object_path(digest), "rb") as file:
+            return gzip.decompress(file.read()).decode("utf-8")
+
+    def scholars(self) -> list[str]:
+        """Return every archived scholar, in the order they were first archived."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT scholar_id FROM pages WHERE kind = ? "
+                "GROUP BY scholar_id ORDER BY MIN(id)",
+                (PROFILE,),
+            ).fetchall()
+        return [scholar_id for (scholar_id,) in rows]
+
+    def article_ids(self) -> set:
+        """Return the ids of every archived article page."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT article_id FROM pages "
+                "WHERE kind = ? AND article_id IS NOT NULL",
+                (ARTICLE,),
+            ).fetchall()
+        return {key for (key,) in rows}
+
+    def latest_profile(self, scholar_id: str) -> list[str]:
+        """Return the chunks of the scholar's latest profile capture, in order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT digest FROM pages WHERE capture = ("
+                "SELECT capture FROM pages WHERE kind = ? AND scholar_id = ? "
+                "ORDER BY fetched_at DESC, id DESC LIMIT 1) ORDER BY chunk",
+                (PROFILE, scholar_id),
+            ).fetchall()
+        return [self.read(digest) for (digest,) in rows]
+
+    def latest_article(self, key: str):
+        """Return the latest archived page of an article, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT digest FROM pages WHERE kind = ? AND article_id = ? "
+                "ORDER BY fetched_at DESC, id DESC LIMIT 1",
+                (ARTICLE, key),
+            ).fetchone()
+        return None if row is None else self.read(row[0])
+
+    def log_stats(self):
+        if self.stored or self.deduplicated:
+            logger.info(
+                f"Archived {self.stored} new page(s) in {self.directory} "
+                f"({self.deduplicated} unchanged)"
+            )
+
+    def close(self):
+        self.log_stats()
+        with self._lock:
+            self._conn.close()
+
+
+class ArchivingFetcher:
+    """
+    Wrap a fetcher so every page it loads is also written to a PageArchive.
+
+    Everything else (base_url, workers, limiter, ...) is the wrapped
+    fetcher's. Fields extracted inside the browser have no HTML to archive
+    and are passed through as they are.
+
+    Args:
+        fetcher: Fetch backend to wrap
+        archive: PageArchive receiving the pages
+    """
+
+    def __init__(self, fetcher, archive: PageArchive):
+        self.fetcher = fetcher
+        self.archive = archive
+
+    def __getattr__(self, name):
+        return getattr(self.fetcher, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def iter_profile(self, scholar_id, min_year=None):
+        capture = uuid.uuid4().hex
+        pages = self.fetcher.iter_profile(scholar_id, min_year)
+        try:
+            for chunk, page_source in enumerate(pages):
+                if isinstance(page_source, str):
+                    self.archive.put(
+                        PROFILE, page_source, None, scholar_id, capture, chunk
+                    )
+                yield page_source
+        finally:
+            pages.close()
+
+    def fetch_article(self, article_url):
+        page_source = self.fetcher.fetch_article(article_url)
+        if isinstance(page_source, str):
+            self.archive.put(ARTICLE, page_source, article_url, current_scholar.get())
+        return page_source
+
+    def close(self):
+        self.fetcher.close()
+
+
+@functools.cache
+def open_archive(directory: str) -> PageArchive:
+    """Return this process's connection to an archive."""
+    return PageArchive(directory)
+
+
+def parse_archived_profile(directory: str, scholar_id: str, years: list[str]):
+    """Parse a scholar's latest archived profile, or return None if there is none."""
+    chunks = open_archive(directory).latest_profile(scholar_id)
+    if not chunks:
+        return None
+    articles = []
+    for page_source in chunks:
+        articles.extend(soupr.parse_profile(page_source, years))
+    return articles
+
+
+def parse_archived_article(directory: str, key: str):
+    """Parse the citation counts of an article's latest archived page."""
+    page_source = open_archive(directory).latest_article(key)
+    if page_source is None:
+        return None
+    return soupr.parse_article(page_source)
+
+
+def replay(directory: str, scholar_ids: list[str], years: list[str], on_scholar):
+    """
+    Rebuild the output rows of archived scholars without fetching anything.
+
+    Profiles are parsed first, then every article page they need, each
+    stage spread over one process per core. Like the crawl pipeline,
+    uncited articles get no counts and a co-authored article whose page was
+    archived under another scholar's profile reuses that page.
+
+    Args:
+        directory: Directory of the archive
+        scholar_ids: Scholars to replay (every archived scholar if None)
+        years: List of years to extract citations for
+        on_scholar: Callback(scholar_id, rows) called for each scholar with
+            an archived profile, in input order
+
+    Returns:
+        int: Number of scholars replayed
+    """
+    archive = open_archive(directory)
+    if scholar_ids is None:
+        scholar_ids = archive.scholars()
+    archived_articles = archive.article_ids()
+    # Forked workers must not inherit this connection; each opens its own
+    archive.close()
+    open_archive.cache_clear()
+
+    with ProcessPoolExecutor(
+        initializer=soupr.set_parser, initargs=(soupr.PARSER,)
+    ) as executor:
+        profiles = list(
+            executor.map(
+                functools.partial(parse_archived_profile, directory, years=years),
+                scholar_ids,
+            )
+        )
+
+        # Co-authors list the same cluster under different article ids
+        by_cluster = {}
+        for articles in filter(None, profiles):
+            for article in articles:
+                key = article_id(article["url"])
+                if key in archived_articles and article["cluster_id"]:
+                    by_cluster.setdefault(article["cluster_id"], key)
+
+        def page_key(article):
+            key = article_id(article["url"])
+            if key in archived_articles:
+                return key
+            return by_cluster.get(article["cluster_id"])
+
+        keys = {
+            page_key(article)
+            for articles in filter(None, profiles)
+            for article in articles
+            if article["citations"] != 0
+        }
+        keys = sorted(keys - {None})
+        counts = dict(
+            zip(
+                keys,
+                executor.map(
+                    functools.partial(parse_archived_article, directory),
+                    keys,
+                    chunksize=REPLAY_CHUNK_SIZE,
+                ),
+            )
+        )
+
+    replayed = 0
+    for scholar_id, articles in zip(scholar_ids, profiles):
+        if articles is None:
+            logger.warning(f"No archived profile for scholar ID: {scholar_id}")
+            continue
+
+        rows = []
+        for article in articles:
+            # Uncited articles have no citation graph to parse
+            citation_counts = (
+                counts.get(page_key(article)) if article["citations"] != 0 else {}
+            )
+            rows.append(build_row(scholar_id, article, citation_counts, years))
+        on_scholar(scholar_id, rows)
+        replayed += 1
+
+    logger.info(
+        f"Replayed {replayed} scholar(s) and {len(keys)} article page(s) "
+        f"from {directory}"
+    )
+    return replayed
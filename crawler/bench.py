@@ -0,0 +1,285 @@
+"""
+Offline micro-benchmarks of the page parsers.
+
+Times soupr.parse_profile and soupr.parse_article for every available parser
+backend over synthetic profile pages of several sizes (and, optionally, over
+recorded pages from a directory), and records time, memory allocated while
+parsing and the number of blocks the result keeps alive. Results are written
+as JSON so runs can be compared across versions.
+
+    uv run -m crawler.bench --sizes 10,100,1000,5000 --out bench.json
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Optional
+
+import typer
+
+from crawler import fixtures, soupr
+from crawler.httpfetch import count_article_rows
+
+DEFAULT_SIZES = "10,100,1000,5000"
+
+# Modules `import crawler` must not pull in; the stages that need them
+# import them when they run
+HEAVY_MODULES = (
+    "selenium",
+    "bs4",
+    "lxml",
+    "selectolax",
+    "numpy",
+    "pandas",
+    "openpyxl",
+)
+
+
+def measure(func, *args, repeat: int = 5):
+    """
+    Time `func(*args)` and measure the memory it allocates.
+
+    Timing runs are done without tracemalloc (which slows allocation down);
+    one extra run under tracemalloc records the memory figures.
+
+    Returns:
+        dict: min/median/max seconds, peak_bytes and retained_blocks
+    """
+    # Warm up first, so lazily imported parsers don't count against the first run
+    func(*args)
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    retained = sum(
+        stat.count_diff
+        for stat in after.compare_to(before, "filename")
+        if stat.count_diff > 0
+    )
+    del result
+
+    return {
+        "repeat": repeat,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "max_s": max(timings),
+        "peak_bytes": peak - baseline,
+        "retained_blocks": retained,
+    }
+
+
+def load_recorded_pages(directory: str):
+    """
+    Load recorded Scholar pages (*.html) from a directory.
+
+    Returns:
+        list: (name, kind, rows, page_source) tuples, kind being
+            "profile" or "article"
+    """
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(directory, name), "r", encoding="utf-8") as file:
+            page_source = file.read()
+        kind = "article" if "gsc_oci_graph_bars" in page_source else "profile"
+        pages.append((name, kind, count_article_rows(page_source), page_source))
+    return pages
+
+
+def run_benchmarks(sizes, repeat: int = 5, recorded_dir: str = None, parsers=None):
+    """
+    Run the benchmark matrix.
+
+    Args:
+        sizes: Profile sizes (number of article rows) to generate
+        repeat: Number of timed runs per case
+        recorded_dir: Optional directory of recorded pages to include
+        parsers: Parser backends to benchmark (defaults to all available)
+
+    Returns:
+        list: One result dict per (function, parser, page) case
+    """
+    parsers = parsers or soupr.available_parsers()
+    # Match every year, so the extractor does the full amount of work
+    years = {str(year) for year in range(1900, 2100)}
+
+    cases = []
+    for size in sizes:
+        page_source = fixtures.profile_page(num_rows=size)
+        cases.append(("parse_profile", f"synthetic-{size}", size, page_source))
+    cases.append(("parse_article", "synthetic-article", 0, fixtures.article_page()))
+
+    if recorded_dir:
+        for name, kind, rows, page_source in load_recorded_pages(recorded_dir):
+            cases.append((f"parse_{kind}", name, rows, page_source))
+
+    results = []
+    for function, page, rows, page_source in cases:
+        for parser in parsers:
+            if function == "parse_profile":
+                func, args = soupr.parse_profile, (page_source, years, "", parser)
+            else:
+                func, args = soupr.parse_article, (page_source, parser)
+
+            result = {
+                "function": function,
+                "parser": parser,
+                "page": page,
+                "rows": rows,
+                "page_bytes": len(page_source.encode("utf-8")),
+            }
+            result.update(measure(func, *args, repeat=repeat))
+            results.append(result)
+
+            typer.echo(
+                f"{function:<14} {parser:<11} {page:<24} "
+                f"median {result['median_s'] * 1000:9.2f} ms  "
+                f"peak {result['peak_bytes'] / 1024:9.1f} KiB"
+            )
+
+    return results
+
+
+def measure_import(module: str = "crawler", repeat: int = 5):
+    """
+    Measure the cost of importing `module` in a fresh interpreter.
+
+    Uses `python -X importtime`, so only the import itself is timed, not
+    the interpreter startup.
+
+    Returns:
+        dict: median/min seconds and the heavy modules the import loaded
+    """
+    timings = []
+    loaded = set()
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # Lines look like "import time:  self [us] | cumulative | name"
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cumulative, name = line.split("|")
+            name = name.strip()
+            if name == module:
+                timings.append(int(cumulative) / 1_000_000)
+            elif name.split(".")[0] in HEAVY_MODULES:
+                loaded.add(name.split(".")[0])
+
+    return {
+        "module": module,
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "heavy_modules": sorted(loaded),
+    }
+
+
+def environment():
+    """Describe the environment the benchmarks ran in."""
+    from importlib import metadata
+
+    versions = {}
+    for package in ("sapi", "beautifulsoup4", "lxml", "selectolax"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "packages": versions,
+    }
+
+
+def main(
+    sizes: str = typer.Option(
+        DEFAULT_SIZES,
+        "--sizes",
+        help="Comma-separated profile sizes (number of article rows) to benchmark.",
+    ),
+    repeat: int = typer.Option(5, "--repeat", min=1, help="Timed runs per case."),
+    parser: Optional[list[str]] = typer.Option(
+        None,
+        "--parser",
+        help="Parser backend to benchmark (repeatable). Defaults to all available.",
+    ),
+    recorded: Optional[str] = typer.Option(
+        None,
+        "--recorded",
+        help="Directory of recorded Scholar pages (*.html) to benchmark as well.",
+    ),
+    out: Optional[str] = typer.Option(
+        None,
+        "--out",
+        "-o",
+        help="Write the results as JSON to this file.",
+    ),
+    import_budget: Optional[float] = typer.Option(
+        None,
+        "--import-budget",
+        help="Fail if `import crawler` takes longer than this many milliseconds "
+        "or loads a heavy dependency.",
+    ),
+):
+    """Benchmark the profile and article page parsers offline."""
+    size_list = [int(size) for size in sizes.split(",") if size.strip()]
+    results = run_benchmarks(size_list, repeat, recorded, parser)
+
+    import_time = measure_import("crawler", repeat)
+    typer.echo(
+        f"import crawler: median {import_time['median_s'] * 1000:.1f} ms, "
+        f"heavy modules loaded: {', '.join(import_time['heavy_modules']) or 'none'}"
+    )
+
+    report = {
+        "environment": environment(),
+        "import": import_time,
+        "results": results,
+    }
+    if out:
+        with open(out, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        typer.echo(f"Results written to {out}")
+
+    if import_budget is not None and (
+        import_time["median_s"] * 1000 > import_budget or import_time["heavy_modules"]
+    ):
+        typer.echo(
+            f"Error: import crawler took {import_time['median_s'] * 1000:.1f} ms "
+            f"(budget {import_budget} ms) and loaded: "
+            f"{', '.join(import_time['heavy_modules']) or 'no heavy modules'}."
+        )
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
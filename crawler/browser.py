@@ -0,0 +1,606 @@
+import functools
+
+from selenium import webdriver
+import selenium
+import selenium.webdriver
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    StaleElementReferenceException,
+)
+
+from .logger import logger
+from .metrics import metrics
+from .pool import DriverPool
+from .soupr import SCHOLAR_URL
+from .throttle import BlockedError, is_block_page
+
+
+chrome_options = webdriver.ChromeOptions()
+chrome_options.add_argument("--headless")
+chrome_options.add_argument("--no-sandbox")
+chrome_options.add_argument("--disable-dev-shm-usage")
+chrome_options.add_argument("--disable-gpu")
+chrome_options.add_argument("--start-fullscreen")
+# Hand the page over once the DOM is parsed, without waiting for subresources
+chrome_options.page_load_strategy = "eager"
+chrome_options.add_experimental_option(
+    "prefs", {"profile.managed_default_content_settings.images": 2}
+)
+
+# Requests blocked through DevTools: none of them are needed to read the
+# article table, and skipping them saves bandwidth and rendering time
+BLOCKED_URLS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.css",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+]
+
+# Recycle a browser after this many pages, or once its JS heap grew this much
+RECYCLE_AFTER_PAGES = 200
+MAX_HEAP_GROWTH = 256 * 2**20
+
+
+def is_blocked(driver) -> bool:
+    """Return True if the browser is looking at one of Scholar's block pages."""
+    return "/sorry/" in driver.current_url or is_block_page(driver.page_source)
+
+
+@metrics.timed("article_page_load")
+def get_article_page(driver, article_url, extract=False):
+    """
+    Navigate to an article page and return its HTML.
+
+    Args:
+        driver: Selenium webdriver instance
+        article_url: URL of the article
+        extract: Return the citation graph extracted inside the browser
+            instead of the HTML
+
+    Returns:
+        Page source of the article page (or its extracted fields), or None
+            if it failed to load
+
+    Raises:
+        BlockedError: If Scholar served a block page instead
+    """
+    try:
+        driver.get(article_url)
+
+        # Wait for the citation information to load
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "gsc_oci_value"))
+        )
+
+        if extract:
+            return driver.execute_script(ARTICLE_FIELDS_SCRIPT)
+        return driver.page_source
+    except Exception as e:
+        if is_blocked(driver):
+            raise BlockedError("block page") from e
+        logger.error(f"Error loading article page: {str(e)}")
+        return None
+
+
+@metrics.timed("driver_startup")
+def initialize_driver(block_resources: bool = True):
+    """
+    Initialize and return a new Chrome webdriver instance.
+
+    Args:
+        block_resources: Block images, fonts, stylesheets and analytics
+            through the DevTools protocol
+    """
+    logger.info("Initializing Chrome webdriver")
+    driver = selenium.webdriver.Chrome(options=chrome_options)
+    if block_resources:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    return driver
+
+
+def get_heap_size(driver):
+    """
+    Return the JS heap in use by the driver's current page, in bytes.
+
+    This is Chrome's `performance.memory`, which only covers the page's
+    JavaScript heap. It is not the RSS of the browser processes, so memory
+    Chrome holds elsewhere (renderer caches, the GPU and network processes)
+    doesn't count towards `max_heap_growth`; `recycle_after` bounds that.
+    """
+    return driver.execute_script(
+        "return performance.memory ? performance.memory.usedJSHeapSize : null;"
+    )
+
+
+@metrics.timed("navigate")
+def navigate_to_scholar_profile(driver, scholar_id, scholar_url=SCHOLAR_URL):
+    """Navigate to the Google Scholar profile for the given ID."""
+    # Newest first, so the list can stop expanding once it passes the years
+    driver.get(f"{scholar_url}/citations?user={scholar_id}&hl=en&sortby=pubdate")
+    logger.info(f"Accessing Google Scholar profile for ID: {scholar_id}")
+
+
+@metrics.timed("wait_for_page_load")
+def wait_for_page_load(driver, timeout):
+    """Wait for the page to load completely."""
+    try:
+        # Wait for profile header to be present - indicates profile loaded
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.ID, "gsc_prf_w"))
+        )
+        logger.info("Page fully loaded")
+        return True
+    except TimeoutException:
+        logger.warning(f"Timed out waiting for page to load after {timeout} seconds")
+        return False
+
+
+# Returns [number of article rows, whether "Show more" is disabled or gone,
+# year of the last row (0 if it has none, null if there are no rows)]
+EXPANSION_STATE_SCRIPT = """
+var button = document.getElementById("gsc_bpf_more");
+var rows = document.querySelectorAll("#gsc_a_b tr.gsc_a_tr");
+var lastYear = null;
+if (rows.length) {
+    var cell = rows[rows.length - 1].querySelector(".gsc_a_y span");
+    lastYear = parseInt(cell ? cell.textContent : "", 10) || 0;
+}
+return [rows.length, !button || button.disabled, lastYear];
+"""
+
+# Returns [number of article rows, outerHTML of the rows from index arguments[0]]
+NEW_ROWS_SCRIPT = """
+var rows = document.querySelectorAll("#gsc_a_b tr.gsc_a_tr");
+var html = [];
+for (var i = arguments[0]; i < rows.length; i++) {
+    html.push(rows[i].outerHTML);
+}
+return [rows.length, html.join("")];
+"""
+
+# Returns the fields soupr reads from the article rows from index arguments[0]
+# (plus the citation chart when starting at 0), as raw text contents and
+# attributes so soupr.get_articles_extracted applies the exact same rules
+PROFILE_FIELDS_SCRIPT = """
+function text(element) { return element ? element.textContent : null; }
+function attr(element, name) { return element ? element.getAttribute(name) : null; }
+
+var rows = document.querySelectorAll("#gsc_a_b tr.gsc_a_tr");
+var fields = [];
+for (var i = arguments[0]; i < rows.length; i++) {
+    var yearCell = rows[i].querySelector("td.gsc_a_y");
+    var titleCell = rows[i].querySelector("td.gsc_a_t");
+    var link = titleCell ? titleCell.querySelector("a.gsc_a_at") : null;
+    fields.push([
+        text(link),
+        attr(link, "href"),
+        text(yearCell ? yearCell.querySelector("span.gsc_a_h") : null),
+        text(rows[i].querySelector("td.gsc_a_c")),
+        attr(rows[i].querySelector("a.gsc_a_ac"), "href")
+    ]);
+}
+
+var chart = arguments[0] === 0 ? document.querySelector(".gsc_md_hist_b") : null;
+if (chart) {
+    var map = Array.prototype.map;
+    var labels = map.call(chart.querySelectorAll(".gsc_g_t"), text);
+    var bars = map.call(chart.querySelectorAll("a.gsc_g_a"), function (bar) {
+        return [attr(bar, "style"), text(bar.querySelector(".gsc_g_al"))];
+    });
+    chart = [labels, bars];
+}
+return {count: rows.length, rows: fields, chart: chart};
+"""
+
+# Returns the [href, count] of every bar of an article's citation graph
+ARTICLE_FIELDS_SCRIPT = """
+var bars = document.querySelectorAll("#gsc_oci_graph_bars .gsc_oci_g_a");
+return {bars: Array.prototype.map.call(bars, function (bar) {
+    var count = bar.querySelector(".gsc_oci_g_al");
+    return [bar.getAttribute("href") || "", count ? count.textContent : null];
+})};
+"""
+
+# How often the DOM is polled while waiting for more rows
+POLL_INTERVAL = 0.05
+
+
+def get_expansion_state(driver):
+    """Return (row_count, exhausted, last_year) of the profile's article table."""
+    row_count, exhausted, last_year = driver.execute_script(EXPANSION_STATE_SCRIPT)
+    return row_count, exhausted, last_year
+
+
+@metrics.timed("scroll_page")
+def scroll_page(driver):
+    """Scroll to the end of the article list."""
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+
+
+def get_new_rows(driver, start):
+    """
+    Return (row_count, html) of the article rows from index `start` on.
+
+    Only the new rows are serialized, wrapped in a table so they parse like
+    a profile page that holds nothing else.
+    """
+    row_count, rows = driver.execute_script(NEW_ROWS_SCRIPT, start)
+    return row_count, f'<table><tbody id="gsc_a_b">{rows}</tbody></table>'
+
+
+def click_show_more_button(driver, timeout=10, settle=1.0, min_year=None):
+    """
+    Click the 'Show more' button until every article row is loaded.
+
+    Args:
+        driver: Selenium webdriver instance
+        timeout: Seconds to wait for a click to load more rows
+        settle: Seconds to keep waiting for rows when the button becomes
+            disabled without new rows (it is also disabled while loading)
+        min_year: Stop once the last loaded row is older than this year
+            (the list must be sorted by publication date)
+    """
+    for _ in expand_article_list(driver, timeout, settle, min_year):
+        pass
+
+
+@metrics.timed("show_more")
+def show_more(driver, row_count, timeout=10, settle=1.0):
+    """
+    Click 'Show more' once and wait for the rows it loads.
+
+    Returns:
+        bool: Whether rows were loaded (False once the list is exhausted)
+
+    Raises:
+        TimeoutException: If nothing happened within `timeout` seconds
+    """
+    # A script click needs no scrolling and can't be intercepted
+    button = driver.find_element(By.ID, "gsc_bpf_more")
+    driver.execute_script("arguments[0].click();", button)
+
+    def progressed(driver):
+        new_count, exhausted, _ = get_expansion_state(driver)
+        return new_count > row_count or exhausted
+
+    WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(progressed)
+
+    new_count, exhausted, _ = get_expansion_state(driver)
+    if new_count == row_count and exhausted:
+        # Either the end of the list or a request still in flight
+        try:
+            WebDriverWait(driver, settle, poll_frequency=POLL_INTERVAL).until(
+                lambda driver: get_expansion_state(driver)[0] > row_count
+            )
+        except TimeoutException:
+            return False
+    return True
+
+
+def expand_article_list(driver, timeout=10, settle=1.0, min_year=None, request=None):
+    """
+    Click 'Show more' until every article row is loaded, yielding after
+    every click that loaded rows.
+
+    Instead of sleeping a fixed time after every click, the DOM is polled
+    until the row count grows or the button becomes disabled, so each
+    batch of rows is requested as soon as the previous one has arrived.
+    Arguments are those of click_show_more_button, plus `request`: a
+    callable(func, *args) every click is made through, such as a rate
+    limiter's, since each click sends a request to Scholar too.
+    """
+    if request is None:
+
+        def request(func, *args):
+            return func(*args)
+
+    logger.info("Starting to click 'Show more' button")
+    clicks = 0
+    while True:
+        try:
+            row_count, exhausted, last_year = get_expansion_state(driver)
+            if exhausted:
+                logger.info("'Show more' button is now disabled, stopping clicks")
+                break
+
+            # Articles without a year are listed last, so they end the list too
+            if min_year is not None and last_year is not None and last_year < min_year:
+                logger.info(f"Loaded rows are older than {min_year}, stopping clicks")
+                break
+
+            clicks += 1
+            if not request(show_more, driver, row_count, timeout, settle):
+                logger.info("'Show more' button is now disabled, stopping clicks")
+                break
+
+            yield
+
+        except TimeoutException:
+            logger.warning(f"No new rows {timeout}s after clicking 'Show more'")
+            break
+        except (
+            NoSuchElementException,
+            StaleElementReferenceException,
+        ) as e:
+            logger.warning(f"Exception while trying to click 'Show more': {str(e)}")
+            break
+
+    logger.info(f"Finished clicking 'Show more' button after {clicks} click(s)")
+
+
+def save_html_to_file(soup, scholar_id, output_path="output", filename=None):
+    """
+    Save BeautifulSoup HTML to a file.
+
+    Args:
+        soup: BeautifulSoup object containing the HTML
+        scholar_id: Google Scholar ID for filename generation
+        output_path: Directory path to save the HTML file
+        filename: Custom filename (if None, will be generated from scholar_id)
+
+    Returns:
+        The path to the saved file
+    """
+    import os
+    from datetime import datetime
+
+    # Create output directory if it doesn't exist
+    if output_path and not os.path.exists(output_path):
+        os.makedirs(output_path, exist_ok=True)
+
+    # Generate filename if not provided
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"scholar_{scholar_id}_{timestamp}.html"
+
+    # Create full file path
+    file_path = os.path.join(output_path, filename) if output_path else filename
+
+    # Save the prettified HTML
+    with open(file_path, "w", encoding="utf-8") as f:
+        f.write(soup.prettify())
+
+    logger.info(f"HTML saved to {file_path}")
+    return file_path
+
+
+def get_page_source(driver):
+    """Get the page source of the current page."""
+    return driver.page_source
+
+
+def load_profile(
+    driver, scholar_id: str, timeout: int = 30, scholar_url: str = SCHOLAR_URL
+) -> bool:
+    """
+    Open a profile and wait for its article table.
+
+    Returns:
+        bool: Whether the profile loaded
+
+    Raises:
+        BlockedError: If Scholar served a block page instead
+    """
+    navigate_to_scholar_profile(driver, scholar_id, scholar_url)
+    if wait_for_page_load(driver, timeout):
+        scroll_page(driver)
+        return True
+    if is_blocked(driver):
+        raise BlockedError("block page")
+    return False
+
+
+def get_profile_fields(driver, start):
+    """Return (row_count, fields) of the article rows from index `start` on."""
+    fields = driver.execute_script(PROFILE_FIELDS_SCRIPT, start)
+    return fields.pop("count"), fields
+
+
+def iter_profile_chunks(driver, min_year=None, extract=False, request=None):
+    """
+    Yield a loaded profile in chunks as 'Show more' expands its article list.
+
+    The first chunk is the page as loaded (sidebar and first rows); every
+    later chunk holds only the rows one click appended, so no chunk
+    re-serializes or re-parses rows that were already yielded, and the
+    caller can start on the first articles while the list is expanding.
+
+    Args:
+        driver: Selenium webdriver showing a loaded profile
+        min_year: Stop expanding once the list gets older than this year
+        extract: Yield the fields extracted inside the browser instead of HTML
+        request: Callable(func, *args) every 'Show more' click goes through
+    """
+    if extract:
+        row_count, chunk = get_profile_fields(driver, 0)
+    else:
+        row_count = get_expansion_state(driver)[0]
+        chunk = get_page_source(driver)
+    yield chunk
+
+    for _ in expand_article_list(driver, min_year=min_year, request=request):
+        if extract:
+            row_count, chunk = get_profile_fields(driver, row_count)
+        else:
+            row_count, chunk = get_new_rows(driver, row_count)
+        yield chunk
+
+
+def get_page(
+    scholar_id: str,
+    pool: DriverPool,
+    timeout: int = 30,
+    save_html: bool = False,
+    output_path: str = "",
+    filename: str = None,
+    min_year: int = None,
+) -> str:
+    """
+    Get the page source for a Google Scholar profile.
+
+    Args:
+        scholar_id: Google Scholar ID
+        pool: DriverPool to borrow the driver from
+        timeout: Timeout for page loading
+        save_html: Whether to save the HTML to file
+        output_path: Directory path to save the HTML file
+        filename: Custom filename (if None, will be generated from scholar_id)
+        min_year: Stop expanding the article list once it gets older than this
+
+    Returns:
+        The page source as a string
+    """
+    page_source = None
+
+    try:
+        with pool.driver() as driver:
+            if load_profile(driver, scholar_id, timeout):
+                click_show_more_button(driver, min_year=min_year)
+                page_source = get_page_source(driver)
+
+    except BlockedError:
+        raise
+    except Exception as e:
+        logger.error(f"Error while getting page: {str(e)}")
+
+    return page_source
+
+
+class SeleniumFetcher:
+    """
+    Fetch backend that drives headless Chrome through a DriverPool.
+
+    Browsers are kept warm across scholars and article pages and are only
+    replaced after `recycle_after` pages or when their JS heap has grown by
+    more than `max_heap_growth` bytes. Profiles are expanded in browsers of
+    their own: a profile holds its browser until the last chunk has been
+    consumed, which can take as long as the article pages queued meanwhile,
+    so sharing one pool would let the two stages wait on each other.
+
+    Args:
+        workers: Number of browsers that may load article pages (and
+            of browsers that may load profiles) concurrently
+        timeout: Timeout in seconds for the profile page to load
+        limiter: Optional HostRateLimiter or Throttle every page load has to
+            pass through
+        recycle_after: Pages a browser serves before it is replaced
+        max_heap_growth: JS heap growth in bytes that triggers a replacement
+            (the page's heap as seen by `get_heap_size`, not the process RSS)
+        block_resources: Block images, fonts, stylesheets and analytics
+        extract_in_browser: Extract the fields soupr reads with a script
+            inside the page and return them instead of the HTML, so
+            nothing has to be serialized out of Chrome or parsed again
+        base_url: Scholar host to talk to instead of the real one (for
+            local test servers)
+    """
+
+    name = "selenium"
+    base_url = SCHOLAR_URL
+
+    def __init__(
+        self,
+        workers: int = 1,
+        timeout: int = 30,
+        limiter=None,
+        recycle_after: int = RECYCLE_AFTER_PAGES,
+        max_heap_growth: int = MAX_HEAP_GROWTH,
+        block_resources: bool = True,
+        extract_in_browser: bool = False,
+        base_url: str = None,
+    ):
+        self.workers = workers
+        if base_url is not None:
+            self.base_url = base_url.rstrip("/")
+        # Profiles and the article URLs read from them share one host
+        self.scholar_url = self.base_url
+        self.timeout = timeout
+        self.limiter = limiter
+        self.extract_in_browser = extract_in_browser
+        factory = functools.partial(initialize_driver, block_resources)
+        recycling = {
+            "max_uses": recycle_after,
+            "max_memory_growth": max_heap_growth,
+            "memory_probe": get_heap_size,
+        }
+        self.pool = DriverPool(factory, workers, **recycling)
+        self.profile_pool = DriverPool(factory, workers, **recycling)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _request(self, url, func, *args, **kwargs):
+        if self.limiter is None:
+            return func(*args, **kwargs)
+        return self.limiter.request(url, func, *args, **kwargs)
+
+    def iter_profile(self, scholar_id, min_year=None):
+        """
+        Yield the profile page, then the rows each 'Show more' click loads
+        (down to `min_year`), if it loaded.
+
+        Raises:
+            Exception: Whatever failed once the profile had loaded, so a
+                partly expanded list isn't taken as complete
+        """
+        with self.profile_pool.driver() as driver:
+            try:
+                loaded = self._request(
+                    self.scholar_url,
+                    load_profile,
+                    driver,
+                    scholar_id,
+                    self.timeout,
+                    self.scholar_url,
+                )
+            except Exception as e:
+                logger.error(f"Error while getting page: {str(e)}")
+                return
+            if not loaded:
+                return
+
+            yield from iter_profile_chunks(
+                driver,
+                min_year=min_year,
+                extract=self.extract_in_browser,
+                request=functools.partial(self._request, self.scholar_url),
+            )
+
+    def fetch_article(self, article_url):
+        """Return the HTML of an article page, or None if it failed to load."""
+        try:
+            return self._request(article_url, self._load_article, article_url)
+        except BlockedError as e:
+            logger.error(f"Error loading article page: {str(e)}")
+            return None
+
+    def _load_article(self, article_url):
+        with self.pool.driver() as driver:
+            return get_article_page(driver, article_url, self.extract_in_browser)
+
+    def warm_up(self):
+        """Launch every browser of the pools now instead of on first use."""
+        self.pool.warm()
+        self.profile_pool.warm()
+
+    def close(self):
+        self.pool.close()
+        self.profile_pool.close()
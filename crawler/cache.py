@@ -0,0 +1,149 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+from .logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS citations (
+    article_id TEXT PRIMARY KEY,
+    counts TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    total INTEGER
+);
+CREATE INDEX IF NOT EXISTS citations_fetched_at ON citations (fetched_at);
+"""
+
+
+def article_id(article_url: str):
+    """Return the `citation_for_view` id of an article URL, or None."""
+    query = urllib.parse.urlparse(article_url).query
+    values = urllib.parse.parse_qs(query).get("citation_for_view")
+    return values[0] if values else None
+
+
+class CitationCache:
+    """
+    On-disk SQLite cache of parsed article citation histograms.
+
+    Entries are keyed by the article's `citation_for_view` id and store the
+    output of `extract_citation_counts` together with the time it was
+    fetched and the article's total citation count from the profile table.
+    Entries older than `max_age` are treated as misses, and the oldest
+    entries are evicted once the cache holds more than `max_entries`.
+
+    When the caller knows the article's current total, a fresh entry is
+    used only if the total is unchanged too, so recurring runs only refetch
+    the articles that gained citations (and the ones older than `max_age`,
+    whose per-year split may have been corrected since).
+
+    Args:
+        path: Path of the SQLite database file
+        max_age: Maximum age of a usable entry in seconds (None for no limit)
+        max_entries: Maximum number of entries to keep (None for no limit)
+    """
+
+    def __init__(self, path: str, max_age: float = None, max_entries: int = None):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.changed = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(citations)")]
+        if "total" not in columns:
+            # Caches written before totals were stored
+            self._conn.execute("ALTER TABLE citations ADD COLUMN total INTEGER")
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get(self, key: str, total: int = None):
+        """
+        Look up the citation counts of an article.
+
+        Args:
+            key: The article's `citation_for_view` id
+            total: The article's current total citation count, if known
+
+        Returns:
+            dict: Year -> count mapping, or None on a miss, a stale entry or
+                an entry whose total changed
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT counts, fetched_at, total FROM citations WHERE article_id = ?",
+                (key,),
+            ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        counts, fetched_at, cached_total = row
+        if self.max_age is not None and time.time() - fetched_at > self.max_age:
+            self.misses += 1
+            return None
+        if total is not None and cached_total is not None and cached_total != total:
+            self.misses += 1
+            self.changed += 1
+            return None
+
+        self.hits += 1
+        return json.loads(counts)
+
+    def put(self, key: str, counts: dict, total: int = None):
+        """Store the citation counts of an article, stamped with the current time."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO citations (article_id, counts, fetched_at, total) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(counts), time.time(), total),
+            )
+            self._conn.commit()
+
+    def evict(self) -> int:
+        """Delete the oldest entries beyond `max_entries` and return how many went."""
+        if self.max_entries is None:
+            return 0
+
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM citations WHERE article_id IN ("
+                "SELECT article_id FROM citations "
+                "ORDER BY fetched_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+        if cursor.rowcount:
+            logger.info(f"Evicted {cursor.rowcount} entries from the citation cache")
+        return cursor.rowcount
+
+    def log_stats(self):
+        """Log the hit/miss counts of the current run."""
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        logger.info(
+            f"Citation cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate, "
+            f"{self.changed} refetched because their citation total changed)"
+        )
+
+    def close(self):
+        self.evict()
+        with self._lock:
+            self._conn.close()
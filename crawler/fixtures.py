@@ -0,0 +1,235 @@
+import html
+import random
+import zlib
+
+# Synthetic Google Scholar pages. The markup mirrors the parts of the real
+# profile and article pages that soupr reads (plus enough surrounding noise
+# to make the documents a realistic size), so they can be used to benchmark
+# the parsers and to serve a stand-in Scholar over HTTP.
+
+WORDS = (
+    "deep learning network neural graph model analysis data adaptive robust "
+    "efficient scalable learning optimization detection segmentation system "
+    "distributed federated image language transformer survey method approach "
+    "evaluation framework sparse kernel estimation inference bayesian"
+).split()
+
+AUTHORS = (
+    "A Smith, B Jones, C Wang, D Garcia, E Müller, F Rossi, G Tanaka, H Kim"
+).split(", ")
+
+
+def article_title(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(4, 12))]
+    return " ".join(words).capitalize()
+
+
+def profile_row(
+    scholar_id: str, index: int, year: int, citations: int, rng: random.Random
+) -> str:
+    """Return one `tr.gsc_a_tr` row of a profile's article table."""
+    title = html.escape(article_title(rng))
+    authors = html.escape(", ".join(rng.sample(AUTHORS, rng.randint(1, 5))))
+    article_id = f"{index:012x}"
+    # Cluster ids are global, so derive them from the scholar as well
+    cluster_id = zlib.crc32(f"{scholar_id}:{index}".encode())
+    href = (
+        f"/citations?view_op=view_citation&amp;hl=en&amp;user={scholar_id}"
+        f"&amp;citation_for_view={scholar_id}:{article_id}"
+    )
+    cited = str(citations) if citations else ""
+    return (
+        '<tr class="gsc_a_tr">'
+        '<td class="gsc_a_t">'
+        f'<a href="{href}" class="gsc_a_at">{title}</a>'
+        f'<div class="gs_gray">{authors}</div>'
+        f'<div class="gs_gray">Journal of Synthetic Results {rng.randint(1, 40)}'
+        f'<span class="gs_oph">, {year}</span></div>'
+        "</td>"
+        '<td class="gsc_a_c">'
+        f'<a href="https://scholar.google.com/scholar?oi=bibs&amp;hl=en&amp;cites={cluster_id}" '
+        f'class="gsc_a_ac gs_ibl">{cited}</a>'
+        "</td>"
+        '<td class="gsc_a_y">'
+        f'<span class="gsc_a_h gsc_a_hc gs_ibl">{year}</span>'
+        "</td>"
+        "</tr>"
+    )
+
+
+def profile_rows(
+    scholar_id: str, num_rows: int, newest_year: int = 2025, seed: int = 0
+):
+    """
+    Return the rows of a synthetic profile, newest publication first.
+
+    Returns:
+        list: (row_html, year, citations) tuples
+    """
+    rng = random.Random(f"{scholar_id}:{seed}")
+    rows = []
+    year = newest_year
+    for index in range(num_rows):
+        # Roughly a dozen papers per year
+        if index and rng.random() < 0.08:
+            year -= 1
+        citations = 0 if rng.random() < 0.3 else int(rng.paretovariate(1.2))
+        row = profile_row(scholar_id, index, year, citations, rng)
+        rows.append((row, year, citations))
+    return rows
+
+
+def profile_citations(
+    scholar_id: str, newest_year: int = 2025, seed: int = 0, num_years: int = 10
+):
+    """Return the deterministic year -> citations histogram of a synthetic profile."""
+    rng = random.Random(f"{scholar_id}:{seed}:citations")
+    return {
+        str(year): 0 if rng.random() < 0.1 else rng.randint(1, 400)
+        for year in range(newest_year - num_years + 1, newest_year + 1)
+    }
+
+
+def citation_chart(citations: dict) -> str:
+    """Return the profile's citations-per-year bar chart for a histogram."""
+    years = list(citations)
+    labels = "".join(
+        f'<span class="gsc_g_t" style="right:{(len(years) - position) * 32}px">'
+        f"{year}</span>"
+        for position, year in enumerate(years)
+    )
+    # Like on Scholar, years without citations get a label but no bar, and
+    # a bar's z-index counts the years from the right
+    bars = "".join(
+        f'<a href="javascript:void(0)" class="gsc_g_a" '
+        f'style="right:{(len(years) - position) * 32}px;'
+        f'height:{min(count, 80)}px;z-index:{len(years) - position}">'
+        f'<span class="gsc_g_al">{count}</span></a>'
+        for position, (year, count) in enumerate(citations.items())
+        if count
+    )
+    return (
+        '<div id="gsc_rsb_cit"><div class="gsc_md_hist_w"><div class="gsc_md_hist_b">'
+        f"{labels}{bars}</div></div></div>"
+    )
+
+
+def profile_page(
+    scholar_id: str = "BENCH0000000",
+    num_rows: int = 100,
+    newest_year: int = 2025,
+    seed: int = 0,
+    start: int = 0,
+    page_size: int = None,
+    more_available: bool = False,
+) -> str:
+    """
+    Build a synthetic profile page.
+
+    Args:
+        scholar_id: Scholar ID used in the article links
+        num_rows: Total number of articles in the profile
+        newest_year: Publication year of the newest article
+        seed: Seed of the random content
+        start: Index of the first row on the page (the `cstart` parameter)
+        page_size: Number of rows on the page (None for all of them)
+        more_available: Whether the "Show more" button should be enabled
+
+    Returns:
+        str: HTML of the page
+    """
+    rows = profile_rows(scholar_id, num_rows, newest_year, seed)
+    # Only the first page of a profile carries the sidebar
+    chart = (
+        citation_chart(profile_citations(scholar_id, newest_year, seed))
+        if start == 0
+        else ""
+    )
+    end = num_rows if page_size is None else min(num_rows, start + page_size)
+    body = "".join(row for row, _, _ in rows[start:end])
+    disabled = "" if more_available else ' disabled=""'
+
+    return (
+        "<!doctype html><html><head><title>Synthetic Scholar profile</title>"
+        '<meta charset="utf-8">'
+        "<style>" + ".gsc_a_tr{border:0}" * 50 + "</style>"
+        "<script>var _gsc = {};" + "/* padding */" * 200 + "</script>"
+        "</head><body>"
+        '<div id="gs_top"><div id="gsc_bdy">'
+        '<div id="gsc_prf_w"><div id="gsc_prf">'
+        f'<div id="gsc_prf_in">Synthetic Scholar {html.escape(scholar_id)}</div>'
+        '<div class="gsc_prf_il">Department of Synthetic Data</div>'
+        "</div></div>"
+        f"{chart}"
+        '<div id="gsc_art"><form method="post" id="citationsForm">'
+        '<table id="gsc_a_t"><thead><tr id="gsc_a_tr0">'
+        '<th class="gsc_a_t">Title</th><th class="gsc_a_c">Cited by</th>'
+        '<th class="gsc_a_y">Year</th></tr></thead>'
+        f'<tbody id="gsc_a_b">{body}</tbody></table></form>'
+        '<div id="gsc_lwp"><div id="gsc_a_sp"></div>'
+        f'<button type="button" id="gsc_bpf_more" class="gs_btnPD"{disabled}>'
+        '<span class="gs_wr"><span class="gs_lbl">Show more</span></span></button>'
+        "</div></div>"
+        "</div></div></body></html>"
+    )
+
+
+def article_counts(article_key: str, first_year: int = 2015, last_year: int = 2025):
+    """Return the deterministic year -> count histogram of a synthetic article."""
+    rng = random.Random(article_key)
+    return {
+        str(year): rng.randint(1, 60)
+        for year in range(first_year, last_year + 1)
+        if rng.random() > 0.1
+    }
+
+
+def article_page(
+    article_key: str = "BENCH:0", first_year: int = 2015, last_year: int = 2025
+):
+    """
+    Build a synthetic article (`view_citation`) page.
+
+    Args:
+        article_key: Key seeding the histogram (e.g. the citation_for_view id)
+        first_year: First year of the citation graph
+        last_year: Last year of the citation graph
+
+    Returns:
+        str: HTML of the page
+    """
+    counts = article_counts(article_key, first_year, last_year)
+    bars = []
+    for position, year in enumerate(range(first_year, last_year + 1)):
+        count = counts.get(str(year))
+        if count is None:
+            continue
+        href = (
+            "/scholar?oi=bibs&amp;hl=en&amp;cites=1&amp;as_sdt=5"
+            f"&amp;as_ylo={year}&amp;as_yhi={year}"
+        )
+        bars.append(
+            f'<a href="{href}" class="gsc_oci_g_a" '
+            f'style="left:{position * 32}px;height:{min(count, 60)}px">'
+            f'<span class="gsc_oci_g_al">{count}</span></a>'
+        )
+    years = "".join(
+        f'<span class="gsc_oci_g_t" style="left:{position * 32}px">{year}</span>'
+        for position, year in enumerate(range(first_year, last_year + 1))
+    )
+
+    return (
+        "<!doctype html><html><head><title>Synthetic article</title>"
+        '<meta charset="utf-8"></head><body>'
+        '<div id="gsc_oci_title">Synthetic article '
+        f"{html.escape(article_key)}</div>"
+        '<div id="gsc_oci_table">'
+        '<div class="gs_scl"><div class="gsc_oci_field">Authors</div>'
+        '<div class="gsc_oci_value">A Smith, B Jones</div></div>'
+        '<div class="gs_scl"><div class="gsc_oci_field">Total citations</div>'
+        '<div class="gsc_oci_value">'
+        '<div id="gsc_oci_graph"><div id="gsc_oci_graph_bars">'
+        f"{years}{''.join(bars)}</div></div>"
+        "</div></div></div>"
+        "</body></html>"
+    )
@@ -0,0 +1,249 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scholars (
+    scholar_id TEXT PRIMARY KEY,
+    crawled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    scholar_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    pub_year TEXT NOT NULL,
+    duplicate INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (scholar_id, title, pub_year, duplicate)
+);
+CREATE TABLE IF NOT EXISTS counts (
+    article INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    snapshot INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (article, year, snapshot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS counts_snapshot ON counts (snapshot);
+"""
+
+# Columns of a diff between two snapshots
+DIFF_HEADERS = [
+    "scholar_id",
+    "title",
+    "publication_year",
+    "citation_year",
+    "previous",
+    "current",
+    "change",
+]
+
+
+class CitationHistory:
+    """
+    SQLite time series of article citation counts, one snapshot per run.
+
+    Counts are stored as deltas: a snapshot only adds a row for an
+    article's year when its count differs from the latest value already
+    stored, so a snapshot of articles that didn't gain citations costs
+    nothing, and the counts as of any snapshot are the latest row at or
+    before it. Articles are identified by scholar, title and publication
+    year (numbered when a profile lists the same title twice in a year).
+
+    Counts of -1 (unknown: the page failed to load or has no graph) are
+    not recorded.
+
+    Args:
+        path: Path of the SQLite database file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.recorded = 0
+        self.stored = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def begin_snapshot(self) -> int:
+        """Start a new snapshot and return its id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO snapshots (taken_at) VALUES (?)", (time.time(),)
+            )
+            self._conn.commit()
+        return cursor.lastrowid
+
+    def snapshots(self) -> list:
+        """Return (id, taken_at) of every snapshot, oldest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, taken_at FROM snapshots ORDER BY id"
+            ).fetchall()
+
+    def scholars(self) -> list[str]:
+        """Return every recorded scholar, in the order they were first recorded."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT scholar_id FROM scholars ORDER BY rowid"
+            ).fetchall()
+        return [scholar_id for (scholar_id,) in rows]
+
+    def _crawled_at(self) -> dict:
+        with self._lock:
+            return dict(
+                self._conn.execute("SELECT scholar_id, crawled_at FROM scholars")
+            )
+
+    def due(self, scholar_ids: list[str], interval: float) -> list[str]:
+        """Return the scholars never recorded, or last recorded `interval` s ago."""
+        crawled = self._crawled_at()
+        now = time.time()
+        return [
+            scholar_id
+            for scholar_id in scholar_ids
+            if now - crawled.get(scholar_id, 0) >= interval
+        ]
+
+    def next_due(self, scholar_ids: list[str], interval: float) -> float:
+        """Return the time at which the first of the scholars becomes due."""
+        crawled = self._crawled_at()
+        return min(crawled.get(scholar_id, 0) + interval for scholar_id in scholar_ids)
+
+    def record(self, snapshot: int, scholar_id: str, rows: list, years: list[str]):
+        """
+        Record a scholar's output rows in a snapshot.
+
+        Args:
+            snapshot: Id returned by `begin_snapshot`
+            scholar_id: Google Scholar ID of the author
+            rows: The scholar's output rows, as built by `build_row`
+            years: Years of the rows' citation columns
+
+        Returns:
+            int: Number of counts that changed (and were stored)
+        """
+        with self._lock:
+            latest = self._latest_counts(scholar_id)
+            seen = {}
+            changed = []
+
+            for row in rows:
+                title, pub_year = row[1], str(row[2])
+                # Rows carry no article id, so tell apart same-titled rows
+                # of one year by their position
+                duplicate = seen.get((title, pub_year), -1) + 1
+                seen[(title, pub_year)] = duplicate
+                article = self._article_id(scholar_id, title, pub_year, duplicate)
+                for year, count in zip(years, row[3:]):
+                    if count >= 0 and latest.get((article, int(year))) != count:
+                        changed.append((article, int(year), snapshot, count))
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO counts (article, year, snapshot, count) "
+                "VALUES (?, ?, ?, ?)",
+                changed,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scholars (scholar_id, crawled_at) "
+                "VALUES (?, ?)",
+                (scholar_id, time.time()),
+            )
+            self._conn.commit()
+
+        self.recorded += 1
+        self.stored += len(changed)
+        return len(changed)
+
+    def _article_id(self, scholar_id, title, pub_year, duplicate) -> int:
+        key = (scholar_id, title, pub_year, duplicate)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO articles (scholar_id, title, pub_year, duplicate) "
+            "VALUES (?, ?, ?, ?)",
+            key,
+        )
+        return self._conn.execute(
+            "SELECT id FROM articles "
+            "WHERE scholar_id = ? AND title = ? AND pub_year = ? AND duplicate = ?",
+            key,
+        ).fetchone()[0]
+
+    def _latest_counts(self, scholar_id: str) -> dict:
+        """Return the latest (article, year) -> count of a scholar's articles."""
+        # SQLite takes the bare columns of a MAX() aggregate from its row
+        rows = self._conn.execute(
+            "SELECT c.article, c.year, c.count, MAX(c.snapshot) FROM counts c "
+            "JOIN articles a ON a.id = c.article WHERE a.scholar_id = ? "
+            "GROUP BY c.article, c.year",
+            (scholar_id,),
+        )
+        return {(article, year): count for article, year, count, _ in rows}
+
+    def diff(self, old: int, new: int) -> list[list]:
+        """
+        Return the counts that changed after snapshot `old`, up to snapshot `new`.
+
+        Only the deltas stored in between are looked at, so the cost doesn't
+        grow with the number of snapshots kept.
+
+        Returns:
+            list: One row per changed article year, in DIFF_HEADERS order;
+                `previous` is -1 where the count wasn't known yet
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT a.scholar_id, a.title, a.pub_year, d.year, "
+                "COALESCE((SELECT count FROM counts WHERE article = d.article "
+                "AND year = d.year AND snapshot <= ? "
+                "ORDER BY snapshot DESC LIMIT 1), -1), "
+                "(SELECT count FROM counts WHERE article = d.article "
+                "AND year = d.year AND snapshot <= ? "
+                "ORDER BY snapshot DESC LIMIT 1) "
+                "FROM (SELECT DISTINCT article, year FROM counts "
+                "WHERE snapshot > ? AND snapshot <= ?) d "
+                "JOIN articles a ON a.id = d.article "
+                "ORDER BY a.id, d.year",
+                (old, new, old, new),
+            ).fetchall()
+
+        return [
+            [
+                scholar_id,
+                title,
+                pub_year,
+                str(year),
+                previous,
+                current,
+                current - max(previous, 0),
+            ]
+            for scholar_id, title, pub_year, year, previous, current in rows
+            if previous != current
+        ]
+
+    def log_stats(self):
+        if self.recorded:
+            logger.info(
+                f"Recorded {self.recorded} scholar(s) in {self.path}: "
+                f"{self.stored} changed count(s) stored"
+            )
+
+    def close(self):
+        self.log_stats()
+        with self._lock:
+            self._conn.close()
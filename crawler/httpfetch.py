@@ -0,0 +1,184 @@
+import re
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from .logger import logger
+from .soupr import SCHOLAR_URL
+from .throttle import BlockedError, is_block_page
+
+
+# Scholar refuses to return more than 100 rows per profile page
+MAX_PAGE_SIZE = 100
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+# Status codes Scholar answers with when it rate-limits a client
+BLOCK_STATUS_CODES = (429, 503)
+
+# Year cell of an article row, e.g. <td class="gsc_a_y"><span class="...">2020</span>
+YEAR_CELL = re.compile(r'class="gsc_a_y"><span class="[^"]*">(\d*)</span>')
+
+
+def count_article_rows(page_source: str) -> int:
+    """Count the article table rows in a profile page without parsing it."""
+    return page_source.count('class="gsc_a_tr"')
+
+
+def last_article_year(page_source: str):
+    """
+    Return the publication year of the last article row without parsing the page.
+
+    Returns:
+        int: The year, 0 if the row has no year, or None if there are no rows
+    """
+    years = YEAR_CELL.findall(page_source)
+    if not years:
+        return None
+    return int(years[-1] or 0)
+
+
+class HttpFetcher:
+    """
+    Fetch backend that loads Scholar pages with plain HTTP requests.
+
+    The profile's article list is pulled page by page through the
+    `cstart`/`pagesize` query parameters instead of clicking "Show more",
+    and article pages are requested directly. No browser is started.
+
+    The list is requested newest first (`sortby=pubdate`), so paging can
+    stop as soon as a page ends with an article older than the requested
+    years.
+
+    Args:
+        workers: Number of pages that may be fetched concurrently
+        base_url: Scholar host to talk to (overridable for local test servers)
+        page_size: Number of profile rows requested per page
+        timeout: Timeout in seconds for each request
+        limiter: Optional HostRateLimiter or Throttle every request has to pass
+            through
+    """
+
+    name = "http"
+
+    def __init__(
+        self,
+        workers: int = 1,
+        base_url: str = SCHOLAR_URL,
+        page_size: int = MAX_PAGE_SIZE,
+        timeout: int = 30,
+        limiter=None,
+    ):
+        self.workers = workers
+        self.base_url = base_url.rstrip("/")
+        self.page_size = min(page_size, MAX_PAGE_SIZE)
+        self.timeout = timeout
+        self.limiter = limiter
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def get(self, url: str) -> str:
+        """Perform a GET request and return the decoded response body."""
+        if self.limiter is None:
+            return self._get(url)
+        return self.limiter.request(url, self._get, url)
+
+    def _get(self, url: str) -> str:
+        request = urllib.request.Request(url, headers=DEFAULT_HEADERS)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                charset = response.headers.get_content_charset() or "utf-8"
+                page_source = response.read().decode(charset, errors="replace")
+                final_url = response.geturl()
+        except urllib.error.HTTPError as e:
+            if e.code in BLOCK_STATUS_CODES:
+                raise BlockedError(f"HTTP {e.code}") from e
+            raise
+
+        # Blocked clients get redirected to a CAPTCHA page with status 200
+        if "/sorry/" in final_url or is_block_page(page_source):
+            raise BlockedError("block page")
+        return page_source
+
+    def profile_url(self, scholar_id: str, start: int = 0) -> str:
+        """Build the URL of one page of a scholar's article list."""
+        query = urllib.parse.urlencode(
+            {
+                "user": scholar_id,
+                "hl": "en",
+                "cstart": start,
+                "pagesize": self.page_size,
+                "sortby": "pubdate",
+            }
+        )
+        return f"{self.base_url}/citations?{query}"
+
+    def iter_profile(self, scholar_id: str, min_year: int = None):
+        """
+        Yield the profile's pages until the article list is exhausted.
+
+        Args:
+            scholar_id: Google Scholar ID
+            min_year: Stop once the articles get older than this year
+
+        Yields:
+            str: HTML of each profile page
+
+        Raises:
+            URLError, TimeoutError, BlockedError: If a page after the first
+                failed to load, so the profile isn't taken as complete
+        """
+        start = 0
+        while True:
+            url = self.profile_url(scholar_id, start)
+            logger.info(f"Fetching profile page for ID {scholar_id} (start={start})")
+
+            try:
+                page_source = self.get(url)
+            except (urllib.error.URLError, TimeoutError, BlockedError) as e:
+                logger.error(f"Error while getting page: {str(e)}")
+                if start:
+                    raise
+                return
+
+            yield page_source
+
+            # A short page means we have reached the end of the list
+            if count_article_rows(page_source) < self.page_size:
+                return
+
+            # Articles without a year are listed last, so they end the list too
+            last_year = last_article_year(page_source)
+            if min_year is not None and last_year is not None and last_year < min_year:
+                logger.info(
+                    f"Articles of {scholar_id} are older than {min_year}, stopping"
+                )
+                return
+
+            start += self.page_size
+
+    def fetch_article(self, article_url: str):
+        """Return the HTML of an article page, or None if it failed to load."""
+        try:
+            return self.get(urllib.parse.urljoin(self.base_url, article_url))
+        except (urllib.error.URLError, TimeoutError, BlockedError) as e:
+            logger.error(f"Error loading article page: {str(e)}")
+            return None
+
+    def warm_up(self):
+        """Nothing to start: requests are plain HTTP."""
+
+    def close(self):
+        pass
@@ -0,0 +1,128 @@
+import json
+import os
+
+from .logger import logger
+
+
+def journal_path_for(save_path: str) -> str:
+    """Return the default journal path that belongs to an output path."""
+    # Mirror save_to_excel: bare file names end up in the output folder
+    if os.path.dirname(save_path) == "":
+        save_path = os.path.join("output", save_path)
+    return f"{save_path}.journal.jsonl"
+
+
+class CheckpointJournal:
+    """
+    Append-only JSON Lines journal of a batch run.
+
+    Every article whose page was parsed and every scholar whose rows are
+    complete is appended as soon as it finishes, so an interrupted run can
+    be resumed without repeating that work and the final output can be
+    rebuilt from the journal alone.
+
+    Record types:
+        {"type": "run", "years": [...]}
+        {"type": "article", "scholar_id": ..., "url": ..., "counts": {...}}
+        {"type": "scholar", "scholar_id": ..., "rows": [[...], ...]}
+
+    Args:
+        path: Path of the journal file
+        years: List of years the run extracts citations for
+        resume: Load the existing journal instead of starting a new one
+    """
+
+    def __init__(self, path: str, years: list[str], resume: bool = False):
+        self.path = path
+        self.years = list(years)
+        self.scholars = {}
+        self.articles = {}
+
+        if resume and os.path.exists(path):
+            end = self._load()
+            # Cut a torn last line off, or the next record would be glued to it
+            if end < os.path.getsize(path):
+                os.truncate(path, end)
+            mode = "a"
+        else:
+            if resume:
+                logger.warning(f"No journal found at {path}, starting a new run")
+            mode = "w"
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, mode, encoding="utf-8")
+        if mode == "w":
+            self._append({"type": "run", "years": self.years}, sync=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _load(self) -> int:
+        """Load the journal; return the offset just past its last complete line."""
+        end = 0
+        with open(self.path, "rb") as file:
+            for line_number, line in enumerate(file, start=1):
+                # A crash can leave a truncated last line behind
+                if not line.endswith(b"\n"):
+                    logger.warning(
+                        f"Dropping torn journal line {line_number} in {self.path}"
+                    )
+                    break
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    logger.warning(
+                        f"Skipping unreadable journal line {line_number} in {self.path}"
+                    )
+                    continue
+
+                kind = record.get("type")
+                if kind == "run" and record["years"] != self.years:
+                    raise ValueError(
+                        f"Journal {self.path} was written for year(s) {record['years']}, "
+                        f"not {self.years}"
+                    )
+                elif kind == "article":
+                    key = (record["scholar_id"], record["url"])
+                    self.articles[key] = record["counts"]
+                elif kind == "scholar":
+                    self.scholars[record["scholar_id"]] = record["rows"]
+
+        logger.info(
+            f"Resuming from {self.path}: {len(self.scholars)} scholars and "
+            f"{len(self.articles)} articles already done"
+        )
+        return end
+
+    def _append(self, record: dict, sync: bool = False):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        if sync:
+            os.fsync(self._file.fileno())
+
+    def scholar_rows(self, scholar_id: str):
+        """Return the journaled rows of a completed scholar, or None."""
+        return self.scholars.get(scholar_id)
+
+    def article_counts(self, scholar_id: str, url: str):
+        """Return the journaled citation counts of an article, or None."""
+        return self.articles.get((scholar_id, url))
+
+    def record_article(self, scholar_id: str, url: str, counts: dict):
+        # Only records loaded from disk are kept in memory, so a long run
+        # doesn't accumulate everything it writes
+        self._append(
+            {"type": "article", "scholar_id": scholar_id, "url": url, "counts": counts}
+        )
+
+    def record_scholar(self, scholar_id: str, rows: list):
+        self._append(
+            {"type": "scholar", "scholar_id": scholar_id, "rows": rows}, sync=True
+        )
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,290 @@
+"""
+End-to-end load test of the crawler against a local mock Scholar.
+
+Starts a mock Scholar (crawler.mockserver) and, for every concurrency
+setting, runs the full `extract_from_txt` pipeline over a list of
+synthetic scholars in a fresh process, recording scholars per minute,
+pages per second, CPU time and peak memory. Nothing touches the real site.
+
+    uv run -m crawler.loadtest --scholars 50 --workers 1,2,4,8 --latency 100
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import typer
+
+from crawler.bench import environment
+from crawler.mockserver import MockScholar, start_server
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_WORKERS = "1,2,4,8"
+
+
+def scholar_ids(count: int) -> list[str]:
+    """Return `count` synthetic scholar IDs."""
+    return [f"MOCK{index:08d}" for index in range(count)]
+
+
+def peak_memory_bytes():
+    """Return the peak resident memory of this process, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_crawl(
+    base_url: str,
+    ids: list[str],
+    year: str,
+    workers: int,
+    backend: str,
+    rate: float,
+    burst: int,
+    max_rate: float,
+    retries: int,
+    directory: str,
+):
+    """
+    Crawl `ids` from the mock Scholar at `base_url` with `extract_from_txt`.
+
+    Meant to run in a fresh process, so the CPU and memory figures are the
+    crawl's alone. Only warnings are logged.
+
+    Returns:
+        dict: wall_s, cpu_s, peak_rss_bytes and rows
+    """
+    import crawler
+    from crawler.logger import logger
+
+    logger.setLevel("WARNING")
+    crawler.set_base_url(base_url)
+    save_path = os.path.join(directory, f"load_{workers}.csv")
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    crawler.extract_from_txt(
+        ids,
+        year,
+        save_path,
+        True,
+        workers,
+        backend,
+        rate,
+        burst,
+        None,
+        False,
+        os.path.join(directory, f"load_{workers}.journal.jsonl"),
+        "csv",
+        None,
+        max_rate,
+        retries,
+    )
+    wall, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+
+    rows = 0
+    if os.path.exists(save_path):
+        with open(save_path, "r", encoding="utf-8") as file:
+            rows = sum(1 for _ in file) - 1
+    return {
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "peak_rss_bytes": peak_memory_bytes(),
+        "rows": rows,
+    }
+
+
+def run_load_test(
+    scholar: MockScholar,
+    num_scholars: int,
+    worker_counts: list[int],
+    year: str = "2020:2025",
+    backend: str = "http",
+    rate: float = 1000.0,
+    burst: int = 50,
+    max_rate: float = None,
+    retries: int = 3,
+):
+    """
+    Crawl the same synthetic scholars once per concurrency setting.
+
+    Args:
+        scholar: Mock Scholar to serve the pages from
+        num_scholars: Number of scholars crawled per setting
+        worker_counts: Numbers of workers to try
+        year: Year or range of years to extract citations for
+        backend: Fetch backend to use ("selenium" or "http")
+        rate: Requests per second allowed per host
+        burst: Number of requests per host that may go out back to back
+        max_rate: Highest rate per host the throttle may probe up to
+        retries: Retries of a blocked request before giving up on it
+
+    Returns:
+        list: One result dict per setting
+    """
+    server, base_url = start_server(scholar)
+    ids = scholar_ids(num_scholars)
+    # Spawned, so no setting inherits the memory of the ones before it
+    context = multiprocessing.get_context("spawn")
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for workers in worker_counts:
+                scholar.reset_stats()
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    result = executor.submit(
+                        run_crawl,
+                        base_url,
+                        ids,
+                        year,
+                        workers,
+                        backend,
+                        rate,
+                        burst,
+                        max_rate,
+                        retries,
+                        directory,
+                    ).result()
+
+                stats = dict(scholar.stats)
+                pages = stats["profile_pages"] + stats["article_pages"]
+                result.update(
+                    {
+                        "workers": workers,
+                        "scholars": num_scholars,
+                        "scholars_per_min": num_scholars / result["wall_s"] * 60,
+                        "pages": pages,
+                        "pages_per_s": pages / result["wall_s"],
+                        "cpu_percent": result["cpu_s"] / result["wall_s"] * 100,
+                        "served": stats,
+                    }
+                )
+                results.append(result)
+
+                peak = result["peak_rss_bytes"]
+                typer.echo(
+                    f"workers {workers:<3} "
+                    f"{result['scholars_per_min']:8.1f} scholars/min  "
+                    f"{result['pages_per_s']:7.1f} pages/s  "
+                    f"cpu {result['cpu_percent']:5.1f}%  "
+                    f"peak {'-' if peak is None else f'{peak / 2**20:.0f}'} MiB  "
+                    f"{stats['errors']} errors, {stats['blocks']} blocks injected"
+                )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return results
+
+
+def main(
+    scholars: int = typer.Option(
+        20, "--scholars", min=1, help="Scholars crawled per setting."
+    ),
+    workers: str = typer.Option(
+        DEFAULT_WORKERS,
+        "--workers",
+        help="Comma-separated worker counts to try.",
+    ),
+    rows: int = typer.Option(100, "--rows", min=0, help="Articles per profile."),
+    max_rows: Optional[int] = typer.Option(
+        None,
+        "--max-rows",
+        min=0,
+        help="Draw each profile's size between --rows and this many articles.",
+    ),
+    year: str = typer.Option(
+        "2020:2025", "--year", "-y", help="Year range to extract citations for."
+    ),
+    backend: str = typer.Option(
+        "http", "--backend", "-b", help="Fetch backend: 'http' or 'selenium'."
+    ),
+    rate: float = typer.Option(
+        1000.0, "--rate", min=0.01, help="Requests per second sent to the mock."
+    ),
+    burst: int = typer.Option(50, "--burst", min=1, help="Burst of the rate limit."),
+    max_rate: Optional[float] = typer.Option(
+        None, "--max-rate", min=0.01, help="Highest rate the throttle may probe up to."
+    ),
+    retries: int = typer.Option(
+        3, "--retries", min=0, help="Retries of a blocked request."
+    ),
+    latency: float = typer.Option(
+        0.0, "--latency", min=0, help="Milliseconds every response is delayed by."
+    ),
+    jitter: float = typer.Option(
+        0.0,
+        "--jitter",
+        min=0,
+        help="Extra random delay of up to this many milliseconds.",
+    ),
+    error_rate: float = typer.Option(
+        0.0,
+        "--error-rate",
+        min=0,
+        max=1,
+        help="Fraction of requests answered with HTTP 500.",
+    ),
+    block_rate: float = typer.Option(
+        0.0,
+        "--block-rate",
+        min=0,
+        max=1,
+        help="Fraction of requests answered with a CAPTCHA page or HTTP 429.",
+    ),
+    out: Optional[str] = typer.Option(
+        None,
+        "--out",
+        "-o",
+        help="Write the results as JSON to this file.",
+    ),
+):
+    """Load-test the full crawl pipeline against a local mock Scholar."""
+    worker_counts = [int(count) for count in workers.split(",") if count.strip()]
+    scholar = MockScholar(
+        rows, max_rows, latency / 1000, jitter / 1000, error_rate, block_rate
+    )
+    results = run_load_test(
+        scholar,
+        scholars,
+        worker_counts,
+        year,
+        backend,
+        rate,
+        burst,
+        max_rate,
+        retries,
+    )
+
+    report = {
+        "environment": environment(),
+        "mock": {
+            "rows": scholar.rows,
+            "max_rows": scholar.max_rows,
+            "latency_s": scholar.latency,
+            "jitter_s": scholar.jitter,
+            "error_rate": error_rate,
+            "block_rate": block_rate,
+        },
+        "results": results,
+    }
+    if out:
+        with open(out, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        typer.echo(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
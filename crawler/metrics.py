@@ -0,0 +1,194 @@
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .logger import logger
+
+# Upper bounds (in seconds) of the histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+# Scholar the current task/thread is working on, used to attribute spans
+current_scholar = contextvars.ContextVar("current_scholar", default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations (no raw samples are kept)."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        for idx, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[idx] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_s": self.sum,
+            "min_s": self.min if self.count else 0.0,
+            "max_s": self.max,
+            "mean_s": self.sum / self.count if self.count else 0.0,
+            "p50_s": self.quantile(0.5),
+            "p95_s": self.quantile(0.95),
+            "buckets": {
+                ("+Inf" if bound == math.inf else str(bound)): count
+                for bound, count in zip(BUCKETS, self.counts)
+            },
+        }
+
+
+class Metrics:
+    """
+    Registry of per-stage timing histograms for a run.
+
+    Every span is aggregated into a run-wide histogram of its stage and,
+    when it happens while a scholar is being processed, into that
+    scholar's histogram as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.scholars = {}
+
+    def observe(self, stage: str, seconds: float, scholar_id: str = None):
+        """Record one duration for `stage`."""
+        scholar_id = scholar_id or current_scholar.get()
+        with self._lock:
+            self.stages.setdefault(stage, Histogram()).observe(seconds)
+            if scholar_id is not None:
+                stages = self.scholars.setdefault(scholar_id, {})
+                stages.setdefault(stage, Histogram()).observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str, scholar_id: str = None):
+        """Time the enclosed block as one occurrence of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, scholar_id)
+
+    def timed(self, stage: str):
+        """Decorator timing every call of a function as `stage`."""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def report(self) -> dict:
+        """Return the run and per-scholar histograms as a JSON-able dict."""
+        with self._lock:
+            return {
+                "started": self.started,
+                "elapsed_s": time.time() - self.started,
+                "stages": {
+                    stage: histogram.to_dict()
+                    for stage, histogram in sorted(self.stages.items())
+                },
+                "scholars": {
+                    scholar_id: {
+                        stage: histogram.to_dict()
+                        for stage, histogram in sorted(stages.items())
+                    }
+                    for scholar_id, stages in self.scholars.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the run-wide histograms in the Prometheus text format."""
+        name = "sapi_stage_duration_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each crawl stage.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == math.inf else str(bound)
+                    lines.append(
+                        f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}'
+                    )
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append("# HELP sapi_scholars_total Scholars processed in the run.")
+            lines.append("# TYPE sapi_scholars_total gauge")
+            lines.append(f"sapi_scholars_total {len(self.scholars)}")
+            lines.append("# HELP sapi_run_duration_seconds Wall time of the run.")
+            lines.append("# TYPE sapi_run_duration_seconds gauge")
+            lines.append(f"sapi_run_duration_seconds {time.time() - self.started}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str):
+        """
+        Write the metrics to `path`.
+
+        Files ending in .prom are written in the Prometheus textfile format
+        (for node_exporter's textfile collector); anything else gets the
+        full JSON report.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file first so collectors never see half a file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            if path.endswith(".prom"):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.report(), file, indent=2)
+        os.replace(tmp_path, path)
+        logger.info(f"Metrics written to {path}")
+
+    def log_summary(self):
+        """Log count, total and p95 time of every stage."""
+        for stage, histogram in sorted(self.stages.items()):
+            logger.info(
+                f"Stage {stage}: {histogram.count} spans, {histogram.sum:.2f}s total, "
+                f"p95 {histogram.quantile(0.95):.3f}s"
+            )
+
+
+metrics = Metrics()
@@ -0,0 +1,303 @@
+"""
+Local stand-in for Google Scholar, built from the synthetic fixture pages.
+
+Serves profiles of configurable size (paged through `cstart`/`pagesize`
+like Scholar, with a working "Show more" button for the selenium backend)
+and article pages with citation graphs, and can inject latency, server
+errors and block pages. Counters of what was served are available at
+`/_stats`.
+
+    uv run -m crawler.mockserver --rows 200 --latency 50 --block-rate 0.01
+"""
+
+import json
+import random
+import threading
+import time
+import urllib.parse
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import typer
+
+from crawler import fixtures
+from crawler.logger import logger
+
+# Rows Scholar puts on a profile page unless asked for more
+DEFAULT_PAGE_SIZE = 20
+
+# Same limit as on Scholar
+MAX_PAGE_SIZE = 100
+
+# Served instead of the requested page when a block is injected (half of
+# them as HTTP 429, half as a CAPTCHA page with status 200)
+BLOCK_PAGE = (
+    "<!doctype html><html><head><title>Sorry...</title></head><body>"
+    '<div id="gs_captcha_f"><h1>Please show you\'re not a robot</h1>'
+    "<p>Our systems have detected unusual traffic from your computer network.</p>"
+    "</div></body></html>"
+)
+
+# Implements "Show more" the way Scholar does: the next rows are requested
+# as JSON and appended to the table, and the button stays disabled once
+# the list is exhausted (and while a request is in flight)
+SHOW_MORE_SCRIPT = """
+<script>
+document.getElementById("gsc_bpf_more").addEventListener("click", function () {
+    var button = this;
+    var table = document.getElementById("gsc_a_b");
+    var query = new URLSearchParams(location.search);
+    query.set("cstart", table.rows.length);
+    query.set("pagesize", 80);
+    query.set("json", 1);
+    button.disabled = true;
+    fetch(location.pathname + "?" + query)
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+            table.insertAdjacentHTML("beforeend", data.B);
+            button.disabled = !data.N;
+        })
+        .catch(function () { button.disabled = false; });
+});
+</script>
+"""
+
+
+class MockScholar:
+    """
+    Content and fault settings of a mock Scholar, plus what it served.
+
+    Profile sizes are drawn per scholar between `rows` and `max_rows`, and
+    pages are generated from the scholar and article ids, so the same id
+    always gets the same profile and citation counts.
+
+    Args:
+        rows: Number of articles of each profile
+        max_rows: Upper bound of the profile sizes (defaults to `rows`)
+        latency: Seconds every response is delayed by
+        jitter: Extra random delay of up to this many seconds
+        error_rate: Fraction of requests answered with HTTP 500
+        block_rate: Fraction of requests answered with a block page
+        newest_year: Publication year of each profile's newest article
+        seed: Seed of the generated content
+    """
+
+    def __init__(
+        self,
+        rows: int = 100,
+        max_rows: int = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        block_rate: float = 0.0,
+        newest_year: int = 2025,
+        seed: int = 0,
+    ):
+        self.rows = rows
+        self.max_rows = max(rows, max_rows or rows)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.block_rate = block_rate
+        self.newest_year = newest_year
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = dict.fromkeys(
+                ("profile_pages", "article_pages", "errors", "blocks", "bytes"), 0
+            )
+
+    def count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def profile_size(self, scholar_id: str) -> int:
+        """Return the number of articles of a scholar's profile."""
+        if self.max_rows == self.rows:
+            return self.rows
+        rng = random.Random(f"{scholar_id}:{self.seed}:size")
+        return rng.randint(self.rows, self.max_rows)
+
+    def fault(self):
+        """Draw the fault injected into a request: "error", "block" or None."""
+        draw = random.random()
+        if draw < self.block_rate:
+            return "block"
+        if draw < self.block_rate + self.error_rate:
+            return "error"
+        return None
+
+    def profile_page(self, scholar_id: str, start: int, page_size: int) -> str:
+        num_rows = self.profile_size(scholar_id)
+        page_source = fixtures.profile_page(
+            scholar_id,
+            num_rows,
+            self.newest_year,
+            self.seed,
+            start,
+            page_size,
+            more_available=start + page_size < num_rows,
+        )
+        return page_source.replace("</body>", f"{SHOW_MORE_SCRIPT}</body>")
+
+    def profile_rows(self, scholar_id: str, start: int, page_size: int) -> dict:
+        """Return the rows a "Show more" click loads, as Scholar's JSON answer."""
+        num_rows = self.profile_size(scholar_id)
+        rows = fixtures.profile_rows(scholar_id, num_rows, self.newest_year, self.seed)
+        end = min(num_rows, start + page_size)
+        return {
+            "B": "".join(row for row, _, _ in rows[start:end]),
+            "N": end < num_rows,
+        }
+
+    def article_page(self, key: str) -> str:
+        # Seed the histogram with the server's seed too, so runs can differ
+        article_key = f"{key}:{self.seed}" if self.seed else key
+        return fixtures.article_page(
+            article_key, self.newest_year - 10, self.newest_year
+        )
+
+
+class MockScholarHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler of a MockScholar.
+
+    GET /citations?user=<id>[&cstart=&pagesize=]     profile page
+    GET /citations?user=<id>&cstart=&pagesize=&json=1  rows for "Show more"
+    GET /citations?view_op=view_citation&citation_for_view=<id>:<article>
+                                                     article page
+    GET /_stats                                      counters, as JSON
+    """
+
+    scholar: MockScholar = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status: int, body: str, content_type: str = "text/html"):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self.scholar.count("bytes", len(payload))
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = {
+            key: values[0] for key, values in urllib.parse.parse_qs(url.query).items()
+        }
+
+        if url.path == "/_stats":
+            return self._send(200, json.dumps(self.scholar.stats), "application/json")
+        if url.path != "/citations" or not (
+            "user" in query or "citation_for_view" in query
+        ):
+            return self._send(404, "<html><body>Not found</body></html>")
+
+        scholar = self.scholar
+        time.sleep(scholar.latency + random.uniform(0, scholar.jitter))
+
+        fault = scholar.fault()
+        if fault == "block":
+            scholar.count("blocks")
+            # Stable per URL, so both kinds of block show up in every run
+            if zlib.crc32(self.path.encode()) % 2:
+                return self._send(429, BLOCK_PAGE)
+            return self._send(200, BLOCK_PAGE)
+        if fault == "error":
+            scholar.count("errors")
+            return self._send(500, "<html><body>Server Error</body></html>")
+
+        if query.get("view_op") == "view_citation":
+            scholar.count("article_pages")
+            return self._send(200, scholar.article_page(query["citation_for_view"]))
+
+        try:
+            start = max(0, int(query.get("cstart", 0)))
+            page_size = int(query.get("pagesize", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return self._send(400, "<html><body>Bad request</body></html>")
+        page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+
+        scholar.count("profile_pages")
+        if query.get("json"):
+            rows = scholar.profile_rows(query["user"], start, page_size)
+            return self._send(200, json.dumps(rows), "application/json")
+        return self._send(200, scholar.profile_page(query["user"], start, page_size))
+
+
+def start_server(scholar: MockScholar, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serve a MockScholar from a background thread.
+
+    Returns:
+        tuple: (server, base_url); call `server.shutdown()` to stop it
+    """
+    handler = type("Handler", (MockScholarHandler,), {"scholar": scholar})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to listen on."),
+    port: int = typer.Option(
+        8800, "--port", min=0, max=65535, help="Port to listen on."
+    ),
+    rows: int = typer.Option(100, "--rows", min=0, help="Articles per profile."),
+    max_rows: Optional[int] = typer.Option(
+        None,
+        "--max-rows",
+        min=0,
+        help="Draw each profile's size between --rows and this many articles.",
+    ),
+    latency: float = typer.Option(
+        0.0, "--latency", min=0, help="Milliseconds every response is delayed by."
+    ),
+    jitter: float = typer.Option(
+        0.0,
+        "--jitter",
+        min=0,
+        help="Extra random delay of up to this many milliseconds.",
+    ),
+    error_rate: float = typer.Option(
+        0.0,
+        "--error-rate",
+        min=0,
+        max=1,
+        help="Fraction of requests answered with HTTP 500.",
+    ),
+    block_rate: float = typer.Option(
+        0.0,
+        "--block-rate",
+        min=0,
+        max=1,
+        help="Fraction of requests answered with a CAPTCHA page or HTTP 429.",
+    ),
+    seed: int = typer.Option(0, "--seed", help="Seed of the generated content."),
+):
+    """Serve a mock Google Scholar until interrupted."""
+    scholar = MockScholar(
+        rows, max_rows, latency / 1000, jitter / 1000, error_rate, block_rate, seed=seed
+    )
+    server, base_url = start_server(scholar, host, port)
+    typer.echo(f"Mock Scholar listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        typer.echo(f"Served: {json.dumps(scholar.stats)}")
+
+
+if __name__ == "__main__":
+    typer.run(main)
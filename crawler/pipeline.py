@@ -0,0 +1,592 @@
+import asyncio
+import contextvars
+import functools
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from crawler import soupr
+from .cache import article_id
+from .logger import logger
+from .metrics import current_scholar, metrics
+
+# Maximum number of items waiting between two stages
+DEFAULT_QUEUE_SIZE = 100
+
+# Number of fetched histograms kept to share between co-authors' profiles
+SHARED_ARTICLES = 100_000
+
+
+class OutputError(Exception):
+    """`on_rows` failed, so the crawl stops instead of fetching unwritten pages."""
+
+
+def build_row(scholar_id, article, citation_counts, target_years):
+    """
+    Build the output row for a single article.
+
+    Args:
+        scholar_id: Google Scholar ID of the author
+        article: Article dictionary with title, url, and year
+        citation_counts: Year -> count mapping, or None if the page failed to load
+        target_years: List of years for which to extract citation data
+
+    Returns:
+        list: [scholar_id, title, pub_year, citation_year1, citation_year2, ...]
+    """
+    row_data = [scholar_id, article["title"], article["year"]]
+
+    if citation_counts is None:
+        # Add -1 for each target year if article page couldn't be loaded
+        row_data.extend([-1] * len(target_years))
+    else:
+        row_data.extend(citation_counts.get(year, -1) for year in target_years)
+
+    return row_data
+
+
+class CrawlPipeline:
+    """
+    asyncio crawl pipeline made of three stages connected by bounded queues.
+
+    1. Profile workers load each scholar's profile and push the matching
+       articles onto the article queue as soon as a profile chunk is parsed.
+    2. Article workers fetch article pages (blocking fetcher calls run in a
+       thread pool) and push the raw HTML onto the parse queue.
+    3. A parse worker extracts the citation counts and files the row.
+
+    Pacing is left to the fetcher's rate limiter, so the stages only ever
+    wait on the politeness limit rather than on fixed sleeps. Rows are
+    handed to `on_rows` in input order as soon as every row before them is
+    done, so output can be streamed while later articles are still being
+    crawled.
+
+    Articles the profile table lists as uncited are never fetched: their
+    page has no citation graph. When a CitationCache is given, article
+    workers consult it before fetching a page (passing the profile's
+    citation total, so only articles that gained citations are refetched)
+    and the parse worker stores every freshly parsed histogram in it. When
+    a CheckpointJournal is given, scholars and articles it already holds
+    are not crawled again, and every finished article and scholar is
+    appended to it.
+
+    Co-authored articles show up on several profiles of a batch. Articles
+    are indexed by their Scholar cluster id, so each one is fetched once
+    and its histogram is shared by every scholar row that lists it, also
+    while that fetch is still in flight.
+
+    Every stage is timed into the `crawler.metrics` registry, attributed to
+    the scholar being processed.
+
+    Args:
+        fetcher: Fetch backend used for every request
+        years: List of years to extract citations for
+        on_rows: Callback(rows) receiving the output rows in input order
+        queue_size: Capacity of the queues between stages
+        on_scholar: Optional callback(scholar_id, rows) called as each
+            scholar completes, in input order
+        cache: Optional CitationCache of article citation histograms
+        journal: Optional CheckpointJournal of the run
+        on_failure: Optional callback(scholar_id) called instead of
+            `on_scholar` for scholars whose profile could not be loaded
+        on_progress: Optional callback() called whenever a profile page is
+            read or an article row is finished, whatever scholar it is for
+    """
+
+    def __init__(
+        self,
+        fetcher,
+        years,
+        on_rows,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        on_scholar=None,
+        cache=None,
+        journal=None,
+        on_failure=None,
+        on_progress=None,
+    ):
+        self.fetcher = fetcher
+        self.years = years
+        self.on_rows = on_rows
+        self.queue_size = queue_size
+        self.on_scholar = on_scholar
+        self.cache = cache
+        self.journal = journal
+        self.on_failure = on_failure
+        self.on_progress = on_progress
+
+    async def run(self, scholar_ids):
+        """
+        Crawl every scholar in `scholar_ids`.
+
+        Returns:
+            int: Number of rows handed to `on_rows`
+
+        Raises:
+            OutputError: If `on_rows` raised; the crawl stops right away
+        """
+        self._scholar_ids = list(scholar_ids)
+        self._results = {}
+        self._next_emit = 0
+        self._row_count = 0
+        self._uncited = 0
+        self._output_error = None
+        self._output_failed = asyncio.Event()
+
+        # Cluster id -> histogram of articles fetched in this batch, and
+        # cluster id -> jobs waiting for a fetch that is still in flight
+        self._shared = OrderedDict()
+        self._waiting = {}
+        self._deduplicated = 0
+
+        num_workers = max(1, self.fetcher.workers)
+        self._executor = ThreadPoolExecutor(max_workers=2 * num_workers)
+
+        scholar_queue = asyncio.Queue()
+        for scholar_idx, scholar_id in enumerate(self._scholar_ids):
+            rows = None
+            if self.journal is not None:
+                rows = self.journal.scholar_rows(scholar_id)
+
+            if rows is not None:
+                # Already completed in a previous run
+                self._results[scholar_idx] = {
+                    "expected": len(rows),
+                    "rows": dict(enumerate(rows)),
+                    "emitted": 0,
+                    "journaled": True,
+                }
+                continue
+
+            self._results[scholar_idx] = {
+                "expected": None,
+                "rows": {},
+                "emitted": 0,
+                "queued": 0,
+                "started": None,
+            }
+            scholar_queue.put_nowait((scholar_idx, scholar_id))
+
+        skipped = len(self._scholar_ids) - scholar_queue.qsize()
+        if skipped:
+            logger.info(f"Skipping {skipped} scholar(s) already in the journal")
+        self._flush()
+
+        article_queue = asyncio.Queue(maxsize=self.queue_size)
+        parse_queue = asyncio.Queue(maxsize=self.queue_size)
+
+        profile_tasks = [
+            asyncio.create_task(self._profile_worker(scholar_queue, article_queue))
+            for _ in range(min(num_workers, scholar_queue.qsize()))
+        ]
+        article_tasks = [
+            asyncio.create_task(self._article_worker(article_queue, parse_queue))
+            for _ in range(num_workers)
+        ]
+        parse_task = asyncio.create_task(self._parse_worker(parse_queue))
+
+        stages = asyncio.create_task(
+            self._drain(profile_tasks, article_queue, parse_queue)
+        )
+        output_failed = asyncio.create_task(self._output_failed.wait())
+        try:
+            # Whichever comes first: every stage is done, or the output failed
+            await asyncio.wait(
+                [stages, output_failed], return_when=asyncio.FIRST_COMPLETED
+            )
+            if self._output_error is not None:
+                raise self._output_error
+            await stages
+        finally:
+            tasks = profile_tasks + article_tasks + [parse_task, stages, output_failed]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+        if self._uncited:
+            logger.info(f"Skipped the pages of {self._uncited} uncited article(s)")
+        if self._deduplicated:
+            logger.info(
+                f"Saved {self._deduplicated} article fetch(es) by sharing "
+                "co-authored articles between scholars"
+            )
+        return self._row_count
+
+    async def _drain(self, profile_tasks, article_queue, parse_queue):
+        """Wait until every profile is read and every queued job is done."""
+        await asyncio.gather(*profile_tasks)
+        await article_queue.join()
+        await parse_queue.join()
+
+    async def _in_thread(self, func, *args, stage=None):
+        """Run a blocking call in the thread pool, timing it as `stage`."""
+        if stage is not None:
+            func = metrics.timed(stage)(func)
+        # run_in_executor doesn't carry context variables over, so copy them
+        # to keep spans inside the call attributed to the current scholar
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(context.run, func, *args)
+        )
+
+    async def _profile_worker(self, scholar_queue, article_queue):
+        while True:
+            try:
+                scholar_idx, scholar_id = scholar_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            logger.info(
+                f"Processing scholar ID {scholar_idx + 1}/{len(self._scholar_ids)}: {scholar_id}"
+            )
+            current_scholar.set(scholar_id)
+            result = self._results[scholar_idx]
+            result["started"] = time.perf_counter()
+
+            count = None
+            try:
+                count = await self._crawl_profile(
+                    scholar_idx, scholar_id, article_queue
+                )
+            except Exception as e:
+                logger.error(f"Error processing scholar ID {scholar_id}: {str(e)}")
+
+            if count is None:
+                logger.warning(f"Could not retrieve page for scholar ID: {scholar_id}")
+                result["failed"] = True
+
+            # A profile that failed halfway still waits for the articles it
+            # already queued
+            try:
+                self._set_expected(scholar_idx, result["queued"])
+            except OutputError:
+                raise
+            except Exception as e:
+                logger.error(f"Error finishing scholar ID {scholar_id}: {str(e)}")
+
+    async def _crawl_profile(self, scholar_idx, scholar_id, article_queue):
+        """Push the scholar's matching articles and return how many there were."""
+        count = None
+        # Profiles are listed newest first, so the fetcher can stop expanding
+        # the list once it gets older than the first requested year
+        min_year = min(int(year) for year in self.years)
+        pages = self.fetcher.iter_profile(scholar_id, min_year)
+
+        try:
+            while True:
+                page_source = await self._in_thread(
+                    next, pages, None, stage="profile_fetch"
+                )
+                if page_source is None:
+                    break
+                self._progress()
+
+                articles = await self._in_thread(
+                    soupr.parse_profile,
+                    page_source,
+                    self.years,
+                    self.fetcher.base_url,
+                    stage="profile_parse",
+                )
+                count = count or 0
+                for article in articles:
+                    await article_queue.put((scholar_idx, scholar_id, count, article))
+                    count += 1
+                    self._results[scholar_idx]["queued"] = count
+        finally:
+            try:
+                pages.close()
+            except ValueError:
+                # The crawl was cancelled while a thread was still inside the
+                # generator; closing it must not turn the cancellation into
+                # an error that keeps this worker going
+                pass
+
+        if count is not None:
+            logger.info(
+                f"Found {count} articles for scholar {scholar_id} in year(s) {self.years}"
+            )
+        return count
+
+    async def _article_worker(self, article_queue, parse_queue):
+        # A failing job must neither kill the worker nor skip task_done,
+        # or the queue's join() would never return
+        while True:
+            job = await article_queue.get()
+            try:
+                await self._handle_article(job, parse_queue)
+            except OutputError:
+                raise
+            except Exception as e:
+                logger.error(f"Error filing article {job[3].get('title')}: {str(e)}")
+            finally:
+                article_queue.task_done()
+
+    async def _handle_article(self, job, parse_queue):
+        scholar_idx, scholar_id, article_idx, article = job
+        current_scholar.set(scholar_id)
+        try:
+            logger.info(f"Extracting citation data for article: {article['title']}")
+
+            citation_counts = self._known_counts(scholar_id, article)
+            if citation_counts is not None:
+                self._add_row(
+                    scholar_idx,
+                    article_idx,
+                    build_row(scholar_id, article, citation_counts, self.years),
+                )
+                return
+
+            if self._share(job):
+                return
+
+            page_source = await self._in_thread(
+                self.fetcher.fetch_article, article["url"], stage="article_fetch"
+            )
+            await parse_queue.put((job, page_source))
+        except OutputError:
+            raise
+        except Exception as e:
+            logger.error(f"Error extracting citation data: {str(e)}")
+            self._add_row(
+                scholar_idx,
+                article_idx,
+                build_row(scholar_id, article, None, self.years),
+            )
+            self._resolve_shared(article, None)
+
+    async def _parse_worker(self, parse_queue):
+        while True:
+            job, page_source = await parse_queue.get()
+            try:
+                await self._handle_parse(job, page_source)
+            except OutputError:
+                raise
+            except Exception as e:
+                logger.error(f"Error filing article {job[3].get('title')}: {str(e)}")
+            finally:
+                parse_queue.task_done()
+
+    async def _handle_parse(self, job, page_source):
+        scholar_idx, scholar_id, article_idx, article = job
+        current_scholar.set(scholar_id)
+        citation_counts = None
+        try:
+            if page_source is not None:
+                citation_counts = await self._in_thread(
+                    soupr.parse_article, page_source, stage="article_parse"
+                )
+                self._store_counts(scholar_id, article, citation_counts)
+        except Exception as e:
+            logger.error(f"Error parsing citation data: {str(e)}")
+        finally:
+            self._add_row(
+                scholar_idx,
+                article_idx,
+                build_row(scholar_id, article, citation_counts, self.years),
+            )
+            self._resolve_shared(article, citation_counts)
+
+    def _known_counts(self, scholar_id, article):
+        """Return counts known without a fetch (journal, cache), or None."""
+        if article.get("citations") == 0:
+            # Listed as uncited (an unreadable total is None, not 0): same
+            # result as parsing the page, which has no citation graph
+            self._uncited += 1
+            return {}
+
+        if self.journal is not None:
+            citation_counts = self.journal.article_counts(scholar_id, article["url"])
+            if citation_counts is not None:
+                return citation_counts
+
+        if self.cache is None:
+            return None
+        key = article_id(article["url"])
+        citation_counts = None
+        if key:
+            citation_counts = self.cache.get(key, article.get("citations"))
+        if citation_counts is not None and self.journal is not None:
+            self.journal.record_article(scholar_id, article["url"], citation_counts)
+        return citation_counts
+
+    def _share(self, job):
+        """
+        Serve an article another scholar's row already fetched (or is fetching).
+
+        Returns:
+            bool: True if the job was handled, False if it must be fetched
+        """
+        scholar_idx, scholar_id, article_idx, article = job
+        key = article.get("cluster_id")
+        if key is None:
+            return False
+
+        if key in self._shared:
+            citation_counts = self._shared[key]
+            self._shared.move_to_end(key)
+            self._deduplicated += 1
+            self._store_counts(scholar_id, article, citation_counts)
+            self._add_row(
+                scholar_idx,
+                article_idx,
+                build_row(scholar_id, article, citation_counts, self.years),
+            )
+            return True
+
+        if key in self._waiting:
+            self._deduplicated += 1
+            self._waiting[key].append(job)
+            return True
+
+        # This job fetches the article for everyone who lists it
+        self._waiting[key] = []
+        return False
+
+    def _resolve_shared(self, article, citation_counts):
+        """Hand a fetched histogram to the jobs waiting for the same article."""
+        key = article.get("cluster_id")
+        if key is None or key not in self._waiting:
+            return
+
+        if citation_counts is not None:
+            self._shared[key] = citation_counts
+            if len(self._shared) > SHARED_ARTICLES:
+                self._shared.popitem(last=False)
+
+        for scholar_idx, scholar_id, article_idx, waiting in self._waiting.pop(key):
+            if citation_counts is not None:
+                self._store_counts(scholar_id, waiting, citation_counts)
+            self._add_row(
+                scholar_idx,
+                article_idx,
+                build_row(scholar_id, waiting, citation_counts, self.years),
+            )
+
+    def _store_counts(self, scholar_id, article, citation_counts):
+        if self.journal is not None:
+            self.journal.record_article(scholar_id, article["url"], citation_counts)
+
+        if self.cache is None:
+            return
+        key = article_id(article["url"])
+        if key:
+            self.cache.put(key, citation_counts, article.get("citations"))
+
+    def _set_expected(self, scholar_idx, count):
+        self._results[scholar_idx]["expected"] = count
+        self._flush()
+
+    def _add_row(self, scholar_idx, article_idx, row):
+        self._results[scholar_idx]["rows"][article_idx] = row
+        self._progress()
+        self._flush()
+
+    def _progress(self):
+        if self.on_progress is None:
+            return
+        try:
+            self.on_progress()
+        except Exception as e:
+            logger.error(f"Error reporting progress: {str(e)}")
+
+    def _flush(self):
+        """Emit the rows that are next in input order and finish complete scholars."""
+        if self._output_error is not None:
+            return
+        while self._next_emit in self._results:
+            result = self._results[self._next_emit]
+
+            # Stream the contiguous run of finished rows of the head scholar
+            start = result["emitted"]
+            end = start
+            while end in result["rows"]:
+                end += 1
+            if end > start:
+                try:
+                    self.on_rows([result["rows"][idx] for idx in range(start, end)])
+                except Exception as e:
+                    # Nothing would be written anymore: abort the whole crawl
+                    self._output_error = OutputError(f"Could not write rows: {e}")
+                    self._output_failed.set()
+                    raise self._output_error from e
+                self._row_count += end - start
+                result["emitted"] = end
+
+            if result["expected"] is None or end < result["expected"]:
+                return
+
+            scholar_id = self._scholar_ids[self._next_emit]
+            rows = [result["rows"][idx] for idx in range(result["expected"])]
+            # Move on before the callbacks, so one that raises can't make
+            # the scholar finish twice
+            del self._results[self._next_emit]
+            self._next_emit += 1
+
+            failed = result.get("failed")
+            # Failed scholars stay out of the journal, so --resume retries them
+            if self.journal is not None and not failed and not result.get("journaled"):
+                self.journal.record_scholar(scholar_id, rows)
+            if failed and self.on_failure is not None:
+                self.on_failure(scholar_id)
+            elif self.on_scholar is not None:
+                self.on_scholar(scholar_id, rows)
+            if result.get("started") is not None:
+                metrics.observe(
+                    "scholar_total", time.perf_counter() - result["started"], scholar_id
+                )
+
+
+def crawl(
+    scholar_ids,
+    years,
+    fetcher,
+    on_rows=None,
+    queue_size=DEFAULT_QUEUE_SIZE,
+    on_scholar=None,
+    cache=None,
+    journal=None,
+    on_failure=None,
+    on_progress=None,
+):
+    """
+    Run the crawl pipeline to completion.
+
+    Args:
+        scholar_ids: List of Google Scholar IDs
+        years: List of years to extract citations for
+        fetcher: Fetch backend used for every request
+        on_rows: Optional callback(rows) streaming the rows in input order;
+            when omitted the rows are collected and returned
+        queue_size: Capacity of the queues between stages
+        on_scholar: Optional callback(scholar_id, rows) per completed scholar
+        cache: Optional CitationCache consulted before fetching article pages
+        journal: Optional CheckpointJournal recording finished work
+        on_failure: Optional callback(scholar_id) per scholar whose profile
+            could not be loaded (instead of `on_scholar`)
+        on_progress: Optional callback() per profile page read and per
+            finished article row
+
+    Returns:
+        list: Rows of all scholars in input order, or an empty list if they
+            were streamed to `on_rows`
+
+    Raises:
+        OutputError: If `on_rows` raised; the crawl stops right away
+    """
+    rows = []
+    pipeline = CrawlPipeline(
+        fetcher,
+        years,
+        on_rows or rows.extend,
+        queue_size,
+        on_scholar,
+        cache,
+        journal,
+        on_failure,
+        on_progress,
+    )
+    asyncio.run(pipeline.run(scholar_ids))
+    return rows
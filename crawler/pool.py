@@ -0,0 +1,210 @@
+import threading
+from contextlib import contextmanager
+
+from .logger import logger
+from .metrics import metrics
+
+
+class DriverPool:
+    """
+    A fixed-size pool of webdriver instances shared between worker threads.
+
+    Drivers are created lazily (so a pool of 8 that only ever serves one
+    worker launches one browser) and handed out one per worker; a worker
+    that asks for a driver while all of them are busy blocks until one is
+    returned. Once the pool is closed, `acquire` raises instead.
+
+    Drivers stay warm for the whole run, but a driver that has served
+    `max_uses` pages, or whose memory (as reported by `memory_probe`) grew
+    by more than `max_memory_growth` bytes since its first use, is quit on
+    release and replaced by a fresh one on the next acquire.
+
+    Args:
+        factory: Callable that creates a new webdriver instance
+        size: Maximum number of drivers the pool may hold
+        max_uses: Recycle a driver after this many borrows (None for never)
+        max_memory_growth: Recycle a driver once its memory grew by this
+            many bytes (None for never)
+        memory_probe: Callable(driver) returning the driver's memory use in
+            bytes, or None if unknown
+    """
+
+    def __init__(
+        self,
+        factory,
+        size: int = 1,
+        max_uses: int = None,
+        max_memory_growth: int = None,
+        memory_probe=None,
+    ):
+        if size < 1:
+            raise ValueError("DriverPool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_growth = max_memory_growth
+        self.memory_probe = memory_probe
+        # Idle drivers, most recently used last; guarded by _available,
+        # which also wakes workers waiting for a driver
+        self._idle = []
+        self._drivers = []
+        self._creating = 0
+        self._uses = {}
+        self._baseline_memory = {}
+        self._available = threading.Condition()
+        self._closed = False
+
+        # Lifecycle counters, reported when the pool is closed
+        self.started = 0
+        self.stopped = 0
+        self.recycled = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def acquire(self):
+        """
+        Take a driver out of the pool, creating one if the pool isn't full.
+
+        Raises:
+            RuntimeError: If the pool is (or gets) closed
+        """
+        with self._available:
+            # Every driver is busy, wait for one to come back or be recycled
+            while (
+                not self._closed
+                and not self._idle
+                and len(self._drivers) + self._creating >= self.size
+            ):
+                self._available.wait()
+            if self._closed:
+                raise RuntimeError("DriverPool is closed")
+            if self._idle:
+                return self._idle.pop()
+            self._creating += 1
+
+        return self._create()
+
+    def _create(self):
+        """Start a driver for a slot reserved by incrementing `_creating`."""
+        try:
+            driver = self.factory()
+        except BaseException:
+            with self._available:
+                self._creating -= 1
+                self._available.notify()
+            raise
+
+        with self._available:
+            self._creating -= 1
+            self.started += 1
+            closed = self._closed
+            if not closed:
+                self._drivers.append(driver)
+                self._uses[id(driver)] = 0
+        if closed:
+            # close() ran while the browser was starting, nothing would quit it
+            self._quit(driver)
+            raise RuntimeError("DriverPool is closed")
+        return driver
+
+    def warm(self):
+        """Start drivers until the pool is full, so the first pages don't wait."""
+        while True:
+            with self._available:
+                if self._closed or len(self._drivers) + self._creating >= self.size:
+                    return
+                self._creating += 1
+            driver = self._create()
+            with self._available:
+                self._idle.append(driver)
+                self._available.notify()
+
+    def release(self, driver):
+        """Return a driver to the pool, or quit it if it is due for recycling."""
+        with self._available:
+            if driver not in self._drivers:
+                # Already quit by close()
+                return
+            self._uses[id(driver)] += 1
+            uses = self._uses[id(driver)]
+        # Outside the lock, probing the memory of a browser can take a while
+        reason = self._recycle_reason(driver, uses)
+
+        with self._available:
+            if driver not in self._drivers:
+                return
+            if reason is None:
+                self._idle.append(driver)
+                self._available.notify()
+                return
+            self._drivers.remove(driver)
+            self._uses.pop(id(driver), None)
+            self._baseline_memory.pop(id(driver), None)
+            self.recycled += 1
+            # The slot is free again, let a waiting worker start the replacement
+            self._available.notify()
+
+        logger.info(f"Recycling WebDriver after {reason}")
+        self._quit(driver)
+
+    def _recycle_reason(self, driver, uses):
+        """Return why the driver should be replaced, or None to keep it."""
+        if self.max_uses is not None and uses >= self.max_uses:
+            return f"{uses} pages"
+
+        if self.max_memory_growth is None or self.memory_probe is None:
+            return None
+        try:
+            memory = self.memory_probe(driver)
+        except Exception as e:
+            logger.warning(f"Could not read WebDriver memory use: {str(e)}")
+            return None
+        if memory is None:
+            return None
+
+        baseline = self._baseline_memory.setdefault(id(driver), memory)
+        if memory - baseline > self.max_memory_growth:
+            return f"memory grew by {(memory - baseline) / 2**20:.0f} MiB"
+        return None
+
+    def _quit(self, driver):
+        try:
+            with metrics.span("driver_teardown"):
+                driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing WebDriver: {str(e)}")
+        finally:
+            self.stopped += 1
+
+    @contextmanager
+    def driver(self):
+        """Context manager that borrows a driver for the duration of the block."""
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every driver created by the pool and refuse to hand out more."""
+        with self._available:
+            self._closed = True
+            drivers, self._drivers = self._drivers, []
+            self._idle.clear()
+            self._uses.clear()
+            self._baseline_memory.clear()
+            # Waiting workers would otherwise block forever
+            self._available.notify_all()
+
+        for driver in drivers:
+            self._quit(driver)
+
+        if self.started:
+            logger.info(
+                f"WebDriver lifecycle: {self.started} started, {self.stopped} quit "
+                f"({self.recycled} recycled)"
+            )
@@ -0,0 +1,98 @@
+import threading
+import time
+import urllib.parse
+
+from .metrics import metrics
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `burst`; every
+    request takes one token and blocks until one is available.
+
+    Args:
+        rate: Sustained number of requests per second
+        burst: Maximum number of requests that may go out back to back
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            # Tokens may go negative: later callers queue up behind this one
+            return -self._tokens / self.rate
+
+    def set_rate(self, rate: float):
+        """Change the refill rate, keeping the tokens accrued so far."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+
+    def acquire(self):
+        """Block until a token is available."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+            metrics.observe("rate_limit_wait", delay)
+
+
+class HostRateLimiter:
+    """
+    One TokenBucket per host, shared by every outbound request of a run.
+
+    Args:
+        rate: Requests per second allowed per host
+        burst: Burst size allowed per host
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+    def set_rate(self, rate: float):
+        """Change the rate of every host, current and future."""
+        with self._lock:
+            self.rate = rate
+            buckets = list(self._buckets.values())
+        for bucket in buckets:
+            bucket.set_rate(rate)
+
+    def acquire(self, url: str):
+        """Block until a request to `url`'s host is allowed."""
+        host = urllib.parse.urlparse(url).netloc
+        self.bucket(host).acquire()
+
+    def request(self, url: str, func, *args, **kwargs):
+        """Wait for `url`'s host, then call `func(*args, **kwargs)`."""
+        self.acquire(url)
+        return func(*args, **kwargs)
@@ -0,0 +1,179 @@
+import numpy as np
+
+# Initial number of articles a ResultStore has room for; it doubles when full
+INITIAL_CAPACITY = 1024
+
+
+class ArticleRecord:
+    """One article of a scholar, without a per-instance __dict__."""
+
+    __slots__ = ("scholar_id", "title", "year")
+
+    def __init__(self, scholar_id: str, title: str, year: str):
+        self.scholar_id = scholar_id
+        self.title = title
+        self.year = year
+
+    def __repr__(self):
+        return f"ArticleRecord({self.scholar_id!r}, {self.title!r}, {self.year!r})"
+
+
+class ResultStore:
+    """
+    Compact columnar store of a run's results.
+
+    The scholar x article x year citation cube is kept in ragged form: every
+    article belongs to exactly one scholar, so it is stored as an articles x
+    years int32 matrix plus an int32 vector mapping each article to its
+    scholar, instead of a dense cube that would be almost entirely empty.
+    Missing counts are stored as -1, like in the output rows.
+
+    Aggregations are computed with NumPy over the whole store at once, so
+    answering "how many articles does X have in year Y to Z" needs no
+    per-row Python loop.
+
+    Args:
+        years: List of years the run extracts citations for
+    """
+
+    def __init__(self, years: list[str]):
+        self.years = list(years)
+        self.scholar_ids = []
+        self._scholar_index = {}
+        self.articles = []
+
+        self._size = 0
+        self._scholar = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._pub_year = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._counts = np.full((INITIAL_CAPACITY, len(self.years)), -1, dtype=np.int32)
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed: int):
+        capacity = len(self._scholar)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        extra = capacity - len(self._scholar)
+        self._scholar = np.concatenate([self._scholar, np.zeros(extra, np.int32)])
+        self._pub_year = np.concatenate([self._pub_year, np.zeros(extra, np.int32)])
+        self._counts = np.concatenate(
+            [self._counts, np.full((extra, len(self.years)), -1, np.int32)]
+        )
+
+    def _scholar_idx(self, scholar_id: str) -> int:
+        idx = self._scholar_index.get(scholar_id)
+        if idx is None:
+            idx = self._scholar_index[scholar_id] = len(self.scholar_ids)
+            self.scholar_ids.append(scholar_id)
+        return idx
+
+    def add_rows(self, rows: list[list]):
+        """
+        Add output rows ([scholar_id, title, pub_year, count1, count2, ...]).
+
+        Can be passed to the crawler as (part of) its `on_rows` callback.
+        """
+        if not rows:
+            return
+
+        start = self._size
+        self._grow(start + len(rows))
+        end = start + len(rows)
+
+        self._counts[start:end] = [row[3:] for row in rows]
+        self._scholar[start:end] = [self._scholar_idx(row[0]) for row in rows]
+        self._pub_year[start:end] = [
+            int(row[2]) if str(row[2]).isdigit() else 0 for row in rows
+        ]
+        self.articles.extend(ArticleRecord(row[0], row[1], row[2]) for row in rows)
+        self._size = end
+
+    def add_scholar(self, scholar_id: str):
+        """Register a scholar, so it shows up in the summary even without rows."""
+        self._scholar_idx(scholar_id)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """The articles x years citation matrix (-1 where unknown)."""
+        return self._counts[: self._size]
+
+    @property
+    def scholar_of_article(self) -> np.ndarray:
+        """Index into `scholar_ids` of every article."""
+        return self._scholar[: self._size]
+
+    def publications_per_year(self) -> np.ndarray:
+        """Return a scholars x years matrix of articles published in each year."""
+        out = np.zeros((len(self.scholar_ids), len(self.years)), dtype=np.int64)
+        year_idx = self._pub_year[: self._size] - int(self.years[0])
+        in_range = (year_idx >= 0) & (year_idx < len(self.years))
+        np.add.at(out, (self.scholar_of_article[in_range], year_idx[in_range]), 1)
+        return out
+
+    def citations_per_year(self) -> np.ndarray:
+        """Return a scholars x years matrix of citations received in each year."""
+        out = np.zeros((len(self.scholar_ids), len(self.years)), dtype=np.int64)
+        np.add.at(out, self.scholar_of_article, np.clip(self.counts, 0, None))
+        return out
+
+    def h_index(self) -> np.ndarray:
+        """
+        Return every scholar's h-index over the citations received in the range.
+
+        Articles are sorted by scholar and, within a scholar, by descending
+        citations; a scholar's h-index is then the number of its articles
+        whose citations are at least their 1-based rank.
+        """
+        num_scholars = len(self.scholar_ids)
+        if not self._size:
+            return np.zeros(num_scholars, dtype=np.int64)
+
+        citations = np.clip(self.counts, 0, None).sum(axis=1)
+        scholars = self.scholar_of_article
+        order = np.lexsort((-citations, scholars))
+        sorted_scholars = scholars[order]
+
+        # Rank of each article within its scholar, starting at 1
+        starts = np.searchsorted(sorted_scholars, sorted_scholars, side="left")
+        rank = np.arange(self._size) - starts + 1
+
+        qualifies = citations[order] >= rank
+        return np.bincount(sorted_scholars[qualifies], minlength=num_scholars).astype(
+            np.int64
+        )
+
+    def summary_headers(self) -> list[str]:
+        return (
+            ["scholar_id", "articles"]
+            + [f"articles_{year}" for year in self.years]
+            + ["citations"]
+            + [f"citations_{year}" for year in self.years]
+            + ["h_index"]
+        )
+
+    def summary(self) -> list[list]:
+        """
+        Return one summary row per scholar, in the order they were added.
+
+        Columns: scholar_id, articles published in the range, articles per
+        year, citations received in the range, citations per year, h-index.
+        """
+        publications = self.publications_per_year()
+        citations = self.citations_per_year()
+        table = np.column_stack(
+            [
+                publications.sum(axis=1),
+                publications,
+                citations.sum(axis=1),
+                citations,
+                self.h_index(),
+            ]
+        )
+        return [
+            [scholar_id] + values
+            for scholar_id, values in zip(self.scholar_ids, table.tolist())
+        ]
@@ -0,0 +1,302 @@
+import csv
+import io
+import json
+import queue
+import threading
+import time
+import urllib.parse
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import build_headers, year_extract
+from .logger import logger
+from .metrics import metrics
+from .pipeline import crawl
+from .summary import summarize, summary_headers
+
+# Number of jobs (and their results) kept in memory; the oldest finished
+# ones are dropped first
+MAX_JOBS = 1000
+
+# Statuses a job goes through
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """A crawl requested through the API, with its result once finished."""
+
+    def __init__(self, scholar_ids: list[str], years: list[str], summary_only: bool):
+        self.id = uuid.uuid4().hex
+        self.scholar_ids = scholar_ids
+        self.years = years
+        self.summary_only = summary_only
+        self.status = QUEUED
+        self.error = None
+        self.headers = None
+        self.rows = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def key(self):
+        """Jobs with the same key produce the same result."""
+        return (tuple(self.scholar_ids), tuple(self.years), self.summary_only)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "scholar_ids": self.scholar_ids,
+            "years": self.years,
+            "summary_only": self.summary_only,
+            "error": self.error,
+            "rows": None if self.rows is None else len(self.rows),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class CrawlService:
+    """
+    Run crawl jobs one after the other on a fetcher that stays warm.
+
+    The fetcher (and its browser pool) is created once by the caller and
+    reused by every job, so a job only pays for the pages it loads. A job
+    identical to one that finished less than `result_ttl` seconds ago, or
+    to one still queued or running, is answered with that job instead of
+    crawling again.
+
+    Args:
+        fetcher: Fetch backend used by every job
+        cache: Optional CitationCache shared by every job
+        result_ttl: Seconds a finished job's result is reused
+        max_jobs: Number of jobs kept in memory
+    """
+
+    def __init__(
+        self,
+        fetcher,
+        cache=None,
+        result_ttl: float = 3600,
+        max_jobs: int = MAX_JOBS,
+    ):
+        self.fetcher = fetcher
+        self.cache = cache
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Warm the fetcher up and start running jobs."""
+        self.fetcher.warm_up()
+        self._thread.start()
+
+    def stop(self):
+        """Let the running job finish and stop; queued jobs are failed."""
+        self._stopping.set()
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, scholar_ids: list[str], year: str, summary_only: bool = False):
+        """
+        Queue a job, unless an identical one can answer it.
+
+        Returns:
+            tuple: (job, created), created being False for a reused job
+        """
+        job = Job(list(scholar_ids), year_extract(year), summary_only)
+        with self._lock:
+            for existing in reversed(self._jobs.values()):
+                if existing.key != job.key or existing.status == FAILED:
+                    continue
+                if (
+                    existing.status != DONE
+                    or time.time() - existing.finished_at < self.result_ttl
+                ):
+                    return existing, False
+
+            self._jobs[job.id] = job
+            self._evict()
+
+        self._queue.put(job)
+        logger.info(
+            f"Queued job {job.id} for {len(job.scholar_ids)} scholar(s) "
+            f"in year(s) {job.years}"
+        )
+        return job, True
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond `max_jobs`."""
+        finished = [
+            job_id for job_id, job in self._jobs.items() if job.status in (DONE, FAILED)
+        ]
+        for job_id in finished[: max(0, len(self._jobs) - self.max_jobs)]:
+            del self._jobs[job_id]
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if self._stopping.is_set():
+                job.status = FAILED
+                job.error = "service stopped"
+                continue
+            self._execute(job)
+
+    def _execute(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        logger.info(f"Running job {job.id}")
+
+        try:
+            rows = []
+            if job.summary_only:
+                summarize(
+                    job.scholar_ids,
+                    job.years,
+                    self.fetcher,
+                    rows.extend,
+                    self.fetcher.workers,
+                )
+                job.headers = summary_headers(job.years)
+            else:
+                crawl(
+                    job.scholar_ids,
+                    job.years,
+                    self.fetcher,
+                    on_rows=rows.extend,
+                    cache=self.cache,
+                )
+                job.headers = build_headers(job.years)
+            job.rows = rows
+            job.status = DONE
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+
+        job.finished_at = time.time()
+        metrics.observe("service_job", job.finished_at - job.started_at)
+        logger.info(
+            f"Job {job.id} {job.status} in {job.finished_at - job.started_at:.1f}s"
+        )
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """
+    JSON API of a CrawlService.
+
+    POST /jobs               {"scholar_ids": [...], "year": "2020:2025",
+                              "summary_only": false} -> the job
+    GET  /jobs               every job kept in memory
+    GET  /jobs/<id>          status of a job
+    GET  /jobs/<id>/result   headers and rows of a finished job
+                             (?format=csv for a CSV download)
+    GET  /health             liveness check
+    GET  /metrics            per-stage timings in Prometheus text format
+    """
+
+    service: CrawlService = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status: int, body, content_type="application/json"):
+        if content_type == "application/json":
+            body = json.dumps(body)
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, message: str):
+        self._send(status, {"error": message})
+
+    def do_POST(self):
+        if urllib.parse.urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._error(404, "not found")
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            scholar_ids = request.get("scholar_ids") or [request["scholar_id"]]
+            if not isinstance(scholar_ids, list) or not all(
+                isinstance(scholar_id, str) for scholar_id in scholar_ids
+            ):
+                raise ValueError("scholar IDs must be a list of strings")
+            year = str(request.get("year") or time.localtime().tm_year)
+            job, created = self.service.submit(
+                scholar_ids, year, bool(request.get("summary_only"))
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return self._error(400, f"invalid job: {str(e)}")
+
+        self._send(202 if created else 200, job.to_dict())
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"]:
+            return self._send(200, {"status": "ok", "jobs": len(self.service.jobs())})
+        if parts == ["metrics"]:
+            return self._send(200, metrics.to_prometheus(), "text/plain")
+        if parts == ["jobs"]:
+            return self._send(200, [job.to_dict() for job in self.service.jobs()])
+        if len(parts) not in (2, 3) or parts[0] != "jobs":
+            return self._error(404, "not found")
+
+        job = self.service.get(parts[1])
+        if job is None:
+            return self._error(404, f"unknown job {parts[1]}")
+        if len(parts) == 2:
+            return self._send(200, job.to_dict())
+        if parts[2] != "result":
+            return self._error(404, "not found")
+        if job.status != DONE:
+            return self._error(409, f"job is {job.status}")
+
+        query = urllib.parse.parse_qs(url.query)
+        if query.get("format") == ["csv"]:
+            output = io.StringIO()
+            writer = csv.writer(output)
+            writer.writerow(job.headers)
+            writer.writerows(job.rows)
+            return self._send(200, output.getvalue(), "text/csv")
+        self._send(200, {"headers": job.headers, "rows": job.rows})
+
+
+def serve(service: CrawlService, host: str = "127.0.0.1", port: int = 8765):
+    """Serve the API of `service` until interrupted."""
+    handler = type("Handler", (ServiceHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    service.start()
+    logger.info(f"Serving the crawl API on http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down")
+    finally:
+        server.server_close()
+        service.stop()
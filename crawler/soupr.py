@@ -1,4 +1,82 @@
-from bs4 import BeautifulSoup
+import functools
+import importlib.util
+import urllib.parse
+
+# BeautifulSoup and selectolax are imported by the functions that use them:
+# with selectolax installed bs4 is never needed, and either one would slow
+# down the CLI's startup
+
+# Parser backends, fastest first. "html.parser" is the pure-Python fallback
+# and builds the full tree exactly like the original implementation.
+PARSERS = ["selectolax", "lxml", "html.parser"]
+
+# Scholar host every fetcher talks to and relative article URLs resolve
+# against. Profile and article requests must share it, since the rate
+# limiter and the throttle keep their budgets per host.
+SCHOLAR_URL = "https://scholar.google.com"
+
+
+@functools.cache
+def strainer(kind):
+    """
+    Return the SoupStrainer limiting a "profile", "histogram" or "article"
+    tree to what is read.
+    """
+    from bs4 import SoupStrainer
+
+    if kind == "profile":
+        return SoupStrainer(
+            "tr",
+            class_=lambda value: value is not None and "gsc_a_tr" in value.split(),
+        )
+    if kind == "histogram":
+        return SoupStrainer(class_="gsc_md_hist_b")
+    return SoupStrainer(id="gsc_oci_graph_bars")
+
+
+def available_parsers():
+    """Return the parser backends that can be used in this environment."""
+    modules = {"selectolax": "selectolax", "lxml": "lxml", "html.parser": None}
+    return [
+        name
+        for name in PARSERS
+        if modules[name] is None or importlib.util.find_spec(modules[name])
+    ]
+
+
+PARSER = available_parsers()[0]
+
+
+def set_parser(name):
+    """Select the parser backend used by parse_profile and parse_article."""
+    global PARSER
+    if name not in available_parsers():
+        raise ValueError(
+            f"Parser '{name}' is not available, "
+            f"choose one of: {', '.join(available_parsers())}"
+        )
+    PARSER = name
+
+
+def make_soup(page_source, parse_only=None, parser=None):
+    """
+    Build a BeautifulSoup tree with the selected backend.
+
+    Args:
+        page_source: HTML to parse
+        parse_only: Optional SoupStrainer restricting the tree that is built
+            (ignored by the "html.parser" fallback, which builds everything)
+        parser: "lxml" or "html.parser" (defaults to the selected backend)
+
+    Returns:
+        BeautifulSoup object
+    """
+    from bs4 import BeautifulSoup
+
+    parser = parser or PARSER
+    if parser == "html.parser":
+        return BeautifulSoup(page_source, "html.parser")
+    return BeautifulSoup(page_source, "lxml", parse_only=parse_only)
 
 
 def open_html(html_file_path):
@@ -8,16 +86,60 @@ def open_html(html_file_path):
     return html_content
 
 
-def get_articles(soup, years):
+def parse_citation_total(text):
+    """
+    Parse the "Cited by" cell of a profile row.
+
+    Returns:
+        int: The total, 0 for the empty cell of an uncited article, or None
+            if the cell is missing (`text` is None) or can't be read
+    """
+    if text is None:
+        return None
+    if not text.strip():
+        return 0
+    digits = "".join(char for char in text if char.isdigit())
+    return int(digits) if digits else None
+
+
+def parse_cluster_id(href):
+    """
+    Return the cluster id from a "Cited by" link (its `cites` parameter).
+
+    Unlike `citation_for_view`, which is scoped to one profile, the cluster
+    id is the same on every co-author's profile. Merged versions list
+    several ids; they are sorted so the key doesn't depend on their order.
+    """
+    if not href:
+        return None
+    values = urllib.parse.parse_qs(urllib.parse.urlparse(href).query).get("cites")
+    if not values:
+        return None
+    return ",".join(sorted(values[0].split(",")))
+
+
+def parse_z_index(style):
+    """Return the z-index from an inline style attribute, or None."""
+    for declaration in style.split(";"):
+        name, _, value = declaration.partition(":")
+        if name.strip() == "z-index" and value.strip().isdigit():
+            return int(value.strip())
+    return None
+
+
+def get_articles(soup, years, base_url=SCHOLAR_URL):
     """
     Extract paper titles and URLs from Google Scholar page for specific years.
 
     Args:
         html_path (str): Path to the HTML file
         years (list): List of years to filter by (e.g., ["2022", "2023"])
+        base_url (str): Host prepended to relative article URLs
 
     Returns:
-        list: List of dictionaries containing title, URL, and year for each matching article
+        list: List of dictionaries containing title, URL, year, total
+            citation count and cluster id (both from the "Cited by" column)
+            for each matching article
     """
     articles = []
 
@@ -50,8 +172,316 @@ def get_articles(soup, years):
                 if url:
                     # For Google Scholar, URLs are relative, so we need to add the base URL
                     if not url.startswith("http"):
-                        url = "https://scholar.google.co.id" + url
+                        url = base_url + url
+
+                    citations_element = row.find("td", class_="gsc_a_c")
+                    citations = parse_citation_total(
+                        citations_element.text if citations_element else None
+                    )
+                    cited_by = row.find("a", class_="gsc_a_ac")
 
-                    articles.append({"title": title, "url": url, "year": year})
+                    articles.append(
+                        {
+                            "title": title,
+                            "url": url,
+                            "year": year,
+                            "citations": citations,
+                            "cluster_id": parse_cluster_id(
+                                cited_by.get("href") if cited_by else None
+                            ),
+                        }
+                    )
 
     return articles
+
+
+def extract_citation_counts(article_soup):
+    """
+    Extract citation counts per year from an article page.
+
+    Args:
+        article_soup: BeautifulSoup object of the article page
+
+    Returns:
+        dict: Dictionary mapping years to citation counts
+    """
+    citation_data = {}
+
+    # Find the citation graph
+    citation_bars = article_soup.select("#gsc_oci_graph_bars .gsc_oci_g_a")
+
+    # If no citation graph is found, return empty dict
+    if not citation_bars:
+        return citation_data
+
+    # Extract year and citation count from each bar
+    for bar in citation_bars:
+        year = None
+        count = None
+
+        # Extract year from the href attribute (as_ylo and as_yhi parameters)
+        href = bar.get("href", "")
+        year_match = href.find("as_ylo=")
+        if year_match != -1:
+            year = href[year_match + 7 : year_match + 11]
+
+        # Extract count from the span element
+        count_elem = bar.select_one(".gsc_oci_g_al")
+        if count_elem:
+            count = count_elem.text.strip()
+
+        if year and count:
+            citation_data[year] = int(count)
+
+    return citation_data
+
+
+def get_citation_histogram(soup):
+    """
+    Extract the author's citations per year from a profile page.
+
+    The profile's bar chart labels every year (`.gsc_g_t`) but only draws a
+    bar (`.gsc_g_a`) for years with citations; a bar's z-index counts the
+    years from the right, so z-index 1 belongs to the last label.
+
+    Args:
+        soup: BeautifulSoup object of the profile page
+
+    Returns:
+        dict: Year -> citations received by all of the author's articles, or
+            None if the page has no citation chart
+    """
+    chart = soup.find(class_="gsc_md_hist_b")
+    if chart is None:
+        return None
+
+    years = [label.text.strip() for label in chart.find_all(class_="gsc_g_t")]
+    citation_data = {year: 0 for year in years}
+
+    for bar in chart.find_all("a", class_="gsc_g_a"):
+        position = parse_z_index(bar.get("style", ""))
+        count_elem = bar.find(class_="gsc_g_al")
+        if position and position <= len(years) and count_elem:
+            citation_data[years[-position]] = int(count_elem.text.strip())
+
+    return citation_data
+
+
+def get_articles_selectolax(page_source, years, base_url=SCHOLAR_URL):
+    """selectolax version of get_articles, working on raw HTML."""
+    from selectolax.lexbor import LexborHTMLParser
+
+    articles = []
+    tree = LexborHTMLParser(page_source)
+
+    for row in tree.css("tr.gsc_a_tr"):
+        year_element = row.css_first("td.gsc_a_y")
+        if year_element is None:
+            continue
+
+        year_span = year_element.css_first("span.gsc_a_h")
+        if year_span is None:
+            continue
+
+        year = year_span.text().strip()
+        if year not in years:
+            continue
+
+        title_column = row.css_first("td.gsc_a_t")
+        if title_column is None:
+            continue
+
+        title_element = title_column.css_first("a.gsc_a_at")
+        if title_element is not None:
+            url = title_element.attributes.get("href")
+            if url:
+                if not url.startswith("http"):
+                    url = base_url + url
+                title = title_element.text().strip()
+                citations_element = row.css_first("td.gsc_a_c")
+                citations = parse_citation_total(
+                    citations_element.text() if citations_element is not None else None
+                )
+                cited_by = row.css_first("a.gsc_a_ac")
+                articles.append(
+                    {
+                        "title": title,
+                        "url": url,
+                        "year": year,
+                        "citations": citations,
+                        "cluster_id": parse_cluster_id(
+                            cited_by.attributes.get("href")
+                            if cited_by is not None
+                            else None
+                        ),
+                    }
+                )
+
+    return articles
+
+
+def extract_citation_counts_selectolax(page_source):
+    """selectolax version of extract_citation_counts, working on raw HTML."""
+    from selectolax.lexbor import LexborHTMLParser
+
+    citation_data = {}
+    tree = LexborHTMLParser(page_source)
+
+    for bar in tree.css("#gsc_oci_graph_bars .gsc_oci_g_a"):
+        year = None
+        count = None
+
+        href = bar.attributes.get("href") or ""
+        year_match = href.find("as_ylo=")
+        if year_match != -1:
+            year = href[year_match + 7 : year_match + 11]
+
+        count_elem = bar.css_first(".gsc_oci_g_al")
+        if count_elem is not None:
+            count = count_elem.text().strip()
+
+        if year and count:
+            citation_data[year] = int(count)
+
+    return citation_data
+
+
+def get_citation_histogram_selectolax(page_source):
+    """selectolax version of get_citation_histogram, working on raw HTML."""
+    from selectolax.lexbor import LexborHTMLParser
+
+    chart = LexborHTMLParser(page_source).css_first(".gsc_md_hist_b")
+    if chart is None:
+        return None
+
+    years = [label.text().strip() for label in chart.css(".gsc_g_t")]
+    citation_data = {year: 0 for year in years}
+
+    for bar in chart.css("a.gsc_g_a"):
+        position = parse_z_index(bar.attributes.get("style") or "")
+        count_elem = bar.css_first(".gsc_g_al")
+        if position and position <= len(years) and count_elem is not None:
+            citation_data[years[-position]] = int(count_elem.text().strip())
+
+    return citation_data
+
+
+def get_articles_extracted(rows, years, base_url=SCHOLAR_URL):
+    """
+    Version of get_articles for row fields extracted inside the browser.
+
+    Args:
+        rows: [title, href, year, "Cited by" text, "Cited by" href] per
+            `tr.gsc_a_tr` row, with raw text contents and None for missing
+            elements (see browser.PROFILE_FIELDS_SCRIPT)
+        years: List of years to filter by
+        base_url: Host prepended to relative article URLs
+    """
+    articles = []
+
+    for title, url, year, citations, cited_by in rows:
+        if year is None:
+            continue
+
+        year = year.strip()
+        if year not in years or title is None or not url:
+            continue
+
+        if not url.startswith("http"):
+            url = base_url + url
+        articles.append(
+            {
+                "title": title.strip(),
+                "url": url,
+                "year": year,
+                "citations": parse_citation_total(citations),
+                "cluster_id": parse_cluster_id(cited_by),
+            }
+        )
+
+    return articles
+
+
+def get_citation_histogram_extracted(chart):
+    """
+    Version of get_citation_histogram for the chart extracted inside the browser.
+
+    Args:
+        chart: [year labels, [style, count text] per bar], or None if the
+            page has no chart (see browser.PROFILE_FIELDS_SCRIPT)
+    """
+    if chart is None:
+        return None
+
+    labels, bars = chart
+    years = [label.strip() for label in labels]
+    citation_data = {year: 0 for year in years}
+
+    for style, count in bars:
+        position = parse_z_index(style or "")
+        if position and position <= len(years) and count is not None:
+            citation_data[years[-position]] = int(count.strip())
+
+    return citation_data
+
+
+def extract_citation_counts_extracted(bars):
+    """
+    Version of extract_citation_counts for the graph extracted inside the browser.
+
+    Args:
+        bars: [href, count text] per `.gsc_oci_g_a` bar, with None for a
+            missing count (see browser.ARTICLE_FIELDS_SCRIPT)
+    """
+    citation_data = {}
+
+    for href, count in bars:
+        year = None
+        href = href or ""
+        year_match = href.find("as_ylo=")
+        if year_match != -1:
+            year = href[year_match + 7 : year_match + 11]
+
+        if count is not None:
+            count = count.strip()
+
+        if year and count:
+            citation_data[year] = int(count)
+
+    return citation_data
+
+
+def parse_profile(page_source, years, base_url=SCHOLAR_URL, parser=None):
+    """
+    Parse a profile page (or a chunk of one) and return its matching articles.
+
+    `page_source` may also be the fields a SeleniumFetcher extracted inside
+    the browser, which need no HTML parsing.
+    """
+    if isinstance(page_source, dict):
+        return get_articles_extracted(page_source["rows"], years, base_url)
+    parser = parser or PARSER
+    if parser == "selectolax":
+        return get_articles_selectolax(page_source, years, base_url)
+    soup = make_soup(page_source, strainer("profile"), parser)
+    return get_articles(soup, years, base_url)
+
+
+def parse_article(page_source, parser=None):
+    """Parse an article page (or its extracted fields) into citations per year."""
+    if isinstance(page_source, dict):
+        return extract_citation_counts_extracted(page_source["bars"])
+    parser = parser or PARSER
+    if parser == "selectolax":
+        return extract_citation_counts_selectolax(page_source)
+    return extract_citation_counts(make_soup(page_source, strainer("article"), parser))
+
+
+def parse_citation_histogram(page_source, parser=None):
+    """Parse the author's citations per year from a profile page (None if absent)."""
+    if isinstance(page_source, dict):
+        return get_citation_histogram_extracted(page_source["chart"])
+    parser = parser or PARSER
+    if parser == "selectolax":
+        return get_citation_histogram_selectolax(page_source)
+    return get_citation_histogram(make_soup(page_source, strainer("histogram"), parser))
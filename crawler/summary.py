@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from crawler import soupr
+from .logger import logger
+from .metrics import current_scholar, metrics
+
+
+def summary_headers(years: list[str]) -> list[str]:
+    """Return the column names of a profile summary for a year range."""
+    return (
+        ["scholar_id", "articles"]
+        + [f"articles_{year}" for year in years]
+        + ["citations"]
+        + [f"citations_{year}" for year in years]
+    )
+
+
+def summarize_profile(fetcher, scholar_id: str, years: list[str]) -> list:
+    """
+    Build a scholar's summary row from their profile page alone.
+
+    Publications per year are counted from the profile's article table and
+    citations per year are read from the profile's citation chart, so no
+    article page is loaded. The chart covers citations to all of the
+    scholar's articles, not only to the ones published in `years`.
+
+    Args:
+        fetcher: Fetch backend used to load the profile
+        scholar_id: Google Scholar ID of the author
+        years: List of years to summarize
+
+    Returns:
+        list: [scholar_id, articles, articles per year..., citations,
+            citations per year...], with -1 everywhere if the profile
+            could not be loaded completely
+    """
+    current_scholar.set(scholar_id)
+    publications = dict.fromkeys(years, 0)
+    histogram = None
+    loaded = False
+
+    # Profiles are listed newest first, so the fetcher can stop expanding
+    # the list once it gets older than the first requested year
+    pages = fetcher.iter_profile(scholar_id, min(int(year) for year in years))
+    try:
+        while True:
+            with metrics.span("profile_fetch"):
+                page_source = next(pages, None)
+            if page_source is None:
+                break
+            loaded = True
+
+            with metrics.span("profile_parse"):
+                # Only the first page of a paged profile carries the chart
+                if histogram is None:
+                    histogram = soupr.parse_citation_histogram(page_source)
+                for article in soupr.parse_profile(
+                    page_source, years, fetcher.base_url
+                ):
+                    publications[article["year"]] += 1
+    except Exception as e:
+        # A profile that broke off halfway would undercount its articles
+        logger.error(f"Error processing scholar ID {scholar_id}: {str(e)}")
+        loaded = False
+    finally:
+        pages.close()
+
+    if not loaded:
+        logger.warning(f"Could not retrieve page for scholar ID: {scholar_id}")
+        return [scholar_id] + [-1] * (2 * len(years) + 2)
+
+    # Profiles of scholars who were never cited have no chart at all
+    citations = [(histogram or {}).get(year, 0) for year in years]
+    logger.info(
+        f"Summarized scholar {scholar_id}: {sum(publications.values())} articles "
+        f"and {sum(citations)} citations in year(s) {years}"
+    )
+    return (
+        [scholar_id, sum(publications.values())]
+        + list(publications.values())
+        + [sum(citations)]
+        + citations
+    )
+
+
+def summarize(scholar_ids: list[str], years: list[str], fetcher, on_rows, workers=1):
+    """
+    Summarize every scholar from their profile page, one request per scholar.
+
+    Args:
+        scholar_ids: List of Google Scholar IDs
+        years: List of years to summarize
+        fetcher: Fetch backend used for every request
+        on_rows: Callback(rows) receiving each summary row, in input order
+        workers: Number of profiles loaded concurrently
+
+    Returns:
+        int: Number of rows handed to `on_rows`
+    """
+    count = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        rows = executor.map(
+            lambda scholar_id: summarize_profile(fetcher, scholar_id, years),
+            scholar_ids,
+        )
+        for row in rows:
+            on_rows([row])
+            count += 1
+    return count
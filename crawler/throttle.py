@@ -0,0 +1,260 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from .logger import logger
+from .metrics import metrics
+
+# Text that only shows up on Scholar's CAPTCHA / "unusual traffic" pages
+BLOCK_MARKERS = (
+    'id="gs_captcha_f"',
+    "gs_captcha_ccl",
+    "g-recaptcha",
+    "unusual traffic from your computer network",
+    "Please show you're not a robot",
+    "/sorry/index",
+)
+
+
+class BlockedError(Exception):
+    """Scholar answered with a block page (CAPTCHA, unusual traffic, 429)."""
+
+
+def is_block_page(page_source: str) -> bool:
+    """Return True if the HTML is one of Scholar's block pages."""
+    if not page_source:
+        return False
+    return any(marker in page_source for marker in BLOCK_MARKERS)
+
+
+def backoff_delay(attempt: int, base: float = 2.0, cap: float = 300.0) -> float:
+    """
+    Return how long to wait before retry number `attempt` (starting at 0).
+
+    Exponential backoff with full jitter: a uniform draw between zero and
+    base * 2**attempt (capped), so retrying workers don't move in lockstep.
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease control of rate and concurrency.
+
+    Healthy responses raise the request rate by `increase` requests per
+    second for every second they keep coming (up to `max_rate`) and the
+    concurrency by one per window of `concurrency` successes; every block
+    signal multiplies both by `decrease`. The rate is applied to the
+    HostRateLimiter, the concurrency to Throttle's gate.
+
+    Args:
+        limiter: HostRateLimiter whose rate is adjusted
+        max_rate: Upper bound of the request rate per host
+        max_concurrency: Upper bound of concurrent requests
+        min_rate: Lower bound of the request rate per host
+        increase: Requests per second added per second of healthy responses
+        decrease: Factor applied on a block signal
+    """
+
+    def __init__(
+        self,
+        limiter,
+        max_rate: float,
+        max_concurrency: int,
+        min_rate: float = 0.05,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+    ):
+        self.limiter = limiter
+        self.max_rate = max(max_rate, limiter.rate)
+        self.min_rate = min(min_rate, limiter.rate)
+        self.max_concurrency = max(1, max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.rate = limiter.rate
+        self.concurrency = float(self.max_concurrency)
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """Number of requests currently allowed in flight."""
+        return max(1, int(self.concurrency))
+
+    def on_success(self):
+        with self._lock:
+            # At `rate` responses per second this adds `increase` per second
+            old_rate = self.rate
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+            self.concurrency = min(
+                self.max_concurrency, self.concurrency + 1 / self.concurrency
+            )
+            rate = self.rate
+        if rate != old_rate:
+            self.limiter.set_rate(rate)
+
+    def on_block(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.concurrency = max(1.0, self.concurrency * self.decrease)
+            rate = self.rate
+        self.limiter.set_rate(rate)
+        logger.warning(
+            f"Block signal: cutting the rate to {rate:.2f} request(s)/s per host "
+            f"and concurrency to {self.limit}"
+        )
+
+
+class CircuitBreaker:
+    """
+    Pause every request after `threshold` block signals in a row.
+
+    While open, requests wait out a cooldown instead of failing, so the run
+    pauses rather than burning through the ID list. Afterwards requests
+    resume at the rate the AIMD controller has cut down to; a healthy
+    response resets the cooldown, while another run of blocks reopens the
+    breaker with the cooldown doubled (up to `max_cooldown`).
+
+    Args:
+        threshold: Consecutive block signals that open the breaker
+        cooldown: Seconds of the first pause
+        max_cooldown: Longest pause in seconds
+    """
+
+    def __init__(
+        self,
+        threshold: int = 5,
+        cooldown: float = 60.0,
+        max_cooldown: float = 1800.0,
+    ):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.trips = 0
+        self._consecutive = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block while the breaker is open."""
+        with self._lock:
+            delay = self._open_until - time.monotonic()
+        if delay > 0:
+            with metrics.span("circuit_open"):
+                time.sleep(delay)
+
+    def on_success(self):
+        with self._lock:
+            self._consecutive = 0
+            self.cooldown = self.base_cooldown
+
+    def on_block(self):
+        with self._lock:
+            self._consecutive += 1
+            if self._consecutive < self.threshold:
+                return
+            self._consecutive = 0
+            self.trips += 1
+            self._open_until = time.monotonic() + self.cooldown
+            cooldown = self.cooldown
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+
+        logger.warning(
+            f"{self.threshold} block signals in a row: pausing requests for "
+            f"{cooldown:.0f}s"
+        )
+
+
+class Throttle:
+    """
+    Politeness and resilience layer every fetcher request goes through.
+
+    Combines the per-host rate limit with a concurrency gate, retries of
+    blocked requests with exponential backoff and jitter, an AIMD
+    controller adjusting rate and concurrency to the block signals, and a
+    circuit breaker pausing the run when Scholar keeps refusing.
+
+    Args:
+        limiter: HostRateLimiter pacing the requests
+        max_rate: Highest rate per host the controller may probe up to
+        max_concurrency: Highest number of requests in flight
+        retries: Retries of a blocked request before giving up on it
+        breaker: Optional CircuitBreaker (a default one is created)
+    """
+
+    def __init__(
+        self,
+        limiter,
+        max_rate: float = None,
+        max_concurrency: int = 1,
+        retries: int = 3,
+        breaker: CircuitBreaker = None,
+    ):
+        self.limiter = limiter
+        self.controller = AIMDController(
+            limiter, max_rate or limiter.rate, max_concurrency
+        )
+        self.breaker = breaker or CircuitBreaker()
+        self.retries = retries
+        self.blocks = 0
+        self.retried = 0
+        self._active = 0
+        self._gate = threading.Condition()
+
+    @contextmanager
+    def _slot(self):
+        """Hold one of the controller's concurrency slots."""
+        with self._gate:
+            self._gate.wait_for(lambda: self._active < self.controller.limit)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._gate:
+                self._active -= 1
+                self._gate.notify_all()
+
+    def request(self, url: str, func, *args, **kwargs):
+        """
+        Call `func(*args, **kwargs)`, a request to `url`, under the throttle.
+
+        Raises:
+            BlockedError: If the request was still blocked after every retry
+        """
+        for attempt in range(self.retries + 1):
+            self.breaker.wait()
+            with self._slot():
+                self.limiter.acquire(url)
+                try:
+                    result = func(*args, **kwargs)
+                except BlockedError as e:
+                    self.blocks += 1
+                    self.controller.on_block()
+                    self.breaker.on_block()
+                    if attempt == self.retries:
+                        raise
+                    error = e
+                else:
+                    self.controller.on_success()
+                    self.breaker.on_success()
+                    return result
+
+            self.retried += 1
+            delay = backoff_delay(attempt)
+            logger.warning(
+                f"Blocked on {url} ({error}), retry {attempt + 1}/{self.retries} "
+                f"in {delay:.1f}s"
+            )
+            with metrics.span("backoff"):
+                time.sleep(delay)
+
+    def log_stats(self):
+        """Log the block signals seen and where the controller ended up."""
+        if not self.blocks:
+            return
+        logger.info(
+            f"Throttle: {self.blocks} block signal(s), {self.retried} retries, "
+            f"{self.breaker.trips} pause(s); final rate {self.controller.rate:.2f} "
+            f"request(s)/s, concurrency {self.controller.limit}"
+        )
@@ -0,0 +1,308 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .logger import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scholars (
+    position INTEGER PRIMARY KEY,
+    scholar_id TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    rows TEXT,
+    error TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS scholars_status ON scholars (status, position);
+"""
+
+# Statuses a scholar goes through
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+def default_owner() -> str:
+    """Return a name identifying this worker process across hosts."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of scholars shared by any number of worker processes.
+
+    Workers claim scholars with a lease that expires after `lease_seconds`;
+    a scholar whose lease runs out (its worker died or hung) or whose
+    profile failed to load goes back to the queue, until it has been tried
+    `max_attempts` times. Finished scholars keep their rows in the queue
+    file, so a final merge can write the combined output in input order.
+
+    Several hosts can share the file as long as their filesystem supports
+    SQLite's file locking (local disks and most SMB/NFSv4 mounts do).
+
+    Args:
+        path: Path of the SQLite database file
+        years: List of years the run extracts citations for
+        lease_seconds: How long a claim is valid without being renewed
+        max_attempts: Number of times a scholar is tried before it is failed
+    """
+
+    def __init__(
+        self,
+        path: str,
+        years: list[str],
+        lease_seconds: float = 900,
+        max_attempts: int = 3,
+    ):
+        self.path = path
+        self.years = list(years)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Autocommit mode: transactions are opened explicitly where needed
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self._conn.executescript(SCHEMA)
+
+        with self._transaction():
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'years'"
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('years', ?)",
+                    (json.dumps(self.years),),
+                )
+            elif json.loads(row[0]) != self.years:
+                raise ValueError(
+                    f"Queue {path} was created for year(s) {json.loads(row[0])}, "
+                    f"not {self.years}"
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed statements in one write transaction."""
+        # Take the write lock up front so concurrent claims can't interleave
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def add(self, scholar_ids: list[str]) -> int:
+        """
+        Add scholars to the queue, ignoring the ones it already holds.
+
+        Returns:
+            int: Number of scholars added
+        """
+        with self._transaction():
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO scholars (scholar_id, updated_at) VALUES (?, ?)",
+                [(scholar_id, time.time()) for scholar_id in scholar_ids],
+            )
+            added = self._conn.total_changes - before
+
+        logger.info(f"Queued {added} new scholar(s) in {self.path}")
+        return added
+
+    def claim(self, owner: str, limit: int = 1) -> list[str]:
+        """
+        Lease up to `limit` scholars to `owner`, in queue order.
+
+        Pending scholars are handed out first, then scholars whose lease
+        expired.
+
+        Returns:
+            list: The claimed scholar IDs (empty once nothing is left)
+        """
+        now = time.time()
+        with self._transaction():
+            # Expired leases that used up their attempts are failed for good
+            self._conn.execute(
+                "UPDATE scholars SET status = ?, lease_owner = NULL, "
+                "error = 'lease expired', updated_at = ? "
+                "WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts),
+            )
+            rows = self._conn.execute(
+                "SELECT position, scholar_id FROM scholars "
+                "WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY status = ? DESC, position LIMIT ?",
+                (PENDING, LEASED, now, PENDING, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE scholars SET status = ?, lease_owner = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE position = ?",
+                [
+                    (LEASED, owner, now + self.lease_seconds, now, position)
+                    for position, _ in rows
+                ],
+            )
+
+        return [scholar_id for _, scholar_id in rows]
+
+    def renew(self, owner: str):
+        """Extend every lease held by `owner`."""
+        now = time.time()
+        with self._transaction():
+            self._conn.execute(
+                "UPDATE scholars SET lease_expires = ?, updated_at = ? "
+                "WHERE status = ? AND lease_owner = ?",
+                (now + self.lease_seconds, now, LEASED, owner),
+            )
+
+    @contextmanager
+    def heartbeat(self, owner: str, interval: float = None):
+        """
+        Renew `owner`'s leases in the background for as long as work progresses.
+
+        A scholar with a large profile can take longer than the lease to
+        crawl; without this, another worker would claim it halfway through.
+        The block gets a `progress()` callable to call whenever the crawl
+        gets something done, and a lease is only renewed if there was
+        progress since the last renewal: a worker that hangs stops renewing
+        and loses its scholars like one that died. The renewals go through
+        a connection of their own, since the queue's connection belongs to
+        the thread that opened it.
+
+        Args:
+            owner: Worker whose leases are renewed
+            interval: Seconds between renewals (a third of the lease if None)
+
+        Yields:
+            callable: progress(), to call whenever the crawl moves forward
+        """
+        if interval is None:
+            interval = self.lease_seconds / 3
+        stop = threading.Event()
+        progressed = threading.Event()
+
+        def beat():
+            with WorkQueue(
+                self.path, self.years, self.lease_seconds, self.max_attempts
+            ) as queue:
+                while not stop.wait(interval):
+                    if not progressed.is_set():
+                        logger.warning(f"No progress by {owner}, leases not renewed")
+                        continue
+                    progressed.clear()
+                    try:
+                        queue.renew(owner)
+                    except sqlite3.Error as e:
+                        logger.warning(f"Could not renew the leases of {owner}: {e}")
+
+        thread = threading.Thread(target=beat, name="lease-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield progressed.set
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, scholar_id: str, rows: list, owner: str) -> bool:
+        """
+        Store a finished scholar's rows, if `owner` still holds its lease.
+
+        Returns:
+            bool: False if the lease was lost, e.g. to a worker that claimed
+                the scholar after it expired; the rows are then dropped
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE scholars SET status = ?, rows = ?, lease_owner = NULL, "
+                "error = NULL, updated_at = ? "
+                "WHERE scholar_id = ? AND status = ? AND lease_owner = ?",
+                (DONE, json.dumps(rows), time.time(), scholar_id, LEASED, owner),
+            )
+        return cursor.rowcount > 0
+
+    def fail(self, scholar_id: str, error: str, owner: str) -> bool:
+        """
+        Put a scholar back in the queue, or fail it once out of attempts.
+
+        Only applies while `owner` still holds the scholar's lease.
+
+        Returns:
+            bool: False if the lease was lost
+        """
+        with self._transaction():
+            cursor = self._conn.execute(
+                "UPDATE scholars SET "
+                "status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "lease_owner = NULL, error = ?, updated_at = ? "
+                "WHERE scholar_id = ? AND status = ? AND lease_owner = ?",
+                (
+                    self.max_attempts,
+                    FAILED,
+                    PENDING,
+                    error,
+                    time.time(),
+                    scholar_id,
+                    LEASED,
+                    owner,
+                ),
+            )
+        return cursor.rowcount > 0
+
+    def release(self, owner: str):
+        """Hand every scholar still leased by `owner` back to the queue."""
+        with self._transaction():
+            self._conn.execute(
+                # The interruption isn't the scholar's fault, so refund the attempt
+                "UPDATE scholars SET status = ?, lease_owner = NULL, "
+                "attempts = attempts - 1, updated_at = ? "
+                "WHERE status = ? AND lease_owner = ?",
+                (PENDING, time.time(), LEASED, owner),
+            )
+
+    def stats(self) -> dict:
+        """Return the number of scholars in each status."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for status, count in self._conn.execute(
+            "SELECT status, COUNT(*) FROM scholars GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    def failures(self):
+        """Yield (scholar_id, attempts, error) of the failed scholars."""
+        yield from self._conn.execute(
+            "SELECT scholar_id, attempts, error FROM scholars "
+            "WHERE status = ? ORDER BY position",
+            (FAILED,),
+        )
+
+    def iter_rows(self):
+        """Yield the rows of every finished scholar, in queue order."""
+        cursor = self._conn.execute(
+            "SELECT rows FROM scholars WHERE status = ? ORDER BY position", (DONE,)
+        )
+        for (rows,) in cursor:
+            yield json.loads(rows)
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,277 @@
+import csv
+import importlib.util
+import json
+import os
+
+from .logger import logger
+
+
+def ensure_extension(save_path: str, extension: str) -> str:
+    """Ensure the save path ends with `extension` (e.g. ".csv")."""
+    if not save_path.lower().endswith(extension):
+        save_path += extension
+    return save_path
+
+
+def resolve_save_path(save_path: str, extension: str, overwrite: bool = False) -> str:
+    """
+    Work out where an output file should be written.
+
+    Args:
+        save_path: Path requested by the user
+        extension: Extension the file must have (e.g. ".xlsx")
+        overwrite: Whether an existing file may be overwritten
+
+    Returns:
+        str: Final path, with its directory created
+    """
+    # Ensure the save path has the right extension
+    save_path = ensure_extension(save_path, extension)
+
+    # If save_path is just a filename without a directory, save in output folder
+    if os.path.dirname(save_path) == "":
+        save_path = os.path.join("output", save_path)
+
+    # Check if file exists and handle overwriting
+    if os.path.exists(save_path) and not overwrite:
+        # Generate a new filename with timestamp
+        from datetime import datetime
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        # Split the path to get directory and filename
+        dir_path = os.path.dirname(save_path)
+        file_name = os.path.basename(save_path)
+
+        # Split the filename to get name and extension
+        name_part, ext_part = os.path.splitext(file_name)
+
+        # Create new filename with timestamp
+        new_file_name = f"{name_part}_{timestamp}{ext_part}"
+
+        # Create new save path
+        save_path = os.path.join(dir_path, new_file_name)
+
+        logger.info(
+            f"File exists and overwrite=False. Generating new file name: {save_path}"
+        )
+
+    # Create directory if it doesn't exist
+    os.makedirs(os.path.dirname(os.path.abspath(save_path)), exist_ok=True)
+
+    return save_path
+
+
+class RowWriter:
+    """
+    Base class of the streaming output writers.
+
+    Rows are written as they arrive instead of being collected into one
+    DataFrame, so memory use does not grow with the size of the batch. The
+    file is only created once the first rows come in, so a run that
+    collects nothing leaves no empty file behind.
+
+    Args:
+        save_path: Path requested by the user
+        headers: Column names
+        overwrite: Whether an existing file may be overwritten
+    """
+
+    extension = ""
+    # Module the writer can't work without, checked before a run starts
+    requires = None
+
+    def __init__(self, save_path: str, headers: list[str], overwrite: bool = False):
+        self.requested_path = save_path
+        self.headers = list(headers)
+        self.overwrite = overwrite
+        self.path = None
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def write_rows(self, rows: list[list]):
+        """Append rows to the output file."""
+        if not rows:
+            return
+        if self.path is None:
+            path = resolve_save_path(
+                self.requested_path, self.extension, self.overwrite
+            )
+            # Only a writer that opened has anything to write or close
+            self._open(path)
+            self.path = path
+        self._write(rows)
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Flush and close the output file, if one was opened."""
+        if self.path is None:
+            return
+        self._close()
+        logger.info(f"Data saved to {self.path} ({self.rows_written} rows)")
+
+    def _open(self, path):
+        raise NotImplementedError
+
+    def _write(self, rows):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class CsvWriter(RowWriter):
+    """Append rows to a CSV file."""
+
+    extension = ".csv"
+
+    def _open(self, path):
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(self.headers)
+
+    def _write(self, rows):
+        self._csv.writerows(rows)
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonlWriter(RowWriter):
+    """Append rows to a JSON Lines file, one object per row."""
+
+    extension = ".jsonl"
+
+    def _open(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def _write(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(dict(zip(self.headers, row))) + "\n")
+        self._file.flush()
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetWriter(RowWriter):
+    """
+    Write rows to a Parquet file, one row group per `row_group_size` rows.
+
+    Requires pyarrow.
+    """
+
+    extension = ".parquet"
+    requires = "pyarrow"
+    row_group_size = 10_000
+
+    def _open(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError(
+                "Parquet output requires pyarrow (pip install pyarrow)"
+            ) from e
+
+        self._pa = pa
+        self._pq = pq
+        self._writer = None
+        self._buffer = []
+
+    def _write(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        if self._writer is None:
+            # Text columns (e.g. scholar_id, title, publication_year) are
+            # strings, everything else is a count
+            pa = self._pa
+            fields = [
+                pa.field(name, pa.string() if isinstance(value, str) else pa.int64())
+                for name, value in zip(self.headers, self._buffer[0])
+            ]
+            self._schema = self._pa.schema(fields)
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+
+        columns = list(zip(*self._buffer))
+        arrays = [
+            self._pa.array(column, type=field.type)
+            for column, field in zip(columns, self._schema)
+        ]
+        table = self._pa.Table.from_arrays(arrays, schema=self._schema)
+        self._writer.write_table(table)
+        self._buffer = []
+
+    def _close(self):
+        self._flush()
+        self._writer.close()
+
+
+class ExcelWriter(RowWriter):
+    """Write rows to an .xlsx file using openpyxl's write-only mode."""
+
+    extension = ".xlsx"
+    requires = "openpyxl"
+
+    def _open(self, path):
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet("Sheet1")
+        self._sheet.append(self.headers)
+
+    def _write(self, rows):
+        for row in rows:
+            self._sheet.append(row)
+
+    def _close(self):
+        self._workbook.save(self.path)
+
+
+WRITERS = {
+    "xlsx": ExcelWriter,
+    "csv": CsvWriter,
+    "jsonl": JsonlWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def missing_dependency(output_format: str):
+    """Return the module an output format needs but can't import, or None."""
+    module = WRITERS[output_format].requires
+    if module is None or importlib.util.find_spec(module) is not None:
+        return None
+    return module
+
+
+def open_writer(
+    output_format: str, save_path: str, headers: list[str], overwrite: bool = False
+) -> RowWriter:
+    """
+    Create the streaming writer for an output format.
+
+    Args:
+        output_format: One of WRITERS ("xlsx", "csv", "jsonl" or "parquet")
+        save_path: Path requested by the user
+        headers: Column names
+        overwrite: Whether an existing file may be overwritten
+
+    Returns:
+        RowWriter: Writer to feed rows into
+    """
+    if output_format not in WRITERS:
+        raise ValueError(
+            f"Unknown format '{output_format}', expected one of: {', '.join(WRITERS)}"
+        )
+    return WRITERS[output_format](save_path, headers, overwrite)
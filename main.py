@@ -3,7 +3,14 @@ from datetime import datetime
 import os
 from typing import Optional
 
-import crawler
+
+def read_scholar_ids(from_txt: str) -> list[str]:
+    """Read the scholar IDs of a --from-txt file, one per line, skipping blanks."""
+    if not os.path.exists(from_txt):
+        typer.echo(f"Error: File not found: {from_txt}")
+        raise typer.Exit(code=1)
+    with open(from_txt, "r") as file:
+        return [line.strip() for line in file if line.strip()]
 
 
 def main(
@@ -25,24 +32,259 @@ def main(
         "-y",
         help="Year range in YYYY format (single year) or YYYY:YYYY (range).",
     ),
-    save_path: str = typer.Option(
-        f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+    save_path: Optional[str] = typer.Option(
+        None,
         "--save-path",
         "-o",
         help="Output file path. Defaults to current date/time if not specified.",
     ),
+    output_format: str = typer.Option(
+        "xlsx",
+        "--format",
+        help="Output format: 'xlsx', 'csv', 'jsonl' or 'parquet'. Rows are written as they finish.",
+    ),
     overwrite: bool = typer.Option(
         False,
         "--overwrite",
         help="Overwrite output file if it exists.",
     ),
+    workers: int = typer.Option(
+        1,
+        "--workers",
+        "-w",
+        min=1,
+        help="Number of browser workers used to crawl article pages in parallel.",
+    ),
+    backend: str = typer.Option(
+        "selenium",
+        "--backend",
+        "-b",
+        help="Fetch backend: 'selenium' (headless Chrome) or 'http' (plain HTTP requests).",
+    ),
+    parser: Optional[str] = typer.Option(
+        None,
+        "--parser",
+        help="HTML parser: 'selectolax', 'lxml' or 'html.parser'. Defaults to the fastest installed.",
+    ),
+    extraction: str = typer.Option(
+        "html",
+        "--extract",
+        help="Selenium field extraction: 'html' (parse the page source) or 'script' (extract inside the browser).",
+    ),
+    rate: float = typer.Option(
+        1.0,
+        "--rate",
+        min=0.01,
+        help="Maximum requests per second sent to each host.",
+    ),
+    burst: int = typer.Option(
+        1,
+        "--burst",
+        min=1,
+        help="Number of requests per host that may be sent back to back.",
+    ),
+    max_rate: Optional[float] = typer.Option(
+        None,
+        "--max-rate",
+        min=0.01,
+        help="Highest requests per second per host the crawler may speed up to while Scholar answers normally. Defaults to --rate.",
+    ),
+    retries: int = typer.Option(
+        3,
+        "--retries",
+        min=0,
+        help="Times a request answered with a CAPTCHA or rate-limit page is retried, with exponential backoff.",
+    ),
+    cache_path: str = typer.Option(
+        os.path.join("output", "cache.sqlite3"),
+        "--cache",
+        help="Path of the on-disk cache of article citation histograms.",
+    ),
+    no_cache: bool = typer.Option(
+        False,
+        "--no-cache",
+        help="Always fetch article pages instead of using the cache.",
+    ),
+    cache_max_age: float = typer.Option(
+        30.0,
+        "--cache-max-age",
+        min=0,
+        help="Maximum age in days of a cached histogram before it is re-fetched, even if the article's citation total is unchanged.",
+    ),
+    cache_max_entries: int = typer.Option(
+        100_000,
+        "--cache-max-entries",
+        min=1,
+        help="Maximum number of articles kept in the cache; the oldest are evicted.",
+    ),
+    resume: bool = typer.Option(
+        False,
+        "--resume",
+        help="Resume an interrupted --from-txt run from its checkpoint journal.",
+    ),
+    journal_path: Optional[str] = typer.Option(
+        None,
+        "--journal",
+        help="Checkpoint journal path for --from-txt runs. Defaults to <save-path>.journal.jsonl.",
+    ),
+    metrics_out: Optional[str] = typer.Option(
+        None,
+        "--metrics-out",
+        help="Write per-stage timings to this file: Prometheus textfile if it ends in .prom, JSON otherwise.",
+    ),
+    summary_path: Optional[str] = typer.Option(
+        None,
+        "--summary",
+        help="Also write a per-scholar summary (articles and citations per year, h-index) to this path.",
+    ),
+    summary_only: bool = typer.Option(
+        False,
+        "--summary-only",
+        help="Only write per-year article and citation totals per scholar, read from the profile page (one request per scholar).",
+    ),
+    serve: bool = typer.Option(
+        False,
+        "--serve",
+        help="Run as a service: keep the browsers warm and accept jobs over a local HTTP/JSON API.",
+    ),
+    host: str = typer.Option(
+        "127.0.0.1",
+        "--host",
+        help="Interface the --serve API listens on.",
+    ),
+    port: int = typer.Option(
+        8765,
+        "--port",
+        min=0,
+        max=65535,
+        help="Port the --serve API listens on.",
+    ),
+    result_ttl: float = typer.Option(
+        3600,
+        "--result-ttl",
+        min=0,
+        help="Seconds a --serve job's result is returned again for an identical job.",
+    ),
+    archive_path: Optional[str] = typer.Option(
+        None,
+        "--archive",
+        help="Directory of a compressed archive every fetched page is also written to.",
+    ),
+    from_archive: Optional[str] = typer.Option(
+        None,
+        "--from-archive",
+        help="Rebuild the output by re-parsing the pages in this archive instead of crawling. Uses every archived scholar unless --scholar-id or --from-txt is given.",
+    ),
+    history_path: Optional[str] = typer.Option(
+        None,
+        "--history",
+        help="Citation history database recording each article's per-year counts at every --refresh.",
+    ),
+    refresh: bool = typer.Option(
+        False,
+        "--refresh",
+        help="Re-crawl the scholars that are due (all recorded ones unless --scholar-id or --from-txt is given), record them in --history and write only the counts that changed.",
+    ),
+    watch: bool = typer.Option(
+        False,
+        "--watch",
+        help="Keep running --refresh whenever a scholar becomes due, until interrupted.",
+    ),
+    every: float = typer.Option(
+        7.0,
+        "--every",
+        help="Days after which a scholar in --history is due for a refresh again.",
+    ),
+    diff: bool = typer.Option(
+        False,
+        "--diff",
+        help="Write the counts that changed in the latest --history snapshot, without crawling.",
+    ),
+    queue_path: Optional[str] = typer.Option(
+        None,
+        "--queue",
+        help="Shared work-queue file. Workers claim scholars from it; --from-txt adds IDs to it.",
+    ),
+    merge: bool = typer.Option(
+        False,
+        "--merge",
+        help="Write the combined output of a --queue instead of crawling.",
+    ),
+    lease: float = typer.Option(
+        900,
+        "--lease",
+        min=1,
+        help="Seconds after a worker stops renewing its claims before another may retry them.",
+    ),
+    max_attempts: int = typer.Option(
+        3,
+        "--max-attempts",
+        min=1,
+        help="Number of times a queued scholar is tried before it is marked failed.",
+    ),
 ):
     """
     Scrape publication data from a Google Scholar profile for the specified year(s). The output will be saved to a text file containing publication details.\n\n
     Sapi V.0.1.0 -- https://wwww.github.com/hippocampa\n
     """
+    # Imported here so --help doesn't pay for it
+    import crawler
+
     # Validate input parameters - either scholar_id or from_txt must be provided, but not both
-    if scholar_id is None and from_txt is None:
+    # (a queue may already hold the IDs, and a service receives them over its API)
+    if serve and (
+        scholar_id is not None
+        or from_txt is not None
+        or queue_path is not None
+        or summary_only
+        or resume
+        or save_path is not None
+        or journal_path is not None
+        or summary_path is not None
+    ):
+        typer.echo(
+            "Error: --serve cannot be used with --scholar-id, --from-txt, --queue, "
+            "--summary-only, --resume, --save-path, --journal or --summary."
+        )
+        raise typer.Exit(code=1)
+
+    if history_path is not None and not (refresh or watch or diff):
+        typer.echo("Error: --history needs one of --refresh, --watch or --diff.")
+        raise typer.Exit(code=1)
+
+    if history_path is None and (refresh or watch or diff):
+        used = "--refresh" if refresh else "--watch" if watch else "--diff"
+        typer.echo(f"Error: {used} needs --history.")
+        raise typer.Exit(code=1)
+
+    # Scholars would be due again right away, refreshing them in a tight loop
+    if every <= 0:
+        typer.echo("Error: --every must be greater than 0.")
+        raise typer.Exit(code=1)
+
+    if history_path is not None and (
+        serve
+        or summary_only
+        or from_archive is not None
+        or queue_path is not None
+        or resume
+        or refresh + watch + diff > 1
+    ):
+        typer.echo(
+            "Error: --history takes only one of --refresh, --watch or --diff, and "
+            "cannot be used with --serve, --summary-only, --from-archive, --queue "
+            "or --resume."
+        )
+        raise typer.Exit(code=1)
+
+    if (
+        scholar_id is None
+        and from_txt is None
+        and queue_path is None
+        and from_archive is None
+        and history_path is None
+        and not serve
+    ):
         typer.echo("Error: Either --scholar-id or --from-txt must be provided.")
         raise typer.Exit(code=1)
 
@@ -50,33 +292,240 @@ def main(
         typer.echo("Error: --scholar-id and --from-txt cannot be used together.")
         raise typer.Exit(code=1)
 
-    if from_txt is not None:
-        # Process multiple scholar IDs from text file
-        if not os.path.exists(from_txt):
-            typer.echo(f"Error: File not found: {from_txt}")
+    if resume and from_txt is None:
+        typer.echo("Error: --resume can only be used with --from-txt.")
+        raise typer.Exit(code=1)
+
+    # The default output path is timestamped, so it would point the resumed
+    # run at a journal that doesn't exist
+    if resume and save_path is None and journal_path is None:
+        typer.echo(
+            "Error: --resume needs the --save-path (or --journal) of the run it "
+            "continues."
+        )
+        raise typer.Exit(code=1)
+
+    if save_path is None:
+        save_path = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+
+    if merge and queue_path is None:
+        typer.echo("Error: --merge can only be used with --queue.")
+        raise typer.Exit(code=1)
+
+    if queue_path is not None and (scholar_id is not None or resume):
+        typer.echo("Error: --queue cannot be used with --scholar-id or --resume.")
+        raise typer.Exit(code=1)
+
+    if summary_only and (queue_path is not None or resume or summary_path is not None):
+        typer.echo(
+            "Error: --summary-only cannot be used with --queue, --resume or --summary."
+        )
+        raise typer.Exit(code=1)
+
+    if from_archive is not None and (
+        serve or summary_only or queue_path is not None or resume
+    ):
+        typer.echo(
+            "Error: --from-archive cannot be used with --serve, --summary-only, "
+            "--queue or --resume."
+        )
+        raise typer.Exit(code=1)
+
+    if output_format not in crawler.WRITERS:
+        typer.echo(
+            f"Error: Unknown format '{output_format}'. Choose one of: {', '.join(crawler.WRITERS)}."
+        )
+        raise typer.Exit(code=1)
+
+    missing = crawler.writers.missing_dependency(output_format)
+    if missing is not None:
+        typer.echo(
+            f"Error: --format {output_format} needs {missing} (pip install {missing})."
+        )
+        raise typer.Exit(code=1)
+
+    if parser is not None:
+        if parser not in crawler.soupr.available_parsers():
+            typer.echo(
+                f"Error: Parser '{parser}' is not available. "
+                f"Choose one of: {', '.join(crawler.soupr.available_parsers())}."
+            )
+            raise typer.Exit(code=1)
+        crawler.soupr.set_parser(parser)
+
+    if backend not in crawler.BACKENDS:
+        typer.echo(
+            f"Error: Unknown backend '{backend}'. Choose one of: {', '.join(crawler.BACKENDS)}."
+        )
+        raise typer.Exit(code=1)
+
+    if extraction not in crawler.EXTRACTIONS:
+        typer.echo(
+            f"Error: Unknown extraction '{extraction}'. Choose one of: {', '.join(crawler.EXTRACTIONS)}."
+        )
+        raise typer.Exit(code=1)
+
+    if extraction == "script" and (backend != "selenium" or archive_path is not None):
+        typer.echo(
+            "Error: --extract script needs the selenium backend and leaves no HTML "
+            "for --archive."
+        )
+        raise typer.Exit(code=1)
+    crawler.set_extraction(extraction)
+
+    scholar_ids = None
+    if scholar_id is not None:
+        scholar_ids = [scholar_id]
+    elif from_txt is not None:
+        scholar_ids = read_scholar_ids(from_txt)
+
+    if merge:
+        crawler.merge_queue(queue_path, year, save_path, overwrite, output_format)
+        return
+
+    if diff:
+        crawler.diff_history(history_path, save_path, overwrite, output_format)
+        return
+
+    if from_archive is not None:
+        if not os.path.isdir(from_archive):
+            typer.echo(f"Error: Archive not found: {from_archive}")
             raise typer.Exit(code=1)
 
-        try:
-            with open(from_txt, "r") as file:
-                scholar_ids = [line.strip() for line in file if line.strip()]
+        crawler.replay_archive(
+            from_archive,
+            scholar_ids,
+            year,
+            save_path,
+            overwrite,
+            output_format,
+            summary_path,
+        )
+        return
+
+    if archive_path is not None:
+        crawler.set_archive(archive_path)
 
+    cache = None
+    if not no_cache:
+        cache = crawler.CitationCache(
+            cache_path, cache_max_age * 24 * 60 * 60, cache_max_entries
+        )
+
+    try:
+        if serve:
+            crawler.run_service(
+                host,
+                port,
+                workers,
+                backend,
+                rate,
+                burst,
+                cache,
+                max_rate,
+                retries,
+                result_ttl,
+            )
+        elif history_path is not None:
+            run = crawler.watch_history if watch else crawler.refresh_history
+            run(
+                history_path,
+                scholar_ids,
+                year,
+                save_path,
+                overwrite,
+                every * 24 * 60 * 60,
+                workers,
+                backend,
+                rate,
+                burst,
+                cache,
+                output_format,
+                max_rate,
+                retries,
+            )
+        elif summary_only:
+            crawler.summarize_profiles(
+                scholar_ids,
+                year,
+                save_path,
+                overwrite,
+                workers,
+                backend,
+                rate,
+                burst,
+                output_format,
+                max_rate,
+                retries,
+            )
+        elif queue_path is not None:
+            crawler.work_queue(
+                queue_path,
+                year,
+                scholar_ids,
+                workers,
+                backend,
+                rate,
+                burst,
+                cache,
+                lease,
+                max_attempts,
+                max_rate,
+                retries,
+            )
+        elif from_txt is not None:
+            # Process multiple scholar IDs from text file
             if not scholar_ids:
                 typer.echo(f"Error: No scholar IDs found in {from_txt}")
                 raise typer.Exit(code=1)
 
-            crawler.extract_from_txt(
-                scholar_ids,
+            try:
+                crawler.extract_from_txt(
+                    scholar_ids,
+                    year,
+                    save_path,
+                    overwrite,
+                    workers,
+                    backend,
+                    rate,
+                    burst,
+                    cache,
+                    resume,
+                    journal_path,
+                    output_format,
+                    summary_path,
+                    max_rate,
+                    retries,
+                )
+
+            except Exception as e:
+                typer.echo(f"Error processing file {from_txt}: {str(e)}")
+                raise typer.Exit(code=1)
+        else:
+            # Process single scholar ID
+            crawler.extract(
+                scholar_id,
                 year,
                 save_path,
                 overwrite,
+                workers,
+                backend,
+                rate,
+                burst,
+                cache,
+                output_format,
+                summary_path,
+                max_rate,
+                retries,
             )
+    finally:
+        if cache is not None:
+            cache.close()
+        crawler.set_archive(None)
 
-        except Exception as e:
-            typer.echo(f"Error processing file {from_txt}: {str(e)}")
-            raise typer.Exit(code=1)
-    else:
-        # Process single scholar ID
-        crawler.extract(scholar_id, year, save_path, overwrite)
+        crawler.metrics.log_summary()
+        if metrics_out is not None:
+            crawler.metrics.export(metrics_out)
 
 
 if __name__ == "__main__":
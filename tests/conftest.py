@@ -0,0 +1,152 @@
+import threading
+import urllib.parse
+
+import pytest
+
+from crawler import fixtures
+from crawler.cache import article_id
+from crawler.ratelimit import HostRateLimiter
+from crawler.throttle import Throttle
+
+
+class FixtureFetcher:
+    """
+    In-process fetcher serving fixture pages, `page_size` profile rows per page.
+
+    Profiles in `failing` break off with a ConnectionError after their first
+    page. `fetched` counts the article pages served.
+    """
+
+    base_url = "https://scholar.example"
+
+    def __init__(self, num_rows=250, workers=1, failing=(), page_size=100):
+        self.num_rows = num_rows
+        self.workers = workers
+        self.failing = failing
+        self.page_size = page_size
+        self.limiter = Throttle(HostRateLimiter(1000.0, 100))
+        self.fetched = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def iter_profile(self, scholar_id, min_year=None):
+        for start in range(0, self.num_rows, self.page_size):
+            yield fixtures.profile_page(
+                scholar_id, self.num_rows, start=start, page_size=self.page_size
+            )
+            if scholar_id in self.failing:
+                raise ConnectionError("connection reset")
+
+    def fetch_article(self, article_url):
+        self.fetched += 1
+        return fixtures.article_page(article_id(article_url))
+
+
+class FakeDriver:
+    """Just enough of a webdriver to browse the synthetic fixture pages."""
+
+    num_rows = 300
+
+    def __init__(self):
+        self.current_url = ""
+        self.page_source = ""
+        self.scholar_id = None
+        self.loaded = 0
+        self.quit_called = False
+
+    def get(self, url):
+        self.current_url = url
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(url).query))
+        if query.get("view_op") == "view_citation":
+            self.scholar_id = None
+            self.page_source = fixtures.article_page(query["citation_for_view"])
+        else:
+            self.scholar_id = query["user"]
+            self.loaded = 20
+            self.page_source = fixtures.profile_page(
+                self.scholar_id, self.num_rows, page_size=20, more_available=True
+            )
+
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+
+        on_profile = self.scholar_id is not None
+        if value in ("gsc_prf_w", "gsc_bpf_more") and on_profile:
+            return object()
+        if value == "gsc_oci_value" and not on_profile:
+            return object()
+        raise NoSuchElementException(value)
+
+    def execute_script(self, script, *args):
+        from crawler import browser
+
+        if script == browser.EXPANSION_STATE_SCRIPT:
+            last_year = self.rows()[self.loaded - 1][1]
+            return [self.loaded, self.loaded >= self.num_rows, last_year]
+        if script == browser.NEW_ROWS_SCRIPT:
+            rows = self.rows()[args[0] : self.loaded]
+            return [self.loaded, "".join(row for row, _, _ in rows)]
+        if "click()" in script:
+            self.loaded = min(self.num_rows, self.loaded + 80)
+        return None
+
+    def rows(self):
+        return fixtures.profile_rows(self.scholar_id, self.num_rows)
+
+    def quit(self):
+        self.quit_called = True
+
+
+class InThread:
+    """
+    A call running in a daemon thread.
+
+    A deadlocked call fails the test instead of hanging the whole run.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._outcome = {}
+
+        def run():
+            try:
+                self._outcome["value"] = func(*args, **kwargs)
+            except BaseException as e:
+                self._outcome["error"] = e
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def done(self, timeout=0.1):
+        """Wait up to `timeout` seconds; return whether the call finished."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def result(self, timeout=30):
+        """Return what the call returned, re-raising what it raised."""
+        if not self.done(timeout):
+            pytest.fail(f"call did not finish within {timeout}s")
+        if "error" in self._outcome:
+            raise self._outcome["error"]
+        return self._outcome["value"]
+
+
+@pytest.fixture
+def fixture_fetcher():
+    """The FixtureFetcher class, to instantiate (or subclass) in a test."""
+    return FixtureFetcher
+
+
+@pytest.fixture
+def fake_driver():
+    """The FakeDriver class, to instantiate (or subclass) in a test."""
+    return FakeDriver
+
+
+@pytest.fixture
+def in_thread():
+    """InThread: start a call in a thread, then collect it with a timeout."""
+    return InThread
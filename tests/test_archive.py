@@ -0,0 +1,47 @@
+from crawler import archive as archive_module
+from crawler.archive import ArchivingFetcher, PageArchive
+from crawler.pipeline import crawl
+
+YEARS = [str(year) for year in range(2015, 2026)]
+
+
+def test_page_is_stored_once_and_read_back(tmp_path):
+    page = "<html><body>profile</body></html>"
+
+    with PageArchive(str(tmp_path / "pages")) as archive:
+        first = archive.put(archive_module.PROFILE, page, scholar_id="S1", chunk=0)
+        second = archive.put(archive_module.PROFILE, page, scholar_id="S1", chunk=0)
+
+        assert first == second
+        assert (archive.stored, archive.deduplicated) == (1, 1)
+        assert archive.read(first) == page
+        assert archive.scholars() == ["S1"]
+
+
+def test_replay_rebuilds_the_crawled_rows(tmp_path, fixture_fetcher):
+    directory = str(tmp_path / "pages")
+    scholar_ids = ["ARCHIVED001", "ARCHIVED002"]
+    crawled = {}
+
+    with PageArchive(directory) as archive:
+        fetcher = ArchivingFetcher(fixture_fetcher(num_rows=150), archive)
+        crawl(
+            scholar_ids,
+            YEARS,
+            fetcher,
+            on_scholar=lambda scholar_id, rows: crawled.setdefault(scholar_id, rows),
+        )
+        # Both profiles are paged, so every chunk of a capture must come back
+        assert len(archive.latest_profile("ARCHIVED001")) == 2
+
+    replayed = {}
+    count = archive_module.replay(
+        directory,
+        None,
+        YEARS,
+        lambda scholar_id, rows: replayed.setdefault(scholar_id, rows),
+    )
+
+    assert count == len(scholar_ids)
+    assert replayed == crawled
+    assert all(crawled.values())
@@ -0,0 +1,79 @@
+import urllib.parse
+
+from selenium.common.exceptions import WebDriverException
+
+from crawler import browser, fixtures, soupr
+from crawler.browser import SeleniumFetcher
+from crawler.httpfetch import HttpFetcher
+from crawler.pipeline import crawl
+
+YEARS = [str(year) for year in range(1990, 2026)]
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.requests = []
+
+    def request(self, url, func, *args, **kwargs):
+        self.requests.append(func.__name__)
+        return func(*args, **kwargs)
+
+
+def test_large_profile_with_one_worker_does_not_deadlock(
+    monkeypatch, fake_driver, in_thread
+):
+    monkeypatch.setattr(browser, "initialize_driver", lambda *args: fake_driver())
+    monkeypatch.setattr(browser, "POLL_INTERVAL", 0.001)
+    limiter = CountingLimiter()
+    fetcher = SeleniumFetcher(workers=1, limiter=limiter)
+
+    def run():
+        with fetcher:
+            return crawl(["TESTSCHOLAR1"], YEARS, fetcher, queue_size=4)
+
+    rows = in_thread(run).result()
+
+    num_rows = fake_driver.num_rows
+    assert len(rows) == num_rows
+    # Every 'Show more' click went through the limiter, like the page loads
+    assert limiter.requests.count("load_profile") == 1
+    assert limiter.requests.count("show_more") == (num_rows - 20 + 79) // 80
+
+
+def test_profile_failing_after_it_loaded_fails_the_scholar(monkeypatch, fake_driver):
+    class CrashingDriver(fake_driver):
+        """FakeDriver whose browser dies once the list has been expanded once."""
+
+        def execute_script(self, script, *args):
+            if script == browser.NEW_ROWS_SCRIPT:
+                raise WebDriverException("chrome not reachable")
+            return super().execute_script(script, *args)
+
+    monkeypatch.setattr(browser, "initialize_driver", lambda *args: CrashingDriver())
+    monkeypatch.setattr(browser, "POLL_INTERVAL", 0.001)
+    finished, failed = [], []
+
+    with SeleniumFetcher(workers=1) as fetcher:
+        crawl(
+            ["TESTSCHOLAR1"],
+            YEARS,
+            fetcher,
+            on_scholar=lambda scholar_id, rows: finished.append(scholar_id),
+            on_failure=failed.append,
+        )
+
+    assert finished == []
+    assert failed == ["TESTSCHOLAR1"]
+
+
+def test_profiles_and_articles_share_one_host(monkeypatch, fake_driver):
+    monkeypatch.setattr(browser, "initialize_driver", lambda *args: fake_driver())
+    with SeleniumFetcher(workers=1) as fetcher:
+        articles = soupr.parse_profile(
+            fixtures.profile_page("TESTSCHOLAR1", 5), YEARS, fetcher.base_url
+        )
+
+    # One host, so the rate limiter and throttle keep one budget for both
+    hosts = {urllib.parse.urlparse(article["url"]).netloc for article in articles}
+    assert hosts == {urllib.parse.urlparse(fetcher.scholar_url).netloc}
+    assert fetcher.base_url == HttpFetcher().base_url
@@ -0,0 +1,72 @@
+import pytest
+
+from crawler import cache as cache_module
+from crawler.cache import CitationCache, article_id
+
+COUNTS = {"2024": 3, "2025": 5}
+
+
+class Clock:
+    """Stand-in for the time module whose time() only moves when told to."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_article_id():
+    url = "https://scholar.example/citations?view_op=view_citation&citation_for_view=S1:abc"
+    assert article_id(url) == "S1:abc"
+    assert article_id("https://scholar.example/citations?user=S1") is None
+
+
+def test_hit_and_miss(tmp_path, clock):
+    with CitationCache(str(tmp_path / "cache.sqlite3")) as cache:
+        assert cache.get("S1:abc") is None
+        cache.put("S1:abc", COUNTS, 8)
+
+        assert cache.get("S1:abc") == COUNTS
+        assert cache.get("S1:abc", 8) == COUNTS
+        assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_changed_total_is_a_miss(tmp_path, clock):
+    with CitationCache(str(tmp_path / "cache.sqlite3")) as cache:
+        cache.put("S1:abc", COUNTS, 8)
+
+        assert cache.get("S1:abc", 9) is None
+        # An unknown total can't tell the entry is outdated
+        assert cache.get("S1:abc", None) == COUNTS
+        assert (cache.hits, cache.misses, cache.changed) == (1, 1, 1)
+
+
+def test_entries_expire_after_max_age(tmp_path, clock):
+    with CitationCache(str(tmp_path / "cache.sqlite3"), max_age=60) as cache:
+        cache.put("S1:abc", COUNTS, 8)
+
+        clock.now += 60
+        assert cache.get("S1:abc", 8) == COUNTS
+        clock.now += 1
+        assert cache.get("S1:abc", 8) is None
+
+
+def test_oldest_entries_are_evicted_on_close(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    with CitationCache(path, max_entries=2) as cache:
+        for key in ("S1:old", "S1:mid", "S1:new"):
+            cache.put(key, COUNTS)
+            clock.now += 1
+
+    with CitationCache(path) as cache:
+        assert cache.get("S1:old") is None
+        assert cache.get("S1:mid") == COUNTS
+        assert cache.get("S1:new") == COUNTS
@@ -0,0 +1,32 @@
+import pytest
+
+import crawler
+from crawler.history import CitationHistory
+
+
+def test_failed_scholars_stay_due(tmp_path, monkeypatch, fixture_fetcher):
+    history_path = str(tmp_path / "history.db")
+    fetcher = fixture_fetcher(num_rows=30, failing={"FAILING"})
+    monkeypatch.setattr(crawler, "create_fetcher", lambda *args: fetcher)
+
+    refreshed = crawler.refresh_history(
+        history_path,
+        ["FAILING", "HEALTHY"],
+        "2020:2025",
+        str(tmp_path / "diff.csv"),
+        True,
+        3600,
+        output_format="csv",
+    )
+
+    assert refreshed == 1
+    with CitationHistory(history_path) as history:
+        assert history.scholars() == ["HEALTHY"]
+        assert history.due(["FAILING", "HEALTHY"], 3600) == ["FAILING"]
+
+
+def test_watch_needs_a_positive_interval(tmp_path):
+    with pytest.raises(ValueError):
+        crawler.watch_history(
+            str(tmp_path / "history.db"), [], "2020:2025", "diff.csv", True, 0
+        )
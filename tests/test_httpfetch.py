@@ -0,0 +1,138 @@
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import fixtures, soupr
+from crawler.cache import article_id
+from crawler.httpfetch import HttpFetcher, count_article_rows, last_article_year
+from crawler.pipeline import build_row, crawl
+
+SCHOLAR_ID = "TESTSCHOLAR1"
+NUM_ROWS = 250
+YEARS = [str(year) for year in range(2015, 2026)]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serve the synthetic fixture pages the way Scholar pages them."""
+
+    queries = None
+    # `cstart` of the profile pages answered with HTTP 500
+    failing_starts = ()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        query = dict(urllib.parse.parse_qsl(urllib.parse.urlparse(self.path).query))
+        self.queries.append(query)
+        if int(query.get("cstart", -1)) in self.failing_starts:
+            self.send_error(500)
+            return
+        if query.get("view_op") == "view_citation":
+            body = fixtures.article_page(query["citation_for_view"])
+        else:
+            body = fixtures.profile_page(
+                query["user"],
+                NUM_ROWS,
+                start=int(query.get("cstart", 0)),
+                page_size=int(query.get("pagesize", 20)),
+            )
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def scholar():
+    """Start a stand-in Scholar; yields (base_url, queries it received)."""
+    queries = []
+    handler = type("Handler", (FixtureHandler,), {"queries": queries})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", queries
+    server.shutdown()
+    server.server_close()
+
+
+def profile_pages_requested(queries):
+    return [
+        (int(query["cstart"]), int(query["pagesize"]))
+        for query in queries
+        if query.get("view_op") != "view_citation"
+    ]
+
+
+def test_iter_profile_pages_through_cstart_and_pagesize(scholar):
+    base_url, queries = scholar
+    fetcher = HttpFetcher(base_url=base_url, page_size=100)
+
+    pages = list(fetcher.iter_profile(SCHOLAR_ID))
+
+    assert profile_pages_requested(queries) == [(0, 100), (100, 100), (200, 100)]
+    assert [count_article_rows(page) for page in pages] == [100, 100, 50]
+
+
+def test_iter_profile_stops_once_past_min_year(scholar):
+    base_url, queries = scholar
+    fetcher = HttpFetcher(base_url=base_url, page_size=20)
+    min_year = fixtures.profile_rows(SCHOLAR_ID, NUM_ROWS)[0][1] - 1
+
+    pages = list(fetcher.iter_profile(SCHOLAR_ID, min_year))
+
+    assert len(pages) < NUM_ROWS // 20
+    assert len(profile_pages_requested(queries)) == len(pages)
+    assert last_article_year(pages[-1]) < min_year
+    assert all(last_article_year(page) >= min_year for page in pages[:-1])
+
+
+def test_crawl_matches_the_expanded_profile_page(scholar):
+    """The paged HTTP crawl gives the rows parsed from the whole list at once."""
+    base_url, _ = scholar
+    with HttpFetcher(base_url=base_url, workers=4) as fetcher:
+        rows = crawl([SCHOLAR_ID], YEARS, fetcher)
+
+    # The selenium backend parses the profile with every row expanded
+    expected = []
+    page_source = fixtures.profile_page(SCHOLAR_ID, NUM_ROWS)
+    for article in soupr.parse_profile(page_source, YEARS, base_url):
+        counts = {}
+        if article["citations"]:
+            article_page = fixtures.article_page(article_id(article["url"]))
+            counts = soupr.parse_article(article_page)
+        expected.append(build_row(SCHOLAR_ID, article, counts, YEARS))
+
+    assert rows == expected
+    assert any(count > 0 for row in rows for count in row[3:])
+
+
+def test_failed_later_page_fails_the_scholar(scholar, monkeypatch):
+    """A profile cut short by an error isn't passed on as finished."""
+    base_url, _ = scholar
+    monkeypatch.setattr(FixtureHandler, "failing_starts", {100})
+    finished, failed = [], []
+
+    with HttpFetcher(base_url=base_url, page_size=100) as fetcher:
+        crawl(
+            [SCHOLAR_ID],
+            YEARS,
+            fetcher,
+            on_scholar=lambda scholar_id, rows: finished.append(scholar_id),
+            on_failure=failed.append,
+        )
+
+    assert finished == []
+    assert failed == [SCHOLAR_ID]
+
+
+def test_failed_first_page_means_no_profile(scholar, monkeypatch):
+    base_url, _ = scholar
+    monkeypatch.setattr(FixtureHandler, "failing_starts", {0})
+
+    pages = list(HttpFetcher(base_url=base_url).iter_profile(SCHOLAR_ID))
+
+    assert pages == []
@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from crawler.bench import HEAVY_MODULES, measure_import
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loose ceilings on the import time in seconds, several times what a cold
+# import takes, so only a real regression (a heavy import creeping back into
+# the startup path) fails on a slow or busy machine
+IMPORT_BUDGET = {"crawler": 0.4, "main": 0.8}
+
+
+def imported_modules(module):
+    """Import `module` in a fresh interpreter; return what -X importtime lists."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    )
+    # Lines look like "import time:  self [us] | cumulative | name"
+    return {
+        line.split("|")[-1].strip()
+        for line in completed.stderr.splitlines()
+        if line.startswith("import time:") and "|" in line
+    }
+
+
+@pytest.mark.parametrize("module", ["crawler", "main"])
+def test_import_leaves_heavy_modules_unloaded(module):
+    loaded = imported_modules(module)
+
+    assert module in loaded
+    heavy = sorted({name.split(".")[0] for name in loaded} & set(HEAVY_MODULES))
+    assert heavy == []
+
+
+@pytest.mark.parametrize("module", ["crawler", "main"])
+def test_import_fits_the_startup_budget(module, monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+    # The fastest of a few runs, to leave out one-off disk or CPU stalls
+    timing = measure_import(module, repeat=3)
+
+    assert timing["min_s"] < IMPORT_BUDGET[module]
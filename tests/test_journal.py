@@ -0,0 +1,22 @@
+from crawler.journal import CheckpointJournal
+
+YEARS = ["2024", "2025"]
+ROWS = [["A", "Title", "2024", 1, 2]]
+
+
+def test_resume_after_a_torn_last_line(tmp_path):
+    path = str(tmp_path / "run.journal.jsonl")
+    with CheckpointJournal(path, YEARS) as journal:
+        journal.record_scholar("A", ROWS)
+    # A crash in the middle of writing the next record
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"type": "scholar", "scholar_id": "B", "ro')
+
+    with CheckpointJournal(path, YEARS, resume=True) as journal:
+        assert journal.scholar_rows("A") == ROWS
+        assert journal.scholar_rows("B") is None
+        journal.record_scholar("C", ROWS)
+
+    with CheckpointJournal(path, YEARS, resume=True) as journal:
+        assert journal.scholar_rows("A") == ROWS
+        assert journal.scholar_rows("C") == ROWS
@@ -0,0 +1,72 @@
+import csv
+
+import pytest
+
+import crawler
+from crawler import fixtures, throttle
+from crawler.loadtest import scholar_ids
+from crawler.mockserver import MockScholar, start_server
+
+NUM_ROWS = 60
+YEARS = range(2020, 2026)
+
+
+class SometimesBlockingScholar(MockScholar):
+    """Mock Scholar that blocks every `every`-th request, instead of at random."""
+
+    def __init__(self, *args, every=50, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.every = every
+        self.requests = 0
+
+    def fault(self):
+        with self._lock:
+            self.requests += 1
+            return "block" if self.requests % self.every == 0 else None
+
+
+@pytest.fixture
+def mock_scholar(monkeypatch):
+    """Start a mock Scholar and send every crawl to it; yields the MockScholar."""
+    scholar = SometimesBlockingScholar(rows=NUM_ROWS)
+    server, base_url = start_server(scholar)
+    monkeypatch.setattr(crawler, "BASE_URL", base_url)
+    # Retry injected blocks right away
+    monkeypatch.setattr(throttle, "backoff_delay", lambda attempt: 0)
+    yield scholar
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_crawl_of_the_mock_server(mock_scholar, tmp_path):
+    ids = scholar_ids(5)
+    save_path = str(tmp_path / "citations.csv")
+
+    crawler.extract_from_txt(
+        ids,
+        f"{YEARS[0]}:{YEARS[-1]}",
+        save_path,
+        True,
+        2,
+        "http",
+        1000.0,
+        50,
+        output_format="csv",
+    )
+
+    with open(save_path, newline="", encoding="utf-8") as file:
+        header, *rows = list(csv.reader(file))
+    expected = [
+        scholar_id
+        for scholar_id in ids
+        for _, year, _ in fixtures.profile_rows(scholar_id, NUM_ROWS)
+        if year in YEARS
+    ]
+    assert [row[0] for row in rows] == expected
+    assert header[-len(YEARS) :] == [f"citations_{year}" for year in YEARS]
+    assert any(int(count or 0) > 0 for row in rows for count in row[-len(YEARS) :])
+
+    stats = mock_scholar.stats
+    assert stats["profile_pages"] >= len(ids)
+    assert stats["article_pages"] > 0
+    assert stats["blocks"] > 0
@@ -0,0 +1,95 @@
+import re
+
+import pytest
+
+from crawler.journal import CheckpointJournal
+from crawler.pipeline import OutputError, crawl
+
+YEARS = [str(year) for year in range(2015, 2026)]
+
+
+def run_crawl(in_thread, *args, **kwargs):
+    """Run crawl(), failing the test instead of hanging on a deadlock."""
+    return in_thread(crawl, *args, **kwargs).result()
+
+
+def test_profile_failing_halfway_does_not_hang(fixture_fetcher, in_thread):
+    fetcher = fixture_fetcher(failing={"FAILING"})
+    succeeded, failed = [], []
+
+    rows = run_crawl(
+        in_thread,
+        ["FAILING", "HEALTHY"],
+        YEARS,
+        fetcher,
+        queue_size=4,
+        on_scholar=lambda scholar_id, rows: succeeded.append(scholar_id),
+        on_failure=failed.append,
+    )
+
+    assert failed == ["FAILING"]
+    assert succeeded == ["HEALTHY"]
+    healthy = crawl(["HEALTHY"], YEARS, fixture_fetcher())
+    assert [row for row in rows if row[0] == "HEALTHY"] == healthy
+
+
+def test_failing_callback_does_not_stop_the_crawl(fixture_fetcher, in_thread):
+    def on_scholar(scholar_id, rows):
+        raise RuntimeError("callback failed")
+
+    rows = run_crawl(
+        in_thread,
+        ["FIRST", "SECOND"],
+        YEARS,
+        fixture_fetcher(),
+        on_scholar=on_scholar,
+    )
+
+    assert {row[0] for row in rows} == {"FIRST", "SECOND"}
+
+
+def test_failed_scholars_stay_out_of_the_journal(tmp_path, fixture_fetcher, in_thread):
+    path = str(tmp_path / "run.journal.jsonl")
+    fetcher = fixture_fetcher(failing={"FAILING"})
+    with CheckpointJournal(path, YEARS) as journal:
+        run_crawl(
+            in_thread,
+            ["FAILING", "HEALTHY"],
+            YEARS,
+            fetcher,
+            journal=journal,
+            on_failure=lambda scholar_id: None,
+        )
+
+    with CheckpointJournal(path, YEARS, resume=True) as journal:
+        assert journal.scholar_rows("FAILING") is None
+        assert journal.scholar_rows("HEALTHY") is not None
+
+
+def test_failing_output_aborts_the_crawl(fixture_fetcher, in_thread):
+    def on_rows(rows):
+        raise OSError("disk full")
+
+    complete, aborted = fixture_fetcher(), fixture_fetcher()
+    run_crawl(in_thread, ["FIRST", "SECOND"], YEARS, complete)
+    with pytest.raises(OutputError, match="disk full"):
+        run_crawl(in_thread, ["FIRST", "SECOND"], YEARS, aborted, on_rows=on_rows)
+
+    # Stopped at the first failed write instead of crawling everything
+    assert aborted.fetched < complete.fetched
+
+
+def test_unknown_citation_totals_are_still_fetched(fixture_fetcher, in_thread):
+    class NoTotalsFetcher(fixture_fetcher):
+        def iter_profile(self, scholar_id, min_year=None):
+            # A layout change that drops the "Cited by" cells
+            for page in super().iter_profile(scholar_id, min_year):
+                yield re.sub(r'<td class="gsc_a_c">.*?</td>', "", page)
+
+    complete, without_totals = fixture_fetcher(), NoTotalsFetcher()
+    rows = run_crawl(in_thread, ["SCHOLAR"], YEARS, complete)
+    unknown = run_crawl(in_thread, ["SCHOLAR"], YEARS, without_totals)
+    assert [row[:3] for row in unknown] == [row[:3] for row in rows]
+
+    # Only the articles the table lists as uncited were skipped before
+    assert complete.fetched < without_totals.fetched == len(rows)
@@ -0,0 +1,61 @@
+import pytest
+
+from crawler.pool import DriverPool
+
+
+def test_release_hands_the_driver_to_a_waiter(fake_driver, in_thread):
+    pool = DriverPool(fake_driver, size=1)
+    driver = pool.acquire()
+    waiter = in_thread(pool.acquire)
+    assert not waiter.done()
+
+    pool.release(driver)
+
+    assert waiter.result(5) is driver
+
+
+def test_recycling_wakes_a_waiter_to_start_the_replacement(fake_driver, in_thread):
+    pool = DriverPool(fake_driver, size=1, max_uses=1)
+    driver = pool.acquire()
+    waiter = in_thread(pool.acquire)
+    assert not waiter.done()
+
+    pool.release(driver)
+
+    assert waiter.result(5) is not driver
+    assert driver.quit_called
+    assert (pool.started, pool.recycled) == (2, 1)
+
+
+def test_close_wakes_waiters(fake_driver, in_thread):
+    pool = DriverPool(fake_driver, size=1)
+    driver = pool.acquire()
+    waiter = in_thread(pool.acquire)
+    assert not waiter.done()
+
+    pool.close()
+
+    # The waiter gets an error instead of a browser nothing would ever quit
+    with pytest.raises(RuntimeError):
+        waiter.result(5)
+    assert driver.quit_called
+    assert pool.started == 1
+    # Returning a driver quit by close() leaves the pool alone
+    pool.release(driver)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_failed_start_frees_the_slot(fake_driver):
+    attempts = []
+
+    def factory():
+        attempts.append(None)
+        if len(attempts) == 1:
+            raise RuntimeError("chrome did not start")
+        return fake_driver()
+
+    pool = DriverPool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert isinstance(pool.acquire(), fake_driver)
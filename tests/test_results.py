@@ -0,0 +1,64 @@
+import random
+
+from crawler.results import INITIAL_CAPACITY, ResultStore
+
+YEARS = [str(year) for year in range(2018, 2026)]
+
+
+def random_rows(rng, scholar_ids, num_rows):
+    rows = []
+    for idx in range(num_rows):
+        # Publication years partly outside the range, and sometimes missing
+        year = rng.choice([str(rng.randint(2010, 2025)), ""])
+        counts = [rng.choice([-1, 0, rng.randint(1, 50)]) for _ in YEARS]
+        rows.append([rng.choice(scholar_ids), f"Article {idx}", year] + counts)
+    return rows
+
+
+def reference_summary(scholar_ids, rows):
+    """The summary computed row by row in plain Python."""
+    summary = []
+    for scholar_id in scholar_ids:
+        own = [row for row in rows if row[0] == scholar_id]
+        articles = [sum(row[2] == year for row in own) for year in YEARS]
+        citations = [
+            sum(max(row[3 + idx], 0) for row in own) for idx in range(len(YEARS))
+        ]
+        totals = sorted((sum(max(c, 0) for c in row[3:]) for row in own), reverse=True)
+        h_index = sum(total >= rank for rank, total in enumerate(totals, 1))
+        summary.append(
+            [scholar_id, sum(articles)]
+            + articles
+            + [sum(citations)]
+            + citations
+            + [h_index]
+        )
+    return summary
+
+
+def test_summary_matches_a_plain_python_reference():
+    rng = random.Random(0)
+    scholar_ids = ["S1", "S2", "S3", "NOROWS"]
+    # Enough rows to make the store grow past its initial capacity
+    rows = random_rows(rng, scholar_ids[:3], INITIAL_CAPACITY * 3 + 5)
+
+    store = ResultStore(YEARS)
+    for scholar_id in scholar_ids:
+        store.add_scholar(scholar_id)
+    for start in range(0, len(rows), 100):
+        store.add_rows(rows[start : start + 100])
+
+    assert len(store) == len(rows)
+    assert store.summary() == reference_summary(scholar_ids, rows)
+    assert len(store.summary_headers()) == len(store.summary()[0])
+
+
+def test_h_index_of_known_profiles():
+    store = ResultStore(["2025"])
+    store.add_rows(
+        [["A", f"a{idx}", "2025", count] for idx, count in enumerate([10, 8, 5, 4, 3])]
+        + [["B", "b0", "2025", 0], ["B", "b1", "2025", -1]]
+        + [["C", "c0", "2025", 100]]
+    )
+
+    assert store.h_index().tolist() == [4, 0, 1]
@@ -0,0 +1,135 @@
+import re
+
+import pytest
+
+from crawler import fixtures, soupr
+
+BASE_URL = "https://scholar.example"
+YEARS = [str(year) for year in range(1990, 2026)]
+
+PROFILES = {
+    "full": fixtures.profile_page("PARITY00001", 300),
+    "later-page": fixtures.profile_page("PARITY00002", 250, start=100, page_size=100),
+    "other-seed": fixtures.profile_page("PARITY00003", 120, newest_year=2019, seed=7),
+    # A layout change that drops the "Cited by" cells: totals are unknown
+    "no-totals": re.sub(
+        r'<td class="gsc_a_c">.*?</td>', "", fixtures.profile_page("PARITY00004", 50)
+    ),
+}
+ARTICLES = {
+    "recent": fixtures.article_page("PARITY00001:abc"),
+    "long": fixtures.article_page("PARITY00002:def", first_year=1995),
+}
+
+
+def browser_fields(page_source):
+    """
+    Read a page the way browser.PROFILE_FIELDS_SCRIPT and ARTICLE_FIELDS_SCRIPT
+    do (same selectors, textContent and raw attributes), without a browser.
+    """
+    soup = soupr.make_soup(page_source, parser="html.parser")
+
+    def text(element):
+        return element.get_text() if element is not None else None
+
+    def attr(element, name):
+        return element.get(name) if element is not None else None
+
+    rows = []
+    for row in soup.select("#gsc_a_b tr.gsc_a_tr"):
+        year_cell = row.select_one("td.gsc_a_y")
+        title_cell = row.select_one("td.gsc_a_t")
+        link = title_cell.select_one("a.gsc_a_at") if title_cell else None
+        rows.append(
+            [
+                text(link),
+                attr(link, "href"),
+                text(year_cell.select_one("span.gsc_a_h") if year_cell else None),
+                text(row.select_one("td.gsc_a_c")),
+                attr(row.select_one("a.gsc_a_ac"), "href"),
+            ]
+        )
+
+    chart = soup.select_one(".gsc_md_hist_b")
+    if chart is not None:
+        chart = [
+            [text(label) for label in chart.select(".gsc_g_t")],
+            [
+                [attr(bar, "style"), text(bar.select_one(".gsc_g_al"))]
+                for bar in chart.select("a.gsc_g_a")
+            ],
+        ]
+
+    bars = [
+        [attr(bar, "href") or "", text(bar.select_one(".gsc_oci_g_al"))]
+        for bar in soup.select("#gsc_oci_graph_bars .gsc_oci_g_a")
+    ]
+    return {"count": len(rows), "rows": rows, "chart": chart, "bars": bars}
+
+
+def reference_articles(page_source):
+    """What the original full-tree BeautifulSoup implementation returns."""
+    soup = soupr.make_soup(page_source, parser="html.parser")
+    return soupr.get_articles(soup, YEARS, BASE_URL)
+
+
+@pytest.mark.parametrize("parser", soupr.available_parsers())
+@pytest.mark.parametrize("page", PROFILES)
+def test_profile_parsers_match_get_articles(parser, page):
+    page_source = PROFILES[page]
+
+    articles = soupr.parse_profile(page_source, YEARS, BASE_URL, parser)
+
+    assert articles == reference_articles(page_source)
+    assert articles
+
+
+@pytest.mark.parametrize("parser", soupr.available_parsers())
+@pytest.mark.parametrize("page", ARTICLES)
+def test_article_parsers_match_extract_citation_counts(parser, page):
+    page_source = ARTICLES[page]
+    soup = soupr.make_soup(page_source, parser="html.parser")
+
+    counts = soupr.parse_article(page_source, parser)
+
+    assert counts == soupr.extract_citation_counts(soup)
+    assert counts
+
+
+@pytest.mark.parametrize("parser", soupr.available_parsers())
+def test_histogram_parsers_match_get_citation_histogram(parser):
+    page_source = PROFILES["full"]
+    soup = soupr.make_soup(page_source, parser="html.parser")
+
+    histogram = soupr.parse_citation_histogram(page_source, parser)
+
+    assert histogram == soupr.get_citation_histogram(soup)
+    assert histogram
+
+
+@pytest.mark.parametrize("page", PROFILES)
+def test_extracted_profile_fields_match_get_articles(page):
+    page_source = PROFILES[page]
+
+    articles = soupr.parse_profile(browser_fields(page_source), YEARS, BASE_URL)
+
+    assert articles == reference_articles(page_source)
+
+
+def test_extracted_histogram_matches_get_citation_histogram():
+    page_source = PROFILES["full"]
+    soup = soupr.make_soup(page_source, parser="html.parser")
+
+    histogram = soupr.parse_citation_histogram(browser_fields(page_source))
+
+    assert histogram == soupr.get_citation_histogram(soup)
+
+
+@pytest.mark.parametrize("page", ARTICLES)
+def test_extracted_article_fields_match_extract_citation_counts(page):
+    page_source = ARTICLES[page]
+    soup = soupr.make_soup(page_source, parser="html.parser")
+
+    counts = soupr.parse_article(browser_fields(page_source))
+
+    assert counts == soupr.extract_citation_counts(soup)
@@ -0,0 +1,53 @@
+import re
+
+from crawler import fixtures
+from crawler.summary import summarize, summarize_profile, summary_headers
+
+YEARS = [str(year) for year in range(2018, 2026)]
+
+
+def expected_row(scholar_id, num_rows, cited=True):
+    """The summary row read straight from the fixture's own data."""
+    years = [year for _, year, _ in fixtures.profile_rows(scholar_id, num_rows)]
+    articles = [years.count(int(year)) for year in YEARS]
+    histogram = fixtures.profile_citations(scholar_id) if cited else {}
+    citations = [histogram.get(year, 0) for year in YEARS]
+    return [scholar_id, sum(articles)] + articles + [sum(citations)] + citations
+
+
+def test_summary_of_a_paged_profile(fixture_fetcher):
+    fetcher = fixture_fetcher(num_rows=250)
+
+    row = summarize_profile(fetcher, "SUMMARY0001", YEARS)
+
+    assert row == expected_row("SUMMARY0001", 250)
+    assert len(row) == len(summary_headers(YEARS))
+
+
+def test_summary_of_a_profile_without_citation_chart(fixture_fetcher):
+    class UncitedFetcher(fixture_fetcher):
+        def iter_profile(self, scholar_id, min_year=None):
+            for page in super().iter_profile(scholar_id, min_year):
+                yield re.sub(r'<div id="gsc_rsb_cit">.*?</div></div></div>', "", page)
+
+    row = summarize_profile(UncitedFetcher(num_rows=40), "SUMMARY0002", YEARS)
+
+    assert row == expected_row("SUMMARY0002", 40, cited=False)
+
+
+def test_summaries_come_out_in_input_order(fixture_fetcher):
+    scholar_ids = [f"SUMMARY{idx:04d}" for idx in range(6)]
+    rows = []
+
+    count = summarize(scholar_ids, YEARS, fixture_fetcher(num_rows=60), rows.extend, 3)
+
+    assert count == len(scholar_ids)
+    assert rows == [expected_row(scholar_id, 60) for scholar_id in scholar_ids]
+
+
+def test_profile_failing_halfway_is_not_undercounted(fixture_fetcher):
+    fetcher = fixture_fetcher(failing={"FAILING"})
+
+    row = summarize_profile(fetcher, "FAILING", YEARS)
+
+    assert row == ["FAILING"] + [-1] * (2 * len(YEARS) + 2)
@@ -0,0 +1,157 @@
+import random
+
+import pytest
+
+from crawler import throttle
+from crawler.throttle import (
+    AIMDController,
+    BlockedError,
+    CircuitBreaker,
+    Throttle,
+    backoff_delay,
+    is_block_page,
+)
+
+
+class FakeLimiter:
+    """HostRateLimiter stand-in recording the rates it is set to."""
+
+    def __init__(self, rate=1.0):
+        self.rate = rate
+        self.rates = []
+        self.acquired = 0
+
+    def set_rate(self, rate):
+        self.rate = rate
+        self.rates.append(rate)
+
+    def acquire(self, url):
+        self.acquired += 1
+
+
+class Clock:
+    """Stand-in for the time module: sleep() advances monotonic() at once."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle, "time", clock)
+    return clock
+
+
+def test_block_pages():
+    assert is_block_page('<form id="gs_captcha_f">')
+    assert not is_block_page("<html>profile</html>")
+    assert not is_block_page(None)
+
+
+def test_backoff_grows_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(random, "uniform", lambda low, high: high)
+    assert [backoff_delay(attempt) for attempt in range(4)] == [2, 4, 8, 16]
+    assert backoff_delay(20) == 300
+
+
+def test_aimd_halves_on_block_and_creeps_back_up():
+    limiter = FakeLimiter(rate=2.0)
+    controller = AIMDController(limiter, max_rate=4.0, max_concurrency=4)
+
+    controller.on_block()
+    assert (controller.rate, controller.limit) == (1.0, 2)
+    assert limiter.rate == 1.0
+
+    for _ in range(20):
+        controller.on_success()
+    # Additive increase: 0.05 request/s per second of healthy responses
+    assert 1.0 < controller.rate < 2.0
+    assert controller.limit == 4
+
+    for _ in range(10_000):
+        controller.on_success()
+    assert controller.rate == limiter.rate == 4.0
+
+
+def test_aimd_stays_within_its_bounds():
+    limiter = FakeLimiter(rate=1.0)
+    controller = AIMDController(limiter, max_rate=1.0, max_concurrency=2)
+
+    for _ in range(50):
+        controller.on_block()
+    assert controller.rate == controller.min_rate
+    assert controller.limit == 1
+
+
+def test_breaker_opens_after_consecutive_blocks(clock):
+    breaker = CircuitBreaker(threshold=3, cooldown=60, max_cooldown=100)
+
+    breaker.on_block()
+    breaker.on_block()
+    breaker.on_success()
+    breaker.on_block()
+    breaker.wait()
+    # A healthy response in between resets the run of blocks
+    assert clock.slept == []
+
+    breaker.on_block()
+    breaker.on_block()
+    breaker.wait()
+    assert (clock.slept, breaker.trips) == ([60], 1)
+
+    # Another run of blocks doubles the cooldown, up to max_cooldown
+    for _ in range(3):
+        breaker.on_block()
+    breaker.wait()
+    for _ in range(3):
+        breaker.on_block()
+    breaker.wait()
+    assert clock.slept == [60, 100, 100]
+
+    # A healthy response resets the cooldown
+    breaker.on_success()
+    for _ in range(3):
+        breaker.on_block()
+    breaker.wait()
+    assert clock.slept[-1] == 60
+
+
+def test_blocked_request_is_retried_with_backoff(clock, monkeypatch):
+    monkeypatch.setattr(throttle, "backoff_delay", lambda attempt: attempt + 1)
+    limiter = FakeLimiter(rate=1.0)
+    gate = Throttle(limiter, retries=3, breaker=CircuitBreaker(threshold=10))
+    answers = iter([BlockedError("captcha"), BlockedError("captcha"), "page"])
+
+    def fetch():
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    assert gate.request("https://scholar.example/x", fetch) == "page"
+    assert (gate.blocks, gate.retried, limiter.acquired) == (2, 2, 3)
+    assert clock.slept == [1, 2]
+    # Two halvings, then one healthy response
+    assert limiter.rates[:2] == [0.5, 0.25]
+    assert limiter.rate > 0.25
+
+
+def test_request_gives_up_after_the_last_retry(clock, monkeypatch):
+    monkeypatch.setattr(throttle, "backoff_delay", lambda attempt: 0)
+    gate = Throttle(FakeLimiter(), retries=2, breaker=CircuitBreaker(threshold=10))
+
+    def fetch():
+        raise BlockedError("429")
+
+    with pytest.raises(BlockedError):
+        gate.request("https://scholar.example/x", fetch)
+    assert (gate.blocks, gate.retried) == (3, 2)
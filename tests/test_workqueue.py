@@ -0,0 +1,58 @@
+import time
+
+from crawler.workqueue import WorkQueue
+
+YEARS = ["2024", "2025"]
+
+
+def test_heartbeat_keeps_a_slow_scholar_leased(tmp_path):
+    path = str(tmp_path / "crawl.queue")
+    with (
+        WorkQueue(path, YEARS, lease_seconds=0.5) as queue,
+        WorkQueue(path, YEARS, lease_seconds=0.5) as other,
+    ):
+        queue.add(["SLOW"])
+        assert queue.claim("first") == ["SLOW"]
+
+        with queue.heartbeat("first", interval=0.1) as progress:
+            for _ in range(10):
+                progress()
+                time.sleep(0.1)
+            assert other.claim("second") == []
+
+        # Without renewals the lease runs out and another worker takes over
+        time.sleep(0.6)
+        assert other.claim("second") == ["SLOW"]
+
+
+def test_heartbeat_of_a_hung_worker_lets_the_lease_expire(tmp_path):
+    path = str(tmp_path / "crawl.queue")
+    with (
+        WorkQueue(path, YEARS, lease_seconds=0.5) as queue,
+        WorkQueue(path, YEARS, lease_seconds=0.5) as other,
+    ):
+        queue.add(["STUCK"])
+        assert queue.claim("first") == ["STUCK"]
+
+        with queue.heartbeat("first", interval=0.1):
+            # Alive, but never reporting progress
+            time.sleep(0.8)
+            assert other.claim("second") == ["STUCK"]
+
+
+def test_worker_that_lost_its_lease_cannot_overwrite_the_result(tmp_path):
+    path = str(tmp_path / "crawl.queue")
+    with (
+        WorkQueue(path, YEARS, lease_seconds=0.1) as queue,
+        WorkQueue(path, YEARS, lease_seconds=0.1) as other,
+    ):
+        queue.add(["SHARED"])
+        assert queue.claim("first") == ["SHARED"]
+        time.sleep(0.2)
+        assert other.claim("second") == ["SHARED"]
+
+        assert other.complete("SHARED", [["SHARED", "new"]], "second")
+        assert not queue.complete("SHARED", [["SHARED", "stale"]], "first")
+        assert not queue.fail("SHARED", "timed out", "first")
+
+        assert list(queue.iter_rows()) == [[["SHARED", "new"]]]
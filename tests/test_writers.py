@@ -0,0 +1,34 @@
+import sys
+
+import pytest
+
+from crawler import writers
+from crawler.writers import ParquetWriter, missing_dependency
+
+HEADERS = ["scholar_id", "title", "publication_year", "citations_2025"]
+ROWS = [["S1", "A title", "2024", 3], ["S1", "Another", "2025", 0]]
+
+
+def test_failed_open_leaves_the_writer_unopened(tmp_path, monkeypatch):
+    # A None entry makes the import fail, as if pyarrow weren't installed
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    writer = ParquetWriter(str(tmp_path / "rows"), HEADERS)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="requires pyarrow"):
+            writer.write_rows(ROWS)
+
+    assert writer.path is None
+    writer.close()
+
+
+def test_missing_dependency(monkeypatch):
+    monkeypatch.setattr(
+        writers.importlib.util,
+        "find_spec",
+        lambda name: None if name == "pyarrow" else object(),
+    )
+
+    assert missing_dependency("parquet") == "pyarrow"
+    assert missing_dependency("xlsx") is None
+    assert missing_dependency("csv") is None